@@ -1,5 +1,9 @@
 from django.contrib import admin
-from .models import Post, Group
+from django.db import connection
+from django.db.models.expressions import RawSQL
+
+from .models import Comment, Group, Job, Post
+from .search import FTS_TABLE, match_expression
 
 
 class PostAdmin(admin.ModelAdmin):
@@ -8,6 +12,33 @@ class PostAdmin(admin.ModelAdmin):
     list_filter = ('pub_date',)
     empty_value_display = '-пусто-'
 
+    def get_search_results(self, request, queryset, search_term):
+        expression = match_expression(search_term)
+        if connection.vendor != 'sqlite' or not expression:
+            return super().get_search_results(
+                request, queryset, search_term
+            )
+        matched = RawSQL(
+            f'SELECT rowid FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s',
+            (expression,)
+        )
+        return queryset.filter(pk__in=matched), False
+
+
+class CommentAdmin(admin.ModelAdmin):
+    list_display = ('text', 'created', 'author', 'post')
+    search_fields = ('text',)
+    raw_id_fields = ('post', 'author')
+    empty_value_display = '-пусто-'
+
+
+class JobAdmin(admin.ModelAdmin):
+    list_display = ('pk', 'kind', 'status', 'attempts', 'run_after', 'key')
+    list_filter = ('status', 'kind')
+    search_fields = ('key',)
+
 
 admin.site.register(Post, PostAdmin)
 admin.site.register(Group)
+admin.site.register(Comment, CommentAdmin)
+admin.site.register(Job, JobAdmin)
@@ -0,0 +1,72 @@
+from django.conf import settings
+
+from .paginator import ValuesCursorPaginator
+
+# поле ответа -> путь в ORM; значения берутся через values(), без моделей
+API_FIELDS = {
+    'id': 'id',
+    'text': 'text',
+    'pub_date': 'pub_date',
+    'updated': 'updated',
+    'author': 'author__username',
+    'group': 'group__slug',
+    'comments_count': 'comments_count',
+}
+# нужны курсору, даже если клиент их не запросил
+CURSOR_LOOKUPS = ('id', 'pub_date')
+
+
+def parse_fields(value):
+    '''
+    Список полей из ?fields=id,text. Пусто - все поля, неизвестное
+    поле - ValueError.
+    '''
+    if not value:
+        return list(API_FIELDS)
+    fields = [name.strip() for name in value.split(',') if name.strip()]
+    unknown = [name for name in fields if name not in API_FIELDS]
+    if unknown or not fields:
+        raise ValueError(
+            f'Неизвестные поля: {", ".join(unknown)}; '
+            f'доступны {", ".join(API_FIELDS)}'
+        )
+    return fields
+
+
+def parse_limit(value):
+    if not value:
+        return settings.PAGINATOR_PER_PAGE_VAL
+    try:
+        limit = int(value)
+    except ValueError:
+        raise ValueError('limit должен быть числом')
+    return max(1, min(limit, settings.API_MAX_PAGE_SIZE))
+
+
+def page_url(request, cursor):
+    if cursor is None:
+        return None
+    params = request.GET.copy()
+    params['cursor'] = cursor
+    return f'{request.path}?{params.urlencode()}'
+
+
+def posts_payload(request, posts):
+    '''
+    Страница ленты для API одним запросом: ?fields=, ?limit= и ?cursor=.
+    Неверные параметры - ValueError.
+    '''
+    fields = parse_fields(request.GET.get('fields'))
+    lookups = {API_FIELDS[name] for name in fields}.union(CURSOR_LOOKUPS)
+    paginator = ValuesCursorPaginator(
+        posts.values(*lookups), parse_limit(request.GET.get('limit'))
+    )
+    page = paginator.get_page(request.GET.get('cursor'))
+    pairs = [(name, API_FIELDS[name]) for name in fields]
+    return {
+        'results': [
+            {name: row[lookup] for name, lookup in pairs} for row in page
+        ],
+        'next': page_url(request, page.next_cursor),
+        'previous': page_url(request, page.previous_cursor),
+    }
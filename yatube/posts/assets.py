@@ -0,0 +1,181 @@
+import gzip
+import mimetypes
+import os
+import posixpath
+from email.utils import formatdate, parsedate_to_datetime
+from functools import lru_cache
+
+from django.contrib.staticfiles.storage import ManifestStaticFilesStorage
+from django.core.files.base import ContentFile
+
+try:
+    import brotli
+except ImportError:
+    # без пакета brotli собираются только .gz
+    brotli = None
+
+# что имеет смысл сжимать: картинки и шрифты уже сжаты
+COMPRESSIBLE = ('.css', '.js', '.svg', '.json', '.txt', '.xml', '.html',
+                '.map', '.ico', '.eot', '.ttf')
+# кодировка -> расширение варианта, в порядке предпочтения
+ENCODINGS = (('br', '.br'), ('gzip', '.gz'))
+IMMUTABLE = 'public, max-age=31536000, immutable'
+CHUNK_SIZE = 64 * 1024
+
+
+def compressed_variants(data):
+    variants = {'.gz': gzip.compress(data, compresslevel=9, mtime=0)}
+    if brotli is not None:
+        variants['.br'] = brotli.compress(data)
+    # вариант не меньше оригинала не нужен
+    return {suffix: compressed for suffix, compressed in variants.items()
+            if len(compressed) < len(data)}
+
+
+class CompressedManifestStorage(ManifestStaticFilesStorage):
+    '''
+    collectstatic пишет файлы с хэшем содержимого в имени, манифест
+    и рядом с хэшированными css/js/svg - сжатые .gz и .br, чтобы
+    статика не сжималась на каждый запрос.
+    '''
+
+    def post_process(self, paths, dry_run=False, **options):
+        yield from super().post_process(paths, dry_run, **options)
+        if dry_run:
+            return
+        for name in self.hashed_files.values():
+            if name.endswith(COMPRESSIBLE):
+                self.compress(name)
+
+    def compress(self, name):
+        with self.open(name) as original:
+            data = original.read()
+        for suffix, compressed in compressed_variants(data).items():
+            if self.exists(name + suffix):
+                self.delete(name + suffix)
+            self._save(name + suffix, ContentFile(compressed))
+
+    def stored_name(self, name):
+        try:
+            return super().stored_name(name)
+        except ValueError:
+            # до collectstatic (разработка, тесты) манифеста нет -
+            # адрес без хэша; с манифестом ошибка остаётся ошибкой
+            if self.hashed_files:
+                raise
+            return name
+
+
+def accepted_encodings(header):
+    '''
+    Кодировки из Accept-Encoding с ненулевым q.
+    '''
+    accepted = set()
+    for item in header.split(','):
+        coding, _, params = item.strip().partition(';')
+        quality = 1.0
+        params = params.strip()
+        if params.startswith('q='):
+            try:
+                quality = float(params[2:])
+            except ValueError:
+                quality = 0.0
+        if coding and quality > 0:
+            accepted.add(coding.strip().lower())
+    return accepted
+
+
+class StaticAsset:
+    def __init__(self, path, hashed):
+        stat = os.stat(path)
+        self.path = path
+        self.size = stat.st_size
+        self.last_modified = formatdate(stat.st_mtime, usegmt=True)
+        self.mtime = int(stat.st_mtime)
+        content_type, _ = mimetypes.guess_type(path)
+        self.content_type = content_type or 'application/octet-stream'
+        self.cache_control = IMMUTABLE if hashed else 'public, max-age=60'
+        self.variants = [
+            (coding, path + suffix, os.path.getsize(path + suffix))
+            for coding, suffix in ENCODINGS
+            if os.path.isfile(path + suffix)
+        ]
+
+
+class PrecompressedStaticFiles:
+    '''
+    WSGI-обёртка, отдающая STATIC_ROOT без Django: готовый .br или .gz
+    по Accept-Encoding, для файлов с хэшем - Cache-Control immutable
+    на год. Чего нет в STATIC_ROOT, уходит в приложение.
+    '''
+
+    def __init__(self, application, root, prefix):
+        self.application = application
+        self.root = os.path.abspath(root)
+        self.prefix = prefix
+        storage = CompressedManifestStorage(location=self.root)
+        self.hashed = set(storage.hashed_files.values())
+        # файлы статики между выкладками не меняются
+        self.find = lru_cache(maxsize=4096)(self.find)
+
+    def find(self, name):
+        name = posixpath.normpath(name).lstrip('/')
+        if name.startswith('..') or name.endswith(('.gz', '.br')):
+            return None
+        path = os.path.join(self.root, *name.split('/'))
+        if not os.path.isfile(path):
+            return None
+        return StaticAsset(path, name in self.hashed)
+
+    def __call__(self, environ, start_response):
+        path = environ.get('PATH_INFO', '')
+        method = environ.get('REQUEST_METHOD')
+        if not path.startswith(self.prefix) or method not in ('GET',
+                                                              'HEAD'):
+            return self.application(environ, start_response)
+        asset = self.find(path[len(self.prefix):])
+        if asset is None:
+            return self.application(environ, start_response)
+        headers = [
+            ('Content-Type', asset.content_type),
+            ('Cache-Control', asset.cache_control),
+            ('Last-Modified', asset.last_modified),
+            ('Vary', 'Accept-Encoding'),
+        ]
+        if self.not_modified(environ, asset):
+            start_response('304 Not Modified', headers)
+            return []
+        accepted = accepted_encodings(environ.get('HTTP_ACCEPT_ENCODING', ''))
+        file_path, size = asset.path, asset.size
+        for coding, variant_path, variant_size in asset.variants:
+            if coding in accepted:
+                file_path, size = variant_path, variant_size
+                headers.append(('Content-Encoding', coding))
+                break
+        headers.append(('Content-Length', str(size)))
+        start_response('200 OK', headers)
+        if method == 'HEAD':
+            return []
+        source = open(file_path, 'rb')
+        file_wrapper = environ.get('wsgi.file_wrapper')
+        if file_wrapper is not None:
+            return file_wrapper(source, CHUNK_SIZE)
+        return iter_file(source)
+
+    def not_modified(self, environ, asset):
+        since = environ.get('HTTP_IF_MODIFIED_SINCE')
+        if not since:
+            return False
+        try:
+            return parsedate_to_datetime(since).timestamp() >= asset.mtime
+        except (TypeError, ValueError):
+            return False
+
+
+def iter_file(source):
+    with source:
+        while True:
+            chunk = source.read(CHUNK_SIZE)
+            if not chunk:
+                return
+            yield chunk
@@ -0,0 +1,96 @@
+from django.conf import settings
+from django.contrib import auth
+from django.contrib.auth import (BACKEND_SESSION_KEY, HASH_SESSION_KEY,
+                                 SESSION_KEY, get_user_model, load_backend)
+from django.contrib.auth.backends import ModelBackend
+from django.contrib.auth.middleware import AuthenticationMiddleware
+from django.contrib.auth.models import AnonymousUser
+from django.core.cache import caches
+from django.utils.crypto import constant_time_compare
+from django.utils.functional import SimpleLazyObject
+
+# поля снимка; остальные (пароль, даты) догрузятся из БД при обращении,
+# а save() отложенного экземпляра пишет только загруженные поля
+SNAPSHOT_FIELDS = ('id', 'username', 'first_name', 'last_name', 'email',
+                   'is_active', 'is_staff', 'is_superuser')
+
+
+def snapshot_key(user_id):
+    return f'auth:user:{user_id}'
+
+
+def forget_user(user_id):
+    caches[settings.AUTH_CACHE].delete(snapshot_key(user_id))
+
+
+def user_snapshot(user_id):
+    '''
+    Снимок пользователя и хэш для проверки сессии из кэша, при промахе -
+    один запрос к БД. Неактивный или удалённый пользователь - None.
+    '''
+    cache = caches[settings.AUTH_CACHE]
+    key = snapshot_key(user_id)
+    cached = cache.get(key)
+    if cached is not None:
+        return cached
+    user_model = get_user_model()
+    user = user_model._default_manager.filter(pk=user_id).first()
+    if user is None or not user.is_active:
+        return None, None
+    auth_hash = user.get_session_auth_hash()
+    # from_db ждёт значения в порядке полей модели
+    fields = [field.attname for field in user_model._meta.concrete_fields
+              if field.attname in SNAPSHOT_FIELDS]
+    snapshot = user_model.from_db(
+        user._state.db, fields, [getattr(user, field) for field in fields]
+    )
+    cache.set(key, (snapshot, auth_hash), settings.AUTH_SNAPSHOT_TIMEOUT)
+    return snapshot, auth_hash
+
+
+def get_user(request):
+    '''
+    Как django.contrib.auth.get_user, но пользователь берётся из снимка.
+    Для бэкендов не на основе ModelBackend - обычный путь.
+    '''
+    try:
+        user_id = get_user_model()._meta.pk.to_python(
+            request.session[SESSION_KEY]
+        )
+        backend_path = request.session[BACKEND_SESSION_KEY]
+    except KeyError:
+        return AnonymousUser()
+    if backend_path not in settings.AUTHENTICATION_BACKENDS:
+        return AnonymousUser()
+    if not isinstance(load_backend(backend_path), ModelBackend):
+        return auth.get_user(request)
+    user, auth_hash = user_snapshot(user_id)
+    if user is None:
+        return AnonymousUser()
+    # смена пароля сбрасывает снимок, и старые сессии перестают работать
+    session_hash = request.session.get(HASH_SESSION_KEY)
+    if not session_hash or not constant_time_compare(session_hash,
+                                                     auth_hash):
+        request.session.flush()
+        return AnonymousUser()
+    user.backend = backend_path
+    return user
+
+
+def lazy_user(request):
+    if not hasattr(request, '_cached_user'):
+        request._cached_user = get_user(request)
+    return request._cached_user
+
+
+class CachedAuthenticationMiddleware(AuthenticationMiddleware):
+    '''
+    request.user из кэшированного снимка: вместе с сессиями cached_db
+    запрос вошедшего читателя не обращается к БД до представления.
+    Снимок сбрасывается при сохранении и удалении пользователя и при
+    выходе.
+    '''
+
+    def process_request(self, request):
+        super().process_request(request)
+        request.user = SimpleLazyObject(lambda: lazy_user(request))
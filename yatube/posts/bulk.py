@@ -0,0 +1,53 @@
+from collections import Counter
+from contextlib import contextmanager
+
+from .counters import change_author_posts_count, change_group_posts_count
+from .models import Group, Post, User
+from .page_cache import (INDEX_SCOPE, author_scope, group_scope,
+                         invalidate_scopes)
+from .paginator import invalidate_feed_count
+
+
+@contextmanager
+def own_timestamps():
+    '''
+    Отключает auto_now/auto_now_add у дат поста, чтобы bulk_create
+    сохранил переданные даты.
+    '''
+    fields = [Post._meta.get_field(name) for name in ('pub_date', 'updated')]
+    saved = [(field.auto_now, field.auto_now_add) for field in fields]
+    for field in fields:
+        field.auto_now = field.auto_now_add = False
+    try:
+        yield
+    finally:
+        for field, (auto_now, auto_now_add) in zip(fields, saved):
+            field.auto_now, field.auto_now_add = auto_now, auto_now_add
+
+
+def count_created_posts(posts):
+    '''
+    Делает для созданных через bulk_create постов то, что сигналы делают
+    для одиночных: двигает счётчики авторов и групп (по одному запросу
+    на автора и группу) и сбрасывает закэшированные страницы.
+    '''
+    authors = Counter(post.author_id for post in posts)
+    groups = Counter(
+        post.group_id for post in posts if post.group_id is not None
+    )
+    for user_id, delta in authors.items():
+        change_author_posts_count(user_id, delta)
+    for group_id, delta in groups.items():
+        change_group_posts_count(group_id, delta)
+    usernames = User.objects.filter(
+        pk__in=authors
+    ).values_list('username', flat=True)
+    slugs = Group.objects.filter(
+        pk__in=groups
+    ).values_list('slug', flat=True)
+    invalidate_feed_count(INDEX_SCOPE)
+    invalidate_scopes(
+        INDEX_SCOPE,
+        *map(author_scope, usernames),
+        *map(group_scope, slugs)
+    )
@@ -0,0 +1,41 @@
+from django.conf import settings
+from django.core.checks import Tags, Warning, register
+
+CACHED_AUTH_MIDDLEWARE = 'posts.auth.CachedAuthenticationMiddleware'
+# бэкенды, у которых данные живут в памяти одного процесса
+PROCESS_LOCAL_BACKENDS = (
+    'django.core.cache.backends.locmem.LocMemCache',
+    'django.core.cache.backends.dummy.DummyCache',
+)
+
+
+def shared_caches():
+    # псевдоним кэша -> что сломается, если он у каждого процесса свой
+    caches = {
+        settings.RATE_LIMIT_CACHE: (
+            'каждый процесс считает лимиты частоты запросов отдельно',
+            'YATUBE_RATELIMIT_CACHE'
+        ),
+    }
+    if CACHED_AUTH_MIDDLEWARE in settings.MIDDLEWARE:
+        caches[settings.AUTH_CACHE] = (
+            'выход и смена пароля не сразу видны другим процессам',
+            'YATUBE_AUTH_CACHE'
+        )
+    return caches
+
+
+@register(Tags.caches, deploy=True)
+def check_shared_caches(app_configs, **kwargs):
+    warnings = []
+    for alias, (problem, variable) in shared_caches().items():
+        backend = settings.CACHES[alias]['BACKEND']
+        if backend in PROCESS_LOCAL_BACKENDS:
+            warnings.append(Warning(
+                f'Кэш {alias!r} ({backend}) не общий для процессов: '
+                f'{problem}',
+                hint=f'Задайте {variable}_BACKEND и {variable}_LOCATION, '
+                     f'например memcached',
+                id='posts.W001',
+            ))
+    return warnings
@@ -0,0 +1,62 @@
+import hashlib
+
+from django.views.decorators.http import condition
+from django.views.decorators.vary import vary_on_cookie
+
+from .models import Group, Post, UserStats
+
+
+def post_stamp(username, post_id):
+    row = Post.objects.filter(
+        pk=post_id, author__username=username
+    ).values_list(
+        'updated', 'commented', 'author__stats__changed'
+    ).first()
+    if row is None:
+        return None
+    return max(stamp for stamp in row if stamp is not None)
+
+
+def profile_stamp(username):
+    return UserStats.objects.filter(
+        user__username=username
+    ).values_list('changed', flat=True).first()
+
+
+def group_stamp(slug):
+    return Group.objects.filter(
+        slug=slug
+    ).values_list('changed', flat=True).first()
+
+
+def conditional_page(get_stamp):
+    '''
+    Отвечает 304 по If-None-Match/If-Modified-Since, не вызывая view.
+    get_stamp получает аргументы view и одним запросом возвращает время
+    последнего изменения всего, что показывает страница. ETag учитывает
+    читателя, Last-Modified отдаётся только анонимам: для них страница
+    одинакова.
+    '''
+    def stamp(request, *args, **kwargs):
+        if not hasattr(request, '_page_stamp'):
+            request._page_stamp = get_stamp(*args, **kwargs)
+        return request._page_stamp
+
+    def etag(request, *args, **kwargs):
+        changed = stamp(request, *args, **kwargs)
+        if changed is None:
+            return None
+        viewer = request.user.pk if request.user.is_authenticated else ''
+        raw = f'{request.path}:{changed.isoformat()}:{viewer}'
+        return hashlib.md5(raw.encode()).hexdigest()
+
+    def last_modified(request, *args, **kwargs):
+        if request.user.is_authenticated:
+            return None
+        return stamp(request, *args, **kwargs)
+
+    def decorator(view):
+        return vary_on_cookie(condition(
+            etag_func=etag, last_modified_func=last_modified
+        )(view))
+    return decorator
@@ -0,0 +1,213 @@
+from django.db import transaction
+from django.db.models import (Count, F, IntegerField, Max, OuterRef,
+                              Subquery)
+from django.db.models.functions import Coalesce, Greatest
+from django.utils import timezone
+
+from .models import Follow, Group, Post, User, UserStats
+
+
+def change_author_posts_count(user_id, delta):
+    updated = UserStats.objects.filter(user_id=user_id).update(
+        posts_count=Greatest(F('posts_count') + delta, 0),
+        changed=timezone.now()
+    )
+    if not updated and delta > 0:
+        # строки ещё нет: пользователь создан в обход сигналов
+        UserStats.objects.get_or_create(
+            user_id=user_id, defaults={'posts_count': delta}
+        )
+
+
+def change_follow_counts(user_id, author_id, delta):
+    '''
+    Подписка user на author: двигает следующих у одного
+    и подписчиков у другого.
+    '''
+    for pk, field in ((user_id, 'following_count'),
+                      (author_id, 'followers_count')):
+        updated = UserStats.objects.filter(user_id=pk).update(
+            **{field: Greatest(F(field) + delta, 0)},
+            changed=timezone.now()
+        )
+        if not updated and delta > 0:
+            UserStats.objects.get_or_create(
+                user_id=pk, defaults={field: delta}
+            )
+
+
+def latest_post_date():
+    '''
+    Подзапрос даты последнего поста группы: одна запись индекса
+    post_group_pub_date_idx.
+    '''
+    return Subquery(
+        Post.objects.filter(group=OuterRef('pk'))
+        .order_by('-pub_date').values('pub_date')[:1]
+    )
+
+
+def change_group_posts_count(group_id, delta):
+    '''
+    Двигает счётчик группы и тем же UPDATE перечитывает дату её
+    последнего поста: пост уже добавлен, перенесён или удалён.
+    '''
+    if group_id is None:
+        return
+    Group.objects.filter(pk=group_id).update(
+        posts_count=Greatest(F('posts_count') + delta, 0),
+        last_post=latest_post_date(),
+        changed=timezone.now()
+    )
+
+
+def change_post_comments_count(post_id, delta):
+    Post.objects.filter(pk=post_id).update(
+        comments_count=Greatest(F('comments_count') + delta, 0),
+        commented=timezone.now()
+    )
+
+
+def touch_author(user_id):
+    '''
+    Отмечает, что страницы автора изменились (для ETag/Last-Modified).
+    '''
+    UserStats.objects.filter(user_id=user_id).update(changed=timezone.now())
+
+
+def touch_group(group_id):
+    if group_id is not None:
+        Group.objects.filter(pk=group_id).update(changed=timezone.now())
+
+
+def touch_groups(group_ids):
+    Group.objects.filter(pk__in=group_ids).update(changed=timezone.now())
+
+
+def recount_authors(batch_size):
+    '''
+    Пересчитывает счётчики авторов пачками по id, возвращает
+    число исправленных строк.
+    '''
+    fixed = 0
+    last_id = 0
+    while True:
+        users = list(
+            User.objects.filter(pk__gt=last_id)
+            .order_by('pk')
+            .annotate(actual=Count('posts'))
+            .values_list('pk', 'actual')[:batch_size]
+        )
+        if not users:
+            return fixed
+        last_id = users[-1][0]
+        stored = dict(
+            UserStats.objects.filter(
+                user_id__in=[pk for pk, _ in users]
+            ).values_list('user_id', 'posts_count')
+        )
+        missing = [
+            UserStats(user_id=pk, posts_count=actual)
+            for pk, actual in users if pk not in stored
+        ]
+        drifted = [
+            UserStats(user_id=pk, posts_count=actual)
+            for pk, actual in users
+            if pk in stored and stored[pk] != actual
+        ]
+        with transaction.atomic():
+            UserStats.objects.bulk_create(missing)
+            UserStats.objects.bulk_update(drifted, ['posts_count'])
+        fixed += len(missing) + len(drifted)
+
+
+def recount_groups(batch_size):
+    fixed = 0
+    last_id = 0
+    while True:
+        groups = list(
+            Group.objects.filter(pk__gt=last_id)
+            .order_by('pk')
+            .annotate(actual=Count('posts'),
+                      actual_last=Max('posts__pub_date'))
+            .values_list('pk', 'posts_count', 'last_post', 'actual',
+                         'actual_last')[:batch_size]
+        )
+        if not groups:
+            return fixed
+        last_id = groups[-1][0]
+        drifted = [
+            Group(pk=pk, posts_count=actual, last_post=actual_last)
+            for pk, stored, stored_last, actual, actual_last in groups
+            if (stored, stored_last) != (actual, actual_last)
+        ]
+        Group.objects.bulk_update(drifted, ['posts_count', 'last_post'])
+        fixed += len(drifted)
+
+
+def recount_comments(batch_size):
+    fixed = 0
+    last_id = 0
+    while True:
+        posts = list(
+            Post.objects.filter(pk__gt=last_id)
+            .order_by('pk')
+            .annotate(actual=Count('comments'))
+            .values_list('pk', 'comments_count', 'actual')[:batch_size]
+        )
+        if not posts:
+            return fixed
+        last_id = posts[-1][0]
+        drifted = [
+            Post(pk=pk, comments_count=actual)
+            for pk, stored, actual in posts if stored != actual
+        ]
+        Post.objects.bulk_update(drifted, ['comments_count'])
+        fixed += len(drifted)
+
+
+def follow_count(field):
+    '''
+    Подзапрос числа подписок, где пользователь стоит в поле field.
+    '''
+    counts = Follow.objects.filter(
+        **{field: OuterRef('pk')}
+    ).order_by().values(field).annotate(total=Count('pk')).values('total')
+    return Coalesce(Subquery(counts, output_field=IntegerField()), 0)
+
+
+def recount_follows(batch_size):
+    fixed = 0
+    last_id = 0
+    while True:
+        users = list(
+            User.objects.filter(pk__gt=last_id)
+            .order_by('pk')
+            .annotate(actual_followers=follow_count('author'),
+                      actual_following=follow_count('user'))
+            .values_list('pk', 'actual_followers',
+                         'actual_following')[:batch_size]
+        )
+        if not users:
+            return fixed
+        last_id = users[-1][0]
+        stored = {
+            pk: (followers, following)
+            for pk, followers, following in UserStats.objects.filter(
+                user_id__in=[pk for pk, _, _ in users]
+            ).values_list('user_id', 'followers_count', 'following_count')
+        }
+        drifted = [
+            UserStats(user_id=pk, followers_count=followers,
+                      following_count=following)
+            for pk, followers, following in users
+            if stored.get(pk, (0, 0)) != (followers, following)
+        ]
+        missing = [stats for stats in drifted if stats.pk not in stored]
+        with transaction.atomic():
+            UserStats.objects.bulk_create(missing)
+            UserStats.objects.bulk_update(
+                [stats for stats in drifted if stats.pk in stored],
+                ['followers_count', 'following_count']
+            )
+        fixed += len(drifted)
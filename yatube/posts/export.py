@@ -0,0 +1,104 @@
+import csv
+import json
+import zlib
+from datetime import datetime, time, timedelta
+
+from django.utils import timezone
+from django.utils.dateparse import parse_date
+
+from .models import Post
+
+FORMATS = ('jsonl', 'csv')
+CONTENT_TYPES = {
+    'jsonl': 'application/x-ndjson; charset=utf-8',
+    'csv': 'text/csv; charset=utf-8',
+}
+FIELDS = ('id', 'text', 'author', 'group', 'pub_date')
+# столько строк Django забирает из курсора БД за раз
+CHUNK_SIZE = 2000
+
+
+def day_start(value, name):
+    day = parse_date(value)
+    if day is None:
+        raise ValueError(f'{name}: ожидается дата в формате ГГГГ-ММ-ДД')
+    return timezone.make_aware(datetime.combine(day, time.min))
+
+
+def export_queryset(group=None, author=None, since=None, until=None):
+    '''
+    Строки экспорта одним запросом без моделей. group и author - slug
+    и username, since и until - даты ГГГГ-ММ-ДД включительно.
+    Неверная дата - ValueError.
+    '''
+    posts = Post.objects.order_by('pk')
+    if group:
+        posts = posts.filter(group__slug=group)
+    if author:
+        posts = posts.filter(author__username=author)
+    # границы как диапазон pub_date, а не __date, чтобы работал индекс
+    if since:
+        posts = posts.filter(pub_date__gte=day_start(since, 'since'))
+    if until:
+        posts = posts.filter(
+            pub_date__lt=day_start(until, 'until') + timedelta(days=1)
+        )
+    return posts.values_list(
+        'id', 'text', 'author__username', 'group__slug', 'pub_date'
+    )
+
+
+class Echo:
+    '''
+    Файлоподобный объект для csv.writer: возвращает строку, а не пишет её.
+    '''
+    def write(self, value):
+        return value
+
+
+def export_lines(queryset, file_format, chunk_size=CHUNK_SIZE):
+    '''
+    Генератор строк файла: в памяти не больше chunk_size записей.
+    '''
+    rows = queryset.iterator(chunk_size=chunk_size)
+    if file_format == 'csv':
+        writer = csv.writer(Echo())
+        yield writer.writerow(FIELDS)
+        for pk, text, author, group, pub_date in rows:
+            yield writer.writerow(
+                (pk, text, author, group or '', pub_date.isoformat())
+            )
+        return
+    for pk, text, author, group, pub_date in rows:
+        yield json.dumps(
+            dict(zip(FIELDS, (pk, text, author, group,
+                              pub_date.isoformat()))),
+            ensure_ascii=False
+        ) + '\n'
+
+
+def encode(lines, compress=False, buffer_size=64 * 1024):
+    '''
+    Кодирует строки в байты и на лету сжимает gzip. Мелкие строки
+    склеиваются в куски около buffer_size, чтобы не отдавать клиенту
+    по несколько байт.
+    '''
+    compressor = zlib.compressobj(wbits=31) if compress else None
+    buffer = []
+    size = 0
+    for line in lines:
+        data = line.encode()
+        buffer.append(data)
+        size += len(data)
+        if size >= buffer_size:
+            chunk = b''.join(buffer)
+            buffer, size = [], 0
+            if compressor:
+                chunk = compressor.compress(chunk)
+            if chunk:
+                yield chunk
+    chunk = b''.join(buffer)
+    if compressor:
+        chunk = compressor.compress(chunk) + compressor.flush()
+    if chunk:
+        yield chunk
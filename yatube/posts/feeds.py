@@ -0,0 +1,120 @@
+import hashlib
+
+from django.conf import settings
+from django.contrib.syndication.views import Feed
+from django.shortcuts import get_object_or_404
+from django.urls import reverse
+from django.utils.feedgenerator import Atom1Feed
+from django.utils.http import quote_etag
+from django.utils.text import Truncator
+
+from .models import Group, Post, User
+from .page_cache import (INDEX_SCOPE, anonymous_page_cache, author_scope,
+                         group_scope)
+
+
+class LatestPostsFeed(Feed):
+    title = 'Yatube: новые записи'
+    description = 'Последние записи всех авторов'
+
+    def link(self):
+        return reverse('index')
+
+    def posts(self, obj):
+        return Post.objects.feed()
+
+    def items(self, obj):
+        return self.posts(obj)[:settings.SYNDICATION_FEED_SIZE]
+
+    def item_title(self, item):
+        return Truncator(item.text).words(8)
+
+    def item_description(self, item):
+        return item.text
+
+    def item_link(self, item):
+        return reverse('post', args=[item.author.username, item.pk])
+
+    def item_pubdate(self, item):
+        return item.pub_date
+
+    def item_updateddate(self, item):
+        return item.updated
+
+    def item_author_name(self, item):
+        return item.author.get_full_name() or item.author.username
+
+
+class GroupPostsFeed(LatestPostsFeed):
+    def get_object(self, request, slug):
+        return get_object_or_404(Group, slug=slug)
+
+    def title(self, obj):
+        return f'Yatube: {obj.title}'
+
+    def description(self, obj):
+        return obj.description
+
+    def link(self, obj):
+        return reverse('show_group_post', args=[obj.slug])
+
+    def posts(self, obj):
+        return Post.objects.feed().filter(group=obj)
+
+
+class AuthorPostsFeed(LatestPostsFeed):
+    def get_object(self, request, username):
+        return get_object_or_404(User, username=username)
+
+    def title(self, obj):
+        return f'Yatube: {obj.get_full_name() or obj.username}'
+
+    def description(self, obj):
+        return f'Записи автора {obj.username}'
+
+    def link(self, obj):
+        return reverse('profile', args=[obj.username])
+
+    def posts(self, obj):
+        return Post.objects.feed().filter(author=obj)
+
+
+class AtomMixin:
+    feed_type = Atom1Feed
+
+    def subtitle(self, obj):
+        return self._get_dynamic_attr('description', obj)
+
+
+def feed_view(feed, get_scopes):
+    '''
+    View ленты: отрисовывается один раз до записи в её область
+    и отдаётся с ETag/Last-Modified, поэтому повторный опрос
+    читалкой заканчивается 304.
+    '''
+    @anonymous_page_cache(get_scopes)
+    def view(request, *args, **kwargs):
+        response = feed(request, *args, **kwargs)
+        response['ETag'] = quote_etag(
+            hashlib.md5(response.content).hexdigest()
+        )
+        return response
+    return view
+
+
+def atom(feed_class):
+    return type(f'Atom{feed_class.__name__}', (AtomMixin, feed_class), {})
+
+
+latest_rss = feed_view(LatestPostsFeed(), lambda: [INDEX_SCOPE])
+latest_atom = feed_view(atom(LatestPostsFeed)(), lambda: [INDEX_SCOPE])
+group_rss = feed_view(GroupPostsFeed(), lambda slug: [group_scope(slug)])
+group_atom = feed_view(
+    atom(GroupPostsFeed)(), lambda slug: [group_scope(slug)]
+)
+author_rss = feed_view(
+    AuthorPostsFeed(), lambda username: [author_scope(username)]
+)
+author_atom = feed_view(
+    atom(AuthorPostsFeed)(), lambda username: [author_scope(username)]
+)
@@ -1,4 +1,4 @@
-from posts.models import Post
+from posts.models import Comment, Post
 from django.forms import ModelForm
 from django.utils.translation import gettext_lazy as _
 
@@ -6,8 +6,18 @@ from django.utils.translation import gettext_lazy as _
 class PostForm(ModelForm):
     class Meta:
         model = Post
-        fields = ['text', 'group']
+        fields = ['text', 'group', 'image']
         labels = {
             'text': _('Текст'),
             'group': _('Группа'),
+            'image': _('Картинка'),
+        }
+
+
+class CommentForm(ModelForm):
+    class Meta:
+        model = Comment
+        fields = ['text']
+        labels = {
+            'text': _('Комментарий'),
         }
@@ -0,0 +1,128 @@
+import hashlib
+from functools import lru_cache
+
+from django.conf import settings
+from django.core.cache import cache
+from django.template import Context
+from django.template.loader import get_template
+from django.urls import reverse
+from django.utils.safestring import mark_safe
+
+from .page_cache import depend_on, post_scope
+from .thumbnails import attach_images
+
+CARD_TEMPLATE = 'include/post_item.html'
+ROW_TEMPLATE = 'include/post_row.html'
+# id-заглушка, вместо которой в образец адреса подставляется id поста
+URL_SENTINEL = 2147483647
+
+
+@lru_cache(maxsize=None)
+def compiled_template(template_name):
+    return get_template(template_name).template
+
+
+def card_template(template_name):
+    '''
+    Скомпилированный шаблон карточки: один раз на процесс, а при DEBUG
+    заново, чтобы правки шаблона были видны сразу.
+    '''
+    if settings.DEBUG:
+        return get_template(template_name).template
+    return compiled_template(template_name)
+
+
+def url_pattern(name, username):
+    start, end = reverse(
+        name, args=[username, URL_SENTINEL]
+    ).rsplit(str(URL_SENTINEL), 1)
+    return start, end
+
+
+def attach_links(posts):
+    '''
+    Кладёт в посты адреса профиля, поста и правки: reverse по разу
+    на автора страницы, адреса постов - подстановка id в образец.
+    '''
+    patterns = {}
+    for post in posts:
+        username = post.author.username
+        if username not in patterns:
+            patterns[username] = (
+                reverse('profile', args=[username]),
+                url_pattern('post', username),
+                url_pattern('post_edit', username),
+            )
+        profile, (post_start, post_end), (edit_start, edit_end) = (
+            patterns[username]
+        )
+        post.profile_url = profile
+        post.url = f'{post_start}{post.pk}{post_end}'
+        post.edit_url = f'{edit_start}{post.pk}{edit_end}'
+
+
+def render_cards(posts, user, template_name=CARD_TEMPLATE):
+    '''
+    Отрисовывает карточки постов одним скомпилированным шаблоном
+    в общем контексте, без поиска шаблона и reverse на каждый пост.
+    '''
+    template = card_template(template_name)
+    attach_links(posts)
+    attach_images(posts)
+    context = Context({'user': user})
+    cards = []
+    for post in posts:
+        with context.push(post=post):
+            cards.append(template.render(context))
+    return cards
+
+
+def card_version(post):
+    '''
+    Версия карточки: меняется при любом сохранении поста (в том числе
+    смене группы), переименовании автора, готовности миниатюр и новом
+    комментарии.
+    '''
+    author = post.author
+    stamp = (
+        f'{post.updated.timestamp()}:{author.username}:'
+        f'{author.get_full_name()}:{post.image.name}:{post.thumbnails_ready}:'
+        f'{post.comments_count}'
+    )
+    return hashlib.md5(stamp.encode()).hexdigest()
+
+
+def card_key(template_name, post, is_author):
+    return (
+        f'post_card:{template_name}:{post.pk}:'
+        f'{card_version(post)}:{int(is_author)}'
+    )
+
+
+def attach_cards(request, posts, template_name=CARD_TEMPLATE):
+    '''
+    Кладёт в post.card отрисованную карточку каждого поста страницы.
+    Готовые карточки берутся из кэша одним get_many, отрисовываются
+    только промахи. Кнопка редактирования зависит от читателя, поэтому
+    у автора своя версия карточки. Закэшированная страница с этими
+    карточками устаревает при изменении любого из постов (post_scope).
+    '''
+    posts = list(posts)
+    depend_on(request, *(post_scope(post.pk) for post in posts))
+    keys = {
+        post.pk: card_key(
+            template_name, post, request.user.pk == post.author_id
+        )
+        for post in posts
+    }
+    cards = cache.get_many(keys.values())
+    misses = [post for post in posts if keys[post.pk] not in cards]
+    missed = dict(zip(
+        (keys[post.pk] for post in misses),
+        render_cards(misses, request.user, template_name)
+    ))
+    cards.update(missed)
+    for post in posts:
+        post.card = mark_safe(cards[keys[post.pk]])
+    if missed:
+        cache.set_many(missed, settings.POST_CARD_CACHE_TIMEOUT)
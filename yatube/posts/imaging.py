@@ -0,0 +1,29 @@
+import os
+
+from PIL import Image, ImageOps
+
+# только Pillow и файлы, без Django: его вызывает задача thumbnails
+# в процессах run_workers и команда regenerate_thumbnails
+
+
+def make_thumbnails(source, targets):
+    '''
+    Делает миниатюры картинки source. targets - список
+    (путь, ширина, высота, crop): crop обрезает по центру до точного
+    размера, иначе картинка вписывается в размер. Файлы пишутся через
+    временный, чтобы читатель не увидел недописанную миниатюру.
+    '''
+    with Image.open(source) as original:
+        image = ImageOps.exif_transpose(original).convert('RGB')
+    for path, width, height, crop in targets:
+        if crop:
+            thumb = ImageOps.fit(image, (width, height), Image.LANCZOS)
+        else:
+            thumb = image.copy()
+            thumb.thumbnail((width, height), Image.LANCZOS)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        temporary = f'{path}.tmp'
+        thumb.save(temporary, 'JPEG', quality=85, optimize=True,
+                   progressive=True)
+        os.replace(temporary, path)
+    return [target[0] for target in targets]
@@ -0,0 +1,181 @@
+import json
+import logging
+import os
+import random
+import socket
+import traceback
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+
+from .models import Job
+
+logger = logging.getLogger('posts.jobs')
+
+# вид задачи -> (обработчик, сколько задач он получает за раз)
+HANDLERS = {}
+
+
+def handler(kind, batch_size=1):
+    '''
+    Регистрирует обработчик задач kind. Он получает список payload
+    (до batch_size задач одного вида) и выполняется в транзакции.
+    Обработчик должен быть идемпотентным: после ошибки или падения
+    воркера задача выполняется снова.
+    '''
+    def register(function):
+        HANDLERS[kind] = (function, batch_size)
+        return function
+    return register
+
+
+def enqueue(kind, payload=None, key=None, delay=0):
+    '''
+    Ставит задачу одним INSERT. В транзакции запроса воркеры увидят
+    задачу только после коммита, а при откате её не будет вовсе.
+    Задача с ключом, который уже есть в очереди, не добавляется.
+    '''
+    Job.objects.bulk_create([Job(
+        kind=kind,
+        payload=json.dumps(payload or {}),
+        key=key,
+        run_after=timezone.now() + timedelta(seconds=delay),
+    )], ignore_conflicts=True)
+
+
+def worker_name():
+    return f'{socket.gethostname()}:{os.getpid()}'
+
+
+def retry_delay(attempts):
+    delay = min(
+        settings.JOB_RETRY_DELAY * 2 ** (attempts - 1),
+        settings.JOB_RETRY_MAX_DELAY
+    )
+    # разброс, чтобы упавшие вместе задачи не повторялись разом
+    return delay * random.uniform(1, 1.5)
+
+
+def release_expired(now):
+    '''
+    Возвращает в очередь задачи воркеров, не уложившихся в JOB_LEASE
+    (обычно упавших). Попытка при этом засчитывается.
+    '''
+    expired = Job.objects.filter(status=Job.RUNNING, locked_until__lt=now)
+    expired.filter(attempts__gte=settings.JOB_MAX_ATTEMPTS).update(
+        status=Job.FAILED, finished=now, locked_by='', locked_until=None,
+        last_error='Воркер не завершил задачу'
+    )
+    expired.update(status=Job.PENDING, locked_by='', locked_until=None)
+
+
+def claim(worker):
+    '''
+    Забирает пачку готовых задач одного вида: вид самой старой задачи,
+    до batch_size его обработчика. Условный UPDATE не даёт двум
+    воркерам взять одну задачу.
+    '''
+    now = timezone.now()
+    release_expired(now)
+    due = Job.objects.filter(
+        status=Job.PENDING, run_after__lte=now
+    ).order_by('run_after', 'pk')
+    kind = due.values_list('kind', flat=True).first()
+    if kind is None:
+        return None, []
+    batch_size = HANDLERS.get(kind, (None, 1))[1]
+    ids = list(due.filter(kind=kind).values_list('pk', flat=True)[
+        :batch_size
+    ])
+    Job.objects.filter(pk__in=ids, status=Job.PENDING).update(
+        status=Job.RUNNING,
+        locked_by=worker,
+        locked_until=now + timedelta(seconds=settings.JOB_LEASE),
+        attempts=F('attempts') + 1,
+    )
+    return kind, list(Job.objects.filter(
+        pk__in=ids, status=Job.RUNNING, locked_by=worker
+    ))
+
+
+def fail(jobs, error):
+    now = timezone.now()
+    for job in jobs:
+        if job.attempts >= settings.JOB_MAX_ATTEMPTS:
+            changes = {'status': Job.FAILED, 'finished': now}
+        else:
+            changes = {
+                'status': Job.PENDING,
+                'run_after': now + timedelta(
+                    seconds=retry_delay(job.attempts)
+                ),
+            }
+        Job.objects.filter(pk=job.pk).update(
+            locked_by='', locked_until=None, last_error=error, **changes
+        )
+
+
+def run_batch(kind, jobs):
+    '''
+    Выполняет пачку задач. При ошибке вся пачка повторяется позже,
+    после JOB_MAX_ATTEMPTS попыток задачи помечаются невыполненными.
+    '''
+    function = HANDLERS.get(kind, (None, 1))[0]
+    try:
+        if function is None:
+            raise LookupError(f'Нет обработчика задач {kind!r}')
+        with transaction.atomic():
+            # первой идёт запись: SQLite сразу берёт блокировку на запись
+            # и ждёт её, а не падает с «database is locked», когда
+            # транзакция, начатая чтением, пытается писать
+            Job.objects.filter(pk__in=[job.pk for job in jobs]).update(
+                locked_until=timezone.now() + timedelta(
+                    seconds=settings.JOB_LEASE
+                )
+            )
+            function([json.loads(job.payload) for job in jobs])
+    except Exception:
+        logger.exception('Задачи %s %s не выполнены', kind,
+                         [job.pk for job in jobs])
+        fail(jobs, traceback.format_exc())
+        return False
+    Job.objects.filter(pk__in=[job.pk for job in jobs]).update(
+        status=Job.DONE, finished=timezone.now(), locked_by='',
+        locked_until=None, last_error=''
+    )
+    return True
+
+
+def work(worker=None, limit=None):
+    '''
+    Выполняет готовые задачи, пока они есть, но не больше limit пачек.
+    Возвращает число взятых задач.
+    '''
+    worker = worker or worker_name()
+    taken = batches = 0
+    while limit is None or batches < limit:
+        kind, jobs = claim(worker)
+        if kind is None:
+            break
+        if jobs:
+            # пустая пачка - задачи перехватил другой воркер
+            run_batch(kind, jobs)
+        taken += len(jobs)
+        batches += 1
+    return taken
+
+
+def purge():
+    '''
+    Удаляет выполненные задачи старше JOB_RETENTION; их ключи
+    идемпотентности после этого снова свободны.
+    '''
+    Job.objects.filter(
+        status=Job.DONE,
+        finished__lt=timezone.now() - timedelta(
+            seconds=settings.JOB_RETENTION
+        )
+    ).delete()
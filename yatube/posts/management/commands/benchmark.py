@@ -0,0 +1,187 @@
+import json
+import math
+import platform
+import subprocess
+import time
+from contextlib import ExitStack
+from functools import partial
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections, transaction
+from django.test import Client, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from posts import urls as posts_urls
+from posts.models import Group, Post, UserStats
+
+
+def percentile(values, share):
+    '''
+    Перцентиль по методу ближайшего ранга.
+    '''
+    ordered = sorted(values)
+    index = min(len(ordered) - 1,
+                max(0, math.ceil(share * len(ordered)) - 1))
+    return ordered[index]
+
+
+def current_commit():
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', 'HEAD'],
+            capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def rolled_back(send):
+    '''
+    Выполняет запрос в транзакции и откатывает её: записи замера
+    не копятся в БД, и повторные прогоны сравнимы.
+    '''
+    with transaction.atomic():
+        response = send()
+        transaction.set_rollback(True)
+    return response
+
+
+class Command(BaseCommand):
+    help = (
+        'Прогоняет все адреса posts.urls через тестовый клиент, а формы '
+        'записи ещё и POST-запросами с откатом, и пишет p50/p95/p99, число '
+        'запросов к БД и пропускную способность в JSON'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=50,
+                            help='Запросов на каждый адрес')
+        parser.add_argument('--output', default='bench_output.json')
+        parser.add_argument(
+            '--cold', action='store_true',
+            help='Очищать кэш перед каждым запросом'
+        )
+
+    def sample_kwargs(self):
+        '''
+        Аргументы адресов: самый активный автор, самая большая группа
+        и свежий пост этого автора.
+        '''
+        stats = UserStats.objects.select_related('user').order_by(
+            '-posts_count'
+        ).first()
+        group = Group.objects.order_by('-posts_count').first()
+        if stats is None or group is None:
+            raise CommandError('Нет данных: сначала запустите seed')
+        author = stats.user
+        post = Post.objects.filter(author=author).first()
+        if post is None:
+            raise CommandError('У авторов нет постов: запустите seed')
+        return author, {
+            'slug': group.slug,
+            'group_id': group.pk,
+            'username': author.username,
+            'post_id': post.pk,
+        }
+
+    def targets(self, kwargs):
+        for pattern in posts_urls.urlpatterns:
+            names = pattern.pattern.converters.keys()
+            url = reverse(pattern.name, kwargs={
+                name: kwargs[name] for name in names
+            })
+            params = {'q': 'кот'} if pattern.name == 'search' else {}
+            yield pattern.name, url, params
+
+    def write_targets(self, kwargs):
+        '''
+        POST-запросы форм записи от имени автора: новый пост, правка
+        свежего поста и комментарий к нему.
+        '''
+        post_args = [kwargs['username'], kwargs['post_id']]
+        yield 'new_post', reverse('new_post'), {
+            'text': 'Замер: новый пост', 'group': kwargs['group_id'],
+        }
+        yield 'post_edit', reverse('post_edit', args=post_args), {
+            'text': 'Замер: правка поста', 'group': kwargs['group_id'],
+        }
+        yield 'add_comment', reverse('add_comment', args=post_args), {
+            'text': 'Замер: комментарий',
+        }
+
+    def measure(self, send, url, count, cold):
+        timings = []
+        queries = []
+        status = None
+        for _ in range(count):
+            if cold:
+                cache.clear()
+            # запросы считаются на всех базах: с репликами чтения
+            # уходят не в default
+            with ExitStack() as stack:
+                captured = [
+                    stack.enter_context(CaptureQueriesContext(db))
+                    for db in connections.all()
+                ]
+                started = time.perf_counter()
+                response = send()
+                timings.append(time.perf_counter() - started)
+            queries.append(sum(len(context) for context in captured))
+            status = response.status_code
+        total = sum(timings)
+        return {
+            'url': url,
+            'status': status,
+            'requests': count,
+            'p50_ms': percentile(timings, 0.50) * 1000,
+            'p95_ms': percentile(timings, 0.95) * 1000,
+            'p99_ms': percentile(timings, 0.99) * 1000,
+            'queries_min': min(queries),
+            'queries_max': max(queries),
+            'throughput_rps': count / total if total else None,
+        }
+
+    def handle(self, *args, **options):
+        author, kwargs = self.sample_kwargs()
+        clients = {'anonymous': Client(), 'author': Client()}
+        clients['author'].force_login(author)
+        scenarios = []
+        for name, url, params in self.targets(kwargs):
+            for viewer, client in clients.items():
+                scenarios.append((
+                    f'{name}:{viewer}', url, partial(client.get, url, params)
+                ))
+        for name, url, data in self.write_targets(kwargs):
+            scenarios.append((
+                f'{name}:author:post', url,
+                partial(rolled_back,
+                        partial(clients['author'].post, url, data))
+            ))
+        results = {}
+        # замеряется запись, а не ограничитель частоты
+        with override_settings(RATE_LIMITS={}):
+            for key, url, send in scenarios:
+                results[key] = self.measure(
+                    send, url, options['requests'], options['cold']
+                )
+                self.stdout.write(
+                    f'{key:28} p50 {results[key]["p50_ms"]:8.2f} мс  '
+                    f'p99 {results[key]["p99_ms"]:8.2f} мс  '
+                    f'запросов {results[key]["queries_max"]}'
+                )
+        report = {
+            'commit': current_commit(),
+            'python': platform.python_version(),
+            'posts': Post.objects.count(),
+            'cold': options['cold'],
+            'replicas': settings.DATABASE_REPLICAS,
+            'results': results,
+        }
+        with open(options['output'], 'w') as output:
+            json.dump(report, output, ensure_ascii=False, indent=2)
+        self.stdout.write(self.style.SUCCESS(
+            f'Результаты записаны в {options["output"]}'
+        ))
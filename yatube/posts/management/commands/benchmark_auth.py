@@ -0,0 +1,96 @@
+import statistics
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test import Client, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from posts.models import UserStats
+
+CACHED_MIDDLEWARE = 'posts.auth.CachedAuthenticationMiddleware'
+DJANGO_MIDDLEWARE = 'django.contrib.auth.middleware.AuthenticationMiddleware'
+
+
+def modes():
+    '''
+    Стандартные сессии в БД и AuthenticationMiddleware против
+    cached_db и снимка пользователя из кэша.
+    '''
+    return {
+        'db': {
+            'SESSION_ENGINE': 'django.contrib.sessions.backends.db',
+            'MIDDLEWARE': [
+                DJANGO_MIDDLEWARE if name == CACHED_MIDDLEWARE else name
+                for name in settings.MIDDLEWARE
+            ],
+        },
+        'cached': {
+            'SESSION_ENGINE': 'django.contrib.sessions.backends.cached_db',
+            'MIDDLEWARE': [
+                CACHED_MIDDLEWARE if name == DJANGO_MIDDLEWARE else name
+                for name in settings.MIDDLEWARE
+            ],
+        },
+    }
+
+
+class Command(BaseCommand):
+    help = (
+        'Сравнивает запросы к БД и время страниц вошедшего читателя '
+        'с сессией и пользователем из БД и из кэша'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=50,
+                            help='Запросов на каждую страницу')
+
+    def measure(self, client, url, count):
+        # первый запрос прогревает кэш
+        client.get(url)
+        timings = []
+        queries = []
+        for _ in range(count):
+            with CaptureQueriesContext(connection) as captured:
+                started = time.perf_counter()
+                client.get(url)
+                timings.append(time.perf_counter() - started)
+            queries.append(len(captured))
+        return max(queries), statistics.median(timings) * 1000
+
+    def handle(self, *args, **options):
+        stats = UserStats.objects.select_related('user').order_by(
+            '-posts_count'
+        ).first()
+        if stats is None:
+            raise CommandError('Нет пользователей: сначала запустите seed')
+        user = stats.user
+        urls = {
+            'index': reverse('index'),
+            'follow_index': reverse('follow_index'),
+            'profile': reverse('profile', args=[user.username]),
+            'new_post': reverse('new_post'),
+        }
+        results = {}
+        for mode, overrides in modes().items():
+            with override_settings(**overrides):
+                client = Client()
+                client.force_login(user)
+                for name, url in urls.items():
+                    results[name, mode] = self.measure(
+                        client, url, options['requests']
+                    )
+        saved = []
+        for name in urls:
+            db_queries, db_ms = results[name, 'db']
+            cached_queries, cached_ms = results[name, 'cached']
+            saved.append(db_queries - cached_queries)
+            self.stdout.write(
+                f'{name:14} БД: {db_queries:2} запросов, {db_ms:7.2f} мс; '
+                f'кэш: {cached_queries:2} запросов, {cached_ms:7.2f} мс'
+            )
+        self.stdout.write(self.style.SUCCESS(
+            f'Экономия на запрос: {min(saved)}-{max(saved)} запросов к БД'
+        ))
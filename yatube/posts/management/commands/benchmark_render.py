@@ -0,0 +1,71 @@
+import statistics
+import time
+
+from django.core.management.base import BaseCommand
+from django.template import Context, Template
+from django.utils import timezone
+
+from posts.fragments import attach_links, render_cards
+from posts.models import Post, User
+
+# прежний путь: include в цикле и reverse на каждый пост
+INCLUDE_LOOP = Template(
+    '{% for post in posts %}'
+    '{% include "include/post_item.html" with post=post %}'
+    '{% endfor %}'
+)
+
+
+def sample_posts(count):
+    '''
+    Посты в памяти, без БД: замеряется только отрисовка.
+    '''
+    authors = [User(pk=pk, username=f'author{pk}') for pk in range(1, 21)]
+    now = timezone.now()
+    return [
+        Post(pk=pk, text=f'Текст поста {pk}\nвторая строка',
+             author=authors[pk % len(authors)], pub_date=now, updated=now)
+        for pk in range(1, count + 1)
+    ]
+
+
+def include_loop(posts, user):
+    for post in posts:
+        attach_links([post])
+    return INCLUDE_LOOP.render(Context({'posts': posts, 'user': user}))
+
+
+def cards(posts, user):
+    return ''.join(render_cards(posts, user))
+
+
+class Command(BaseCommand):
+    help = (
+        'Микробенчмарк отрисовки ленты: include на каждый пост против '
+        'render_cards для страниц из 10, 50 и 200 постов'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--repeat', type=int, default=50)
+        parser.add_argument('--sizes', type=int, nargs='+',
+                            default=[10, 50, 200])
+
+    def measure(self, render, posts, user, repeat):
+        render(posts, user)
+        timings = []
+        for _ in range(repeat):
+            started = time.perf_counter()
+            render(posts, user)
+            timings.append(time.perf_counter() - started)
+        return statistics.median(timings) * 1000
+
+    def handle(self, *args, **options):
+        user = User(pk=1, username='author1')
+        for size in options['sizes']:
+            posts = sample_posts(size)
+            old = self.measure(include_loop, posts, user, options['repeat'])
+            new = self.measure(cards, posts, user, options['repeat'])
+            self.stdout.write(
+                f'{size:4} постов: include {old:7.2f} мс, '
+                f'render_cards {new:7.2f} мс (x{old / new:.1f})'
+            )
@@ -0,0 +1,44 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from posts.models import Post
+from posts.search import search_posts
+
+
+def best_time(run, repeat):
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        run()
+        timings.append(time.perf_counter() - started)
+    return min(timings)
+
+
+class Command(BaseCommand):
+    help = 'Сравнивает поиск через FTS5 с поиском через icontains'
+
+    def add_arguments(self, parser):
+        parser.add_argument('query', help='Поисковый запрос')
+        parser.add_argument('--repeat', type=int, default=10)
+
+    def handle(self, *args, **options):
+        query = options['query']
+        per_page = settings.PAGINATOR_PER_PAGE_VAL
+        repeat = options['repeat']
+        fts = best_time(
+            lambda: list(search_posts(query, per_page)), repeat
+        )
+        icontains = best_time(
+            lambda: list(
+                Post.objects.feed().filter(text__icontains=query)[:per_page]
+            ),
+            repeat
+        )
+        self.stdout.write(
+            f'Постов: {Post.objects.count()}, запрос: {query!r}, '
+            f'лучшее из {repeat}\n'
+            f'FTS5 (bm25):  {fts * 1000:.2f} мс\n'
+            f'icontains:    {icontains * 1000:.2f} мс'
+        )
@@ -0,0 +1,89 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.core.paginator import Paginator
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from posts.models import InboxEntry, Post
+from posts.paginator import (BACKWARD, FORWARD, CursorPaginator,
+                             InboxCursorPaginator)
+
+
+def plan_problems(sql):
+    '''
+    Возвращает строки EXPLAIN QUERY PLAN с полным просмотром таблицы
+    или сортировкой во временном B-дереве.
+    '''
+    with connection.cursor() as cursor:
+        cursor.execute(f'EXPLAIN QUERY PLAN {sql}')
+        plan = [row[-1] for row in cursor.fetchall()]
+    return [
+        line for line in plan
+        if 'USE TEMP B-TREE' in line
+        or (
+            line.startswith('SCAN ')
+            and 'USING' not in line
+            and 'subquery' not in line
+        )
+    ]
+
+
+def feed_pages():
+    '''
+    Выборки, которые делают ленты index, group_posts и profile
+    в обоих режимах паджинации, и входящие ленты подписок.
+    '''
+    per_page = settings.PAGINATOR_PER_PAGE_VAL
+    now = timezone.now()
+    feeds = {
+        'index': Post.objects.feed(),
+        'show_group_post': Post.objects.feed().filter(group_id=1),
+        'profile': Post.objects.feed().filter(author_id=1),
+    }
+    for name, queryset in feeds.items():
+        yield f'{name} page', lambda queryset=queryset: list(
+            Paginator(queryset, per_page).get_page(1)
+        )
+        paginator = CursorPaginator(queryset, per_page)
+        for direction in (FORWARD, BACKWARD):
+            yield f'{name} cursor {direction}', (
+                lambda paginator=paginator, direction=direction: list(
+                    paginator.page_queryset((now, 1, direction))[:per_page]
+                )
+            )
+    inbox = InboxCursorPaginator(
+        InboxEntry.objects.filter(user_id=1).select_related(
+            'post__author', 'post__group'
+        ),
+        per_page
+    )
+    for cursor in (None, (now, 1, FORWARD), (now, 1, BACKWARD)):
+        direction = cursor[2] if cursor else 'first'
+        yield f'follow_index inbox {direction}', (
+            lambda cursor=cursor: inbox.fetch(cursor)
+        )
+
+
+class Command(BaseCommand):
+    help = 'Проверяет планы запросов лент через EXPLAIN QUERY PLAN'
+
+    def handle(self, *args, **options):
+        if connection.vendor != 'sqlite':
+            raise CommandError('Проверка планов поддерживает только SQLite')
+        failed = []
+        for name, run in feed_pages():
+            with CaptureQueriesContext(connection) as queries:
+                run()
+            for query in queries.captured_queries:
+                problems = plan_problems(query['sql'])
+                if problems:
+                    failed.append(name)
+                    self.stderr.write(f'{name}: {"; ".join(problems)}')
+                    self.stderr.write(f'    {query["sql"]}')
+        if failed:
+            raise CommandError(
+                f'Полный просмотр или сортировка в запросах: '
+                f'{", ".join(sorted(set(failed)))}'
+            )
+        self.stdout.write(self.style.SUCCESS('Планы запросов лент в порядке'))
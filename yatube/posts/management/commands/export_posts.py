@@ -0,0 +1,51 @@
+import sys
+
+from django.core.management.base import BaseCommand, CommandError
+
+from posts.export import (CHUNK_SIZE, FORMATS, encode, export_lines,
+                          export_queryset)
+
+
+class Command(BaseCommand):
+    help = (
+        'Потоково выгружает посты в JSONL или CSV, не загружая таблицу '
+        'в память; --output с расширением .gz сжимает выгрузку gzip'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--format', choices=FORMATS, default='jsonl')
+        parser.add_argument(
+            '--output', help='Файл выгрузки, по умолчанию stdout'
+        )
+        parser.add_argument('--gzip', action='store_true')
+        parser.add_argument('--group', help='slug группы')
+        parser.add_argument('--author', help='username автора')
+        parser.add_argument('--since', help='С даты ГГГГ-ММ-ДД')
+        parser.add_argument('--until', help='По дату ГГГГ-ММ-ДД')
+        parser.add_argument('--chunk-size', type=int, default=CHUNK_SIZE)
+
+    def handle(self, *args, **options):
+        try:
+            posts = export_queryset(
+                group=options['group'],
+                author=options['author'],
+                since=options['since'],
+                until=options['until'],
+            )
+        except ValueError as error:
+            raise CommandError(error)
+        output = options['output']
+        compress = options['gzip'] or bool(output and output.endswith('.gz'))
+        chunks = encode(
+            export_lines(posts, options['format'], options['chunk_size']),
+            compress
+        )
+        if output is None:
+            target = sys.stdout.buffer
+            for chunk in chunks:
+                target.write(chunk)
+            target.flush()
+            return
+        with open(output, 'wb') as target:
+            for chunk in chunks:
+                target.write(chunk)
@@ -0,0 +1,210 @@
+import csv
+import json
+import os
+import time
+from itertools import islice
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from posts.bulk import count_created_posts, own_timestamps
+from posts.models import Group, ImportCheckpoint, Post, User, UserStats
+
+FORMATS = ('jsonl', 'csv')
+
+
+def read_rows(source, file_format):
+    '''
+    Построчно читает файл, не загружая его в память целиком. Вместо
+    битой строки JSONL отдаётся сама строка: она пропускается, но
+    учитывается в номерах строк контрольной точки.
+    '''
+    if file_format == 'csv':
+        yield from csv.DictReader(source)
+        return
+    for line in source:
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            yield json.loads(line)
+        except ValueError:
+            yield line
+
+
+def load_checkpoint(key, source_path):
+    checkpoint = ImportCheckpoint.objects.filter(key=key).first()
+    if checkpoint is None:
+        return 0
+    if checkpoint.source != os.path.abspath(source_path):
+        raise CommandError(
+            f'Контрольная точка {key} относится к файлу {checkpoint.source}'
+        )
+    return checkpoint.rows
+
+
+def save_checkpoint(key, source_path, rows):
+    ImportCheckpoint.objects.update_or_create(
+        key=key,
+        defaults={'source': os.path.abspath(source_path), 'rows': rows}
+    )
+
+
+class Lookup:
+    '''
+    Словарь «ключ → id», который дозапрашивает из БД только ключи,
+    ещё не встречавшиеся в файле, одним запросом на пачку.
+    '''
+    def __init__(self, queryset, field):
+        self.queryset = queryset
+        self.field = field
+        self.ids = {}
+
+    def resolve(self, keys):
+        missing = {key for key in keys if key and key not in self.ids}
+        if missing:
+            self.ids.update(self.queryset.filter(
+                **{f'{self.field}__in': missing}
+            ).values_list(self.field, 'pk'))
+            for key in missing:
+                self.ids.setdefault(key, None)
+
+    def __getitem__(self, key):
+        return self.ids.get(key)
+
+
+class Command(BaseCommand):
+    help = (
+        'Потоково импортирует посты из JSONL или CSV с полями text, '
+        'author, group, pub_date. Пишет bulk_create пачками в транзакциях '
+        'и в той же транзакции сохраняет в БД контрольную точку, с которой '
+        'повторный запуск продолжит импорт'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('path')
+        parser.add_argument(
+            '--format', choices=FORMATS,
+            help='Формат файла, по умолчанию по расширению'
+        )
+        parser.add_argument('--batch-size', type=int, default=2000)
+        parser.add_argument(
+            '--checkpoint',
+            help='Имя контрольной точки, по умолчанию полный путь к файлу'
+        )
+        parser.add_argument(
+            '--restart', action='store_true',
+            help='Начать сначала, не глядя на контрольную точку'
+        )
+        parser.add_argument(
+            '--create-authors', action='store_true',
+            help='Создавать неизвестных авторов вместо пропуска строк'
+        )
+
+    def handle(self, *args, **options):
+        path = options['path']
+        file_format = options['format'] or os.path.splitext(
+            path
+        )[1].lstrip('.').lower()
+        if file_format not in FORMATS:
+            raise CommandError(
+                f'Неизвестный формат {file_format!r}, укажите --format'
+            )
+        if options['batch_size'] < 1:
+            raise CommandError('--batch-size должен быть положительным')
+        checkpoint = options['checkpoint'] or os.path.abspath(path)
+        done = 0 if options['restart'] else load_checkpoint(checkpoint, path)
+        self.create_authors = options['create_authors']
+        self.authors = Lookup(User.objects.all(), 'username')
+        self.groups = Lookup(Group.objects.all(), 'slug')
+        self.skipped = 0
+        imported = 0
+        started = time.monotonic()
+        if done:
+            self.stdout.write(f'Продолжаем после строки {done}')
+        with open(path, newline='', encoding='utf-8') as source:
+            rows = read_rows(source, file_format)
+            for _ in islice(rows, done):
+                pass
+            while True:
+                batch = list(islice(rows, options['batch_size']))
+                if not batch:
+                    break
+                with transaction.atomic(), own_timestamps():
+                    posts = self.build_posts(batch, done)
+                    Post.objects.bulk_create(posts)
+                    count_created_posts(posts)
+                    # пачка и контрольная точка коммитятся вместе
+                    save_checkpoint(checkpoint, path, done + len(batch))
+                done += len(batch)
+                imported += len(posts)
+                elapsed = time.monotonic() - started
+                self.stdout.write(
+                    f'Строк: {done}, импортировано {imported}, '
+                    f'пропущено {self.skipped} '
+                    f'({imported / elapsed:.0f} в секунду)'
+                )
+        ImportCheckpoint.objects.filter(key=checkpoint).delete()
+        self.stdout.write(self.style.SUCCESS(
+            f'Импортировано постов: {imported}, пропущено строк: '
+            f'{self.skipped}'
+        ))
+
+    def build_posts(self, batch, offset):
+        rows = [row for row in batch if isinstance(row, dict)]
+        self.authors.resolve(row.get('author') for row in rows)
+        self.groups.resolve(row.get('group') for row in rows)
+        if self.create_authors:
+            self.create_missing_authors(rows)
+        now = timezone.now()
+        posts = []
+        for number, row in enumerate(batch, offset + 1):
+            post = None
+            if isinstance(row, dict):
+                post = self.build_post(row, now)
+            if post is None:
+                self.skipped += 1
+                self.stderr.write(f'Строка {number} пропущена: {row!r}')
+            else:
+                posts.append(post)
+        return posts
+
+    def build_post(self, row, now):
+        text = (row.get('text') or '').strip()
+        author_id = self.authors[row.get('author')]
+        group_slug = row.get('group')
+        group_id = self.groups[group_slug] if group_slug else None
+        if not text or author_id is None or group_slug and group_id is None:
+            return None
+        pub_date = now
+        if row.get('pub_date'):
+            try:
+                pub_date = parse_datetime(row['pub_date'])
+            except ValueError:
+                pub_date = None
+            if pub_date is None:
+                return None
+            if timezone.is_naive(pub_date):
+                pub_date = timezone.make_aware(pub_date)
+        return Post(text=text, author_id=author_id, group_id=group_id,
+                    pub_date=pub_date, updated=pub_date)
+
+    def create_missing_authors(self, batch):
+        names = {
+            row['author'] for row in batch
+            if row.get('author') and self.authors[row['author']] is None
+        }
+        if not names:
+            return
+        User.objects.bulk_create(
+            User(username=name, password='!') for name in names
+        )
+        created = User.objects.filter(username__in=names)
+        UserStats.objects.bulk_create(
+            UserStats(user_id=pk) for pk in created.values_list(
+                'pk', flat=True
+            )
+        )
+        self.authors.ids.update(created.values_list('username', 'pk'))
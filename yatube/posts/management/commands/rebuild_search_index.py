@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+
+from posts.search import create_search_index
+
+
+class Command(BaseCommand):
+    help = 'Перестраивает полнотекстовый индекс постов'
+
+    def handle(self, *args, **options):
+        if connection.vendor != 'sqlite':
+            raise CommandError('Поиск FTS5 работает только на SQLite')
+        create_search_index(connection)
+        self.stdout.write(self.style.SUCCESS('Индекс поиска перестроен'))
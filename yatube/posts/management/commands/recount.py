@@ -0,0 +1,28 @@
+from django.core.management.base import BaseCommand
+
+from posts.counters import (recount_authors, recount_comments,
+                            recount_follows, recount_groups)
+
+
+class Command(BaseCommand):
+    help = (
+        'Пересчитывает счётчики постов авторов и групп, подписок '
+        'и комментариев'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size', type=int, default=1000,
+            help='Сколько строк пересчитывать за один запрос'
+        )
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        authors = recount_authors(batch_size)
+        groups = recount_groups(batch_size)
+        follows = recount_follows(batch_size)
+        comments = recount_comments(batch_size)
+        self.stdout.write(self.style.SUCCESS(
+            f'Исправлено счётчиков: авторов {authors}, групп {groups}, '
+            f'подписок {follows}, комментариев {comments}'
+        ))
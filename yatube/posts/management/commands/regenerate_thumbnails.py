@@ -0,0 +1,33 @@
+from django.core.management.base import BaseCommand
+
+from posts.models import Post
+from posts.thumbnails import generate_thumbnails
+
+
+class Command(BaseCommand):
+    help = (
+        'Синхронно делает миниатюры для постов с картинкой, у которых они '
+        'не готовы (например, если задача thumbnails исчерпала попытки). '
+        'С --all - для '
+        'всех постов с картинкой'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--all', action='store_true')
+
+    def handle(self, *args, **options):
+        posts = Post.objects.exclude(image='').exclude(image__isnull=True)
+        if not options['all']:
+            posts = posts.filter(thumbnails_ready=False)
+        done = failed = 0
+        for pk, image_name in posts.values_list('pk', 'image').iterator():
+            try:
+                generate_thumbnails(pk, image_name)
+            except (OSError, ValueError) as error:
+                failed += 1
+                self.stderr.write(f'Пост {pk}: {error}')
+            else:
+                done += 1
+        self.stdout.write(self.style.SUCCESS(
+            f'Миниатюр сделано: {done}, ошибок: {failed}'
+        ))
@@ -0,0 +1,113 @@
+import logging
+import multiprocessing
+import signal
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+
+from posts.jobs import purge, work, worker_name
+
+logger = logging.getLogger('posts.jobs')
+
+# раз в столько опросов воркер чистит выполненные задачи
+PURGE_EVERY = 600
+
+
+class Stop:
+    '''
+    Флаг остановки для обработчика сигнала. Event из multiprocessing
+    там звать нельзя: его блокировку может держать прерванный код.
+    '''
+    def __init__(self):
+        self.requested = False
+
+    def __call__(self, *args):
+        self.requested = True
+
+
+def run_worker(poll_interval):
+    '''
+    Цикл воркера: разбирает очередь, пока она не пуста, потом ждёт
+    poll_interval секунд. По SIGTERM завершается после текущей пачки.
+    '''
+    stop = Stop()
+    # Ctrl+C получает вся группа процессов, воркеры останавливает родитель
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    signal.signal(signal.SIGTERM, stop)
+    name = worker_name()
+    logger.info('Воркер %s запущен', name)
+    polls = 0
+    try:
+        while not stop.requested:
+            if polls % PURGE_EVERY == 0:
+                purge()
+            polls += 1
+            if not work(name):
+                time.sleep(poll_interval)
+    finally:
+        connections.close_all()
+        logger.info('Воркер %s остановлен', name)
+
+
+class Command(BaseCommand):
+    help = (
+        'Разбирает фоновую очередь задач в нескольких процессах. '
+        'Повторяет упавшие задачи с нарастающей задержкой; SIGTERM и '
+        'Ctrl+C останавливают воркеры после текущей пачки'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--workers', type=int, default=settings.JOB_WORKERS,
+            help='Число процессов-воркеров'
+        )
+        parser.add_argument(
+            '--poll-interval', type=float,
+            default=settings.JOB_POLL_INTERVAL,
+            help='Пауза в секундах, когда очередь пуста'
+        )
+        parser.add_argument(
+            '--once', action='store_true',
+            help='Выполнить готовые задачи в этом процессе и выйти'
+        )
+
+    def handle(self, *args, **options):
+        if options['once']:
+            done = work()
+            self.stdout.write(f'Выполнено задач: {done}')
+            return
+        if options['workers'] < 1:
+            raise CommandError('--workers должен быть положительным')
+        # fork: дочерние процессы получают настроенный Django, но не
+        # открытые соединения родителя
+        context = multiprocessing.get_context('fork')
+        connections.close_all()
+
+        def start():
+            process = context.Process(
+                target=run_worker, args=(options['poll_interval'],)
+            )
+            process.start()
+            return process
+
+        stop = Stop()
+        signal.signal(signal.SIGINT, stop)
+        signal.signal(signal.SIGTERM, stop)
+        processes = [start() for _ in range(options['workers'])]
+        self.stdout.write(f'Запущено воркеров: {len(processes)}')
+        while not stop.requested:
+            time.sleep(1)
+            for number, process in enumerate(processes):
+                if not process.is_alive() and not stop.requested:
+                    logger.warning('Воркер %s завершился с кодом %s, '
+                                   'перезапускаем', process.pid,
+                                   process.exitcode)
+                    processes[number] = start()
+        for process in processes:
+            if process.is_alive():
+                process.terminate()
+        for process in processes:
+            process.join()
+        self.stdout.write('Воркеры остановлены')
@@ -0,0 +1,128 @@
+import random
+import time
+from datetime import timedelta
+from itertools import accumulate
+
+from django.core.cache import cache
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.utils import timezone
+
+from posts.bulk import own_timestamps
+from posts.counters import recount_authors, recount_groups
+from posts.models import Group, Post, User, UserStats
+
+WORDS = (
+    'кот собака дом лес река город утро вечер зима лето книга музыка '
+    'работа отпуск дорога море горы снег дождь солнце друг семья'
+).split()
+
+
+def zipf_weights(count, exponent):
+    '''
+    Накопленные веса распределения Ципфа: первые элементы встречаются
+    намного чаще последних.
+    '''
+    return list(accumulate(1 / rank ** exponent
+                           for rank in range(1, count + 1)))
+
+
+class Command(BaseCommand):
+    help = 'Заполняет базу синтетическими пользователями, группами и постами'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=1000)
+        parser.add_argument('--groups', type=int, default=50)
+        parser.add_argument('--posts', type=int, default=100000)
+        parser.add_argument('--batch-size', type=int, default=5000)
+        parser.add_argument(
+            '--skew', type=float, default=1.1,
+            help='Показатель Ципфа для авторов и групп (0 - равномерно)'
+        )
+        parser.add_argument(
+            '--no-group-share', type=float, default=0.2,
+            help='Доля постов без группы'
+        )
+        parser.add_argument('--days', type=int, default=365 * 3)
+        parser.add_argument('--seed', type=int, default=None)
+
+    def handle(self, *args, **options):
+        if options['posts'] and not options['users']:
+            raise CommandError('Для постов нужен хотя бы один пользователь')
+        rnd = random.Random(options['seed'])
+        batch_size = options['batch_size']
+        prefix = f'seed{int(time.time())}'
+        users = self.create_users(prefix, options['users'])
+        groups = self.create_groups(prefix, options['groups'])
+        self.create_posts(rnd, users, groups, options)
+        recount_authors(batch_size)
+        recount_groups(batch_size)
+        # счётчики и страницы в кэше устарели после вставок в обход сигналов
+        cache.clear()
+
+    def create_users(self, prefix, count):
+        User.objects.bulk_create(
+            (User(username=f'{prefix}_user{i}', password='!')
+             for i in range(count))
+        )
+        ids = list(User.objects.filter(
+            username__startswith=f'{prefix}_user'
+        ).order_by('pk').values_list('pk', flat=True))
+        UserStats.objects.bulk_create(UserStats(user_id=pk) for pk in ids)
+        self.stdout.write(f'Пользователей: {len(ids)}')
+        return ids
+
+    def create_groups(self, prefix, count):
+        Group.objects.bulk_create(
+            (Group(title=f'Группа {i}',
+                   slug=f'{prefix}-group{i}',
+                   description=f'Описание группы {i}')
+             for i in range(count))
+        )
+        ids = list(Group.objects.filter(
+            slug__startswith=f'{prefix}-group'
+        ).order_by('pk').values_list('pk', flat=True))
+        self.stdout.write(f'Групп: {len(ids)}')
+        return ids
+
+    def create_posts(self, rnd, users, groups, options):
+        total = options['posts']
+        batch_size = options['batch_size']
+        author_weights = zipf_weights(len(users), options['skew'])
+        group_weights = zipf_weights(len(groups), options['skew'])
+        no_group_share = options['no_group_share']
+        now = timezone.now()
+        span = options['days'] * 24 * 60 * 60
+        started = time.monotonic()
+        created = 0
+        with own_timestamps():
+            while created < total:
+                size = min(batch_size, total - created)
+                authors = rnd.choices(users, cum_weights=author_weights,
+                                      k=size)
+                batch = []
+                for author_id in authors:
+                    group_id = None
+                    if groups and rnd.random() >= no_group_share:
+                        group_id = rnd.choices(
+                            groups, cum_weights=group_weights
+                        )[0]
+                    pub_date = now - timedelta(seconds=rnd.uniform(0, span))
+                    batch.append(Post(
+                        text=' '.join(rnd.choices(WORDS,
+                                                  k=rnd.randint(5, 60))),
+                        author_id=author_id,
+                        group_id=group_id,
+                        pub_date=pub_date,
+                        updated=pub_date,
+                    ))
+                # размер INSERT Django подбирает сам под лимиты SQLite,
+                # batch_size задаёт размер транзакции
+                with transaction.atomic():
+                    Post.objects.bulk_create(batch)
+                created += size
+                elapsed = time.monotonic() - started
+                self.stdout.write(
+                    f'Постов: {created}/{total} '
+                    f'({created / elapsed:.0f} в секунду)'
+                )
@@ -0,0 +1,32 @@
+import sqlite3
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DEFAULT_DB_ALIAS
+
+
+class Command(BaseCommand):
+    help = (
+        'Копирует базу default в файлы реплик из YATUBE_DB_REPLICAS '
+        'через SQLite backup API - локальная замена репликации'
+    )
+
+    def handle(self, *args, **options):
+        primary = settings.DATABASES[DEFAULT_DB_ALIAS]
+        if primary['ENGINE'] != 'django.db.backends.sqlite3':
+            raise CommandError('Копирование реплик работает только с SQLite')
+        if not settings.DATABASE_REPLICAS:
+            raise CommandError('Реплики не настроены: задайте '
+                               'YATUBE_DB_REPLICAS')
+        source = sqlite3.connect(primary['NAME'])
+        try:
+            for alias in settings.DATABASE_REPLICAS:
+                target = sqlite3.connect(settings.DATABASES[alias]['NAME'])
+                try:
+                    # снимок согласован, даже если в default идёт запись
+                    source.backup(target)
+                finally:
+                    target.close()
+                self.stdout.write(f'{alias}: обновлена')
+        finally:
+            source.close()
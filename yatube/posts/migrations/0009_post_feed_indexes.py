@@ -0,0 +1,40 @@
+# Generated by Django 2.2.6 on 2026-10-18 20:30
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0008_auto_20210308_1319'),
+    ]
+
+    operations = [
+        migrations.AlterModelOptions(
+            name='post',
+            options={'ordering': ['-pub_date', 'id']},
+        ),
+        migrations.AlterField(
+            model_name='post',
+            name='group',
+            field=models.ForeignKey(blank=True, help_text='Дайте короткое название группы', null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='posts', to='posts.Group', verbose_name='Группа'),
+        ),
+        migrations.AlterField(
+            model_name='post',
+            name='text',
+            field=models.TextField(help_text='Текст поста', verbose_name='Текст'),
+        ),
+        migrations.AddIndex(
+            model_name='post',
+            index=models.Index(fields=['group', '-pub_date'], name='post_group_pub_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='post',
+            index=models.Index(fields=['author', '-pub_date'], name='post_author_pub_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='post',
+            index=models.Index(fields=['-pub_date', 'id'], name='post_pub_date_id_idx'),
+        ),
+    ]
@@ -0,0 +1,46 @@
+# Generated by Django 2.2.6 on 2026-10-18 20:31
+
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count
+import django.db.models.deletion
+
+
+def fill_counters(apps, schema_editor):
+    User = apps.get_model(*settings.AUTH_USER_MODEL.split('.'))
+    Group = apps.get_model('posts', 'Group')
+    UserStats = apps.get_model('posts', 'UserStats')
+    UserStats.objects.bulk_create(
+        UserStats(user_id=pk, posts_count=count)
+        for pk, count in User.objects.annotate(
+            count=Count('posts')
+        ).values_list('pk', 'count').iterator()
+    )
+    for pk, count in Group.objects.annotate(
+        count=Count('posts')
+    ).values_list('pk', 'count').iterator():
+        Group.objects.filter(pk=pk).update(posts_count=count)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('auth', '0011_update_proxy_permissions'),
+        ('posts', '0009_post_feed_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='UserStats',
+            fields=[
+                ('user', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='stats', serialize=False, to=settings.AUTH_USER_MODEL)),
+                ('posts_count', models.PositiveIntegerField(default=0)),
+            ],
+        ),
+        migrations.AddField(
+            model_name='group',
+            name='posts_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.RunPython(fill_counters, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,25 @@
+# Generated by Django 2.2.6 on 2026-10-18 20:33
+
+from django.db import migrations, models
+from django.db.models import F
+
+
+def copy_pub_date(apps, schema_editor):
+    Post = apps.get_model('posts', 'Post')
+    Post.objects.update(updated=F('pub_date'))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0010_post_counters'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='post',
+            name='updated',
+            field=models.DateTimeField(auto_now=True, verbose_name='date updated'),
+        ),
+        migrations.RunPython(copy_pub_date, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 2.2.6 on 2026-10-18 20:39
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0012_post_search_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='group',
+            name='changed',
+            field=models.DateTimeField(auto_now=True),
+        ),
+        migrations.AddField(
+            model_name='userstats',
+            name='changed',
+            field=models.DateTimeField(auto_now=True),
+        ),
+    ]
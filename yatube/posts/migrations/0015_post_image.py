@@ -0,0 +1,33 @@
+# Generated by Django 2.2.6 on 2026-10-18 20:56
+
+from django.db import migrations, models
+
+from posts.search import create_triggers
+
+
+def restore_search_triggers(apps, schema_editor):
+    # AddField пересоздаёт posts_post в SQLite, триггеры поиска теряются
+    create_triggers(schema_editor.connection)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0014_follow_inbox'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='post',
+            name='image',
+            field=models.ImageField(blank=True, null=True, upload_to='posts/', verbose_name='Картинка'),
+        ),
+        migrations.AddField(
+            model_name='post',
+            name='thumbnails_ready',
+            field=models.BooleanField(default=False, editable=False),
+        ),
+        migrations.RunPython(
+            restore_search_triggers, migrations.RunPython.noop
+        ),
+    ]
@@ -0,0 +1,35 @@
+# Generated by Django 2.2.6 on 2026-10-18 21:00
+
+from django.db import migrations, models
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0015_post_image'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Job',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(max_length=50)),
+                ('payload', models.TextField(default='{}')),
+                ('key', models.CharField(blank=True, max_length=255, null=True, unique=True)),
+                ('status', models.CharField(choices=[('pending', 'Ждёт'), ('running', 'Выполняется'), ('done', 'Выполнена'), ('failed', 'Не выполнена')], default='pending', max_length=10)),
+                ('attempts', models.PositiveIntegerField(default=0)),
+                ('run_after', models.DateTimeField(default=django.utils.timezone.now)),
+                ('locked_by', models.CharField(blank=True, max_length=100)),
+                ('locked_until', models.DateTimeField(blank=True, null=True)),
+                ('last_error', models.TextField(blank=True)),
+                ('created', models.DateTimeField(auto_now_add=True)),
+                ('finished', models.DateTimeField(blank=True, null=True)),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name='job',
+            index=models.Index(fields=['status', 'run_after'], name='job_status_run_after_idx'),
+        ),
+    ]
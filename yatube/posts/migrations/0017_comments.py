@@ -0,0 +1,53 @@
+# Generated by Django 2.2.6 on 2026-10-18 21:13
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+from posts.search import create_triggers
+
+
+def restore_search_triggers(apps, schema_editor):
+    # AddField пересоздаёт posts_post в SQLite, триггеры поиска теряются
+    create_triggers(schema_editor.connection)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('posts', '0016_job'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='post',
+            name='commented',
+            field=models.DateTimeField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='post',
+            name='comments_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.CreateModel(
+            name='Comment',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('text', models.TextField(help_text='Текст комментария', verbose_name='Комментарий')),
+                ('created', models.DateTimeField(auto_now_add=True, verbose_name='date created')),
+                ('author', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='comments', to=settings.AUTH_USER_MODEL)),
+                ('post', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='comments', to='posts.Post')),
+            ],
+            options={
+                'ordering': ['created', 'id'],
+            },
+        ),
+        migrations.AddIndex(
+            model_name='comment',
+            index=models.Index(fields=['post', 'created', 'id'], name='comment_post_created_idx'),
+        ),
+        migrations.RunPython(
+            restore_search_triggers, migrations.RunPython.noop
+        ),
+    ]
@@ -0,0 +1,33 @@
+# Generated by Django 2.2.6 on 2026-10-18 21:16
+
+from django.db import migrations, models
+from django.db.models import OuterRef, Subquery
+
+
+def fill_last_post(apps, schema_editor):
+    Group = apps.get_model('posts', 'Group')
+    Post = apps.get_model('posts', 'Post')
+    Group.objects.update(last_post=Subquery(
+        Post.objects.filter(group=OuterRef('pk'))
+        .order_by('-pub_date').values('pub_date')[:1]
+    ))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0017_comments'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='group',
+            name='last_post',
+            field=models.DateTimeField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddIndex(
+            model_name='group',
+            index=models.Index(fields=['title', 'id'], name='group_title_id_idx'),
+        ),
+        migrations.RunPython(fill_last_post, migrations.RunPython.noop),
+    ]
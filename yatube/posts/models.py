@@ -1,5 +1,6 @@
-from django.db import models
+from django.db import models, transaction
 from django.contrib.auth import get_user_model
+from django.utils import timezone
 User = get_user_model()
 
 
@@ -7,15 +8,56 @@ class Group(models.Model):
     title = models.CharField(max_length=200)
     slug = models.SlugField(unique=True)
     description = models.TextField()
+    posts_count = models.PositiveIntegerField(default=0, editable=False)
+    # дата самого свежего поста, для каталога групп
+    last_post = models.DateTimeField(null=True, blank=True, editable=False)
+    # меняется при правке группы и её постов
+    changed = models.DateTimeField(auto_now=True)
 
     def __str__(self) -> str:
         return self.title
 
+    class Meta:
+        indexes = [
+            # каталог групп по алфавиту
+            models.Index(fields=['title', 'id'],
+                         name='group_title_id_idx'),
+        ]
+
+
+class UserStats(models.Model):
+    '''
+    Счётчики пользователя, которые дорого считать на каждой странице.
+    '''
+    user = models.OneToOneField(User,
+                                on_delete=models.CASCADE,
+                                primary_key=True,
+                                related_name='stats')
+    posts_count = models.PositiveIntegerField(default=0)
+    followers_count = models.PositiveIntegerField(default=0)
+    following_count = models.PositiveIntegerField(default=0)
+    # примерная длина ленты подписок, по ней решается, когда её обрезать
+    inbox_count = models.PositiveIntegerField(default=0)
+    # меняется при правке автора и его постов
+    changed = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f'{self.user} | {self.posts_count}'
+
+
+class PostQuerySet(models.QuerySet):
+    def feed(self):
+        '''
+        Посты для лент: автор и группа подгружаются тем же запросом.
+        '''
+        return self.select_related('author', 'group')
+
 
 class Post(models.Model):
     text = models.TextField(verbose_name='Текст',
                             help_text='Текст поста')
     pub_date = models.DateTimeField('date published', auto_now_add=True)
+    updated = models.DateTimeField('date updated', auto_now=True)
     author = models.ForeignKey(User,
                                on_delete=models.CASCADE,
                                related_name='posts')
@@ -26,9 +68,161 @@ class Post(models.Model):
                               blank=True,
                               null=True,
                               related_name='posts')
+    image = models.ImageField(verbose_name='Картинка',
+                              upload_to='posts/',
+                              blank=True,
+                              null=True)
+    # миниатюры делает задача thumbnails в run_workers, до готовности
+    # показывается заглушка
+    thumbnails_ready = models.BooleanField(default=False, editable=False)
+    comments_count = models.PositiveIntegerField(default=0, editable=False)
+    # время последнего комментария: страница поста меняется и без правки
+    commented = models.DateTimeField(null=True, blank=True, editable=False)
+
+    objects = PostQuerySet.as_manager()
+
+    def __str__(self):
+        return f'{self.author} | {self.text[:15]}'
+
+    def save(self, *args, **kwargs):
+        # счётчики обновляются в post_save той же транзакцией
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+
+    class Meta:
+        ordering = ['-pub_date', 'id']
+        indexes = [
+            models.Index(fields=['group', '-pub_date'],
+                         name='post_group_pub_date_idx'),
+            models.Index(fields=['author', '-pub_date'],
+                         name='post_author_pub_date_idx'),
+            models.Index(fields=['-pub_date', 'id'],
+                         name='post_pub_date_id_idx'),
+        ]
+
+
+class Comment(models.Model):
+    post = models.ForeignKey(Post,
+                             on_delete=models.CASCADE,
+                             related_name='comments')
+    author = models.ForeignKey(User,
+                               on_delete=models.CASCADE,
+                               related_name='comments')
+    text = models.TextField(verbose_name='Комментарий',
+                            help_text='Текст комментария')
+    created = models.DateTimeField('date created', auto_now_add=True)
 
     def __str__(self):
         return f'{self.author} | {self.text[:15]}'
 
     class Meta:
-        ordering = ['-pub_date']
+        ordering = ['created', 'id']
+        indexes = [
+            models.Index(fields=['post', 'created', 'id'],
+                         name='comment_post_created_idx'),
+        ]
+
+
+class Follow(models.Model):
+    user = models.ForeignKey(User,
+                             on_delete=models.CASCADE,
+                             related_name='follower')
+    author = models.ForeignKey(User,
+                               on_delete=models.CASCADE,
+                               related_name='following')
+    created = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return f'{self.user} -> {self.author}'
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['user', 'author'],
+                                    name='unique_follow'),
+            models.CheckConstraint(check=~models.Q(user=models.F('author')),
+                                   name='no_self_follow'),
+        ]
+        indexes = [
+            models.Index(fields=['author', 'user'],
+                         name='follow_author_user_idx'),
+        ]
+
+
+class InboxEntry(models.Model):
+    '''
+    Пост в ленте подписок читателя, записанный при публикации
+    (fan-out on write).
+    '''
+    user = models.ForeignKey(User,
+                             on_delete=models.CASCADE,
+                             related_name='inbox')
+    post = models.ForeignKey(Post,
+                             on_delete=models.CASCADE,
+                             related_name='inbox_entries')
+    # копия post.pub_date: лента сортируется по индексу этой таблицы
+    pub_date = models.DateTimeField()
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['user', 'post'],
+                                    name='unique_inbox_post'),
+        ]
+        indexes = [
+            models.Index(fields=['user', '-pub_date', 'post'],
+                         name='inbox_user_pub_date_idx'),
+        ]
+
+
+class Job(models.Model):
+    '''
+    Задача фоновой очереди, которую разбирает run_workers. Пишется
+    в той же транзакции, что и породившее её изменение.
+    '''
+    PENDING = 'pending'
+    RUNNING = 'running'
+    DONE = 'done'
+    FAILED = 'failed'
+    STATUSES = [
+        (PENDING, 'Ждёт'),
+        (RUNNING, 'Выполняется'),
+        (DONE, 'Выполнена'),
+        (FAILED, 'Не выполнена'),
+    ]
+
+    kind = models.CharField(max_length=50)
+    payload = models.TextField(default='{}')
+    # ключ идемпотентности: вторая задача с тем же ключом не ставится
+    key = models.CharField(max_length=255, unique=True, null=True,
+                           blank=True)
+    status = models.CharField(max_length=10, choices=STATUSES,
+                              default=PENDING)
+    attempts = models.PositiveIntegerField(default=0)
+    run_after = models.DateTimeField(default=timezone.now)
+    locked_by = models.CharField(max_length=100, blank=True)
+    locked_until = models.DateTimeField(null=True, blank=True)
+    last_error = models.TextField(blank=True)
+    created = models.DateTimeField(auto_now_add=True)
+    finished = models.DateTimeField(null=True, blank=True)
+
+    def __str__(self):
+        return f'{self.kind} #{self.pk} | {self.status}'
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['status', 'run_after'],
+                         name='job_status_run_after_idx'),
+        ]
+
+
+class ImportCheckpoint(models.Model):
+    '''
+    Сколько строк файла уже импортировано: пишется в транзакции пачки,
+    поэтому после падения импорт продолжается ровно с неё.
+    '''
+    key = models.CharField(max_length=255, unique=True)
+    source = models.TextField()
+    rows = models.PositiveIntegerField(default=0)
+    updated = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f'{self.key} | {self.rows}'
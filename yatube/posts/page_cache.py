@@ -0,0 +1,175 @@
+import hashlib
+import time
+from functools import wraps
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.http import HttpResponse
+from django.utils.cache import get_conditional_response
+from django.utils.http import parse_http_date_safe
+
+from .routers import primary_reads
+
+INDEX_SCOPE = 'index'
+# состав и порядок каталога групп
+GROUPS_SCOPE = 'groups'
+# заголовки, которые сохраняются вместе со страницей
+CACHED_HEADERS = ('Content-Type', 'ETag', 'Last-Modified', 'Vary')
+
+
+def group_scope(slug):
+    return f'group:{slug}'
+
+
+def author_scope(username):
+    return f'author:{username}'
+
+
+def post_scope(post_id):
+    return f'post:{post_id}'
+
+
+def generation_key(scope):
+    return f'page_gen:{scope}'
+
+
+def new_generation():
+    # время сброса: не повторяется, даже если старое поколение вытеснено
+    # из кэша, и по нему видно, не собрана ли страница раньше сброса
+    return time.time_ns()
+
+
+def get_generations(scopes):
+    keys = [generation_key(scope) for scope in scopes]
+    generations = cache.get_many(keys)
+    for key in keys:
+        if key not in generations:
+            cache.add(key, new_generation(), None)
+            generations[key] = cache.get(key)
+    return [generations[key] for key in keys]
+
+
+def bump_generations(scopes):
+    cache.set_many(
+        {generation_key(scope): new_generation() for scope in scopes}, None
+    )
+
+
+def invalidate_scopes(*scopes):
+    '''
+    Сбрасывает закэшированные страницы областей сразу и ещё раз после
+    коммита: страница, собранная между ними из незакоммиченных данных,
+    тоже не переживёт запись.
+    '''
+    scopes = set(scopes)
+    bump_generations(scopes)
+    transaction.on_commit(lambda: bump_generations(scopes))
+
+
+def depend_on(request, *scopes):
+    '''
+    Отмечает, что собираемая страница показывает данные этих областей.
+    Области заранее неизвестны (например, посты страницы), поэтому их
+    поколения хранятся в самой закэшированной странице и сверяются
+    при выдаче.
+    '''
+    if not hasattr(request, '_page_dependencies'):
+        request._page_dependencies = set()
+    request._page_dependencies.update(scopes)
+
+
+def dependencies_changed(dependencies):
+    if not dependencies:
+        return False
+    scopes, generations = zip(*dependencies)
+    return get_generations(scopes) != list(generations)
+
+
+def dependency_generations(request, started):
+    '''
+    Поколения областей, отмеченных depend_on, для сохранения вместе со
+    страницей. None, если какая-то область сброшена после started
+    (с запасом PAGE_CACHE_CLOCK_SKEW на расхождение часов процессов):
+    области стали известны уже после чтения данных, и страница могла
+    прочитать их до записи.
+    '''
+    scopes = sorted(getattr(request, '_page_dependencies', ()))
+    keys = [generation_key(scope) for scope in scopes]
+    generations = cache.get_many(keys)
+    fresh_after = started - int(settings.PAGE_CACHE_CLOCK_SKEW * 1e9)
+    if any(generation > fresh_after for generation in generations.values()):
+        return None
+    for key in keys:
+        if key not in generations:
+            # область не сбрасывалась или вытеснена: новое поколение,
+            # а если его успели задать другие - страница не кэшируется
+            generations[key] = new_generation()
+            if not cache.add(key, generations[key], None):
+                return None
+    return tuple(zip(scopes, (generations[key] for key in keys)))
+
+
+def page_key(request, generations):
+    params = '&'.join(
+        f'{name}={request.GET.get(name, "")}' for name in ('page', 'cursor')
+    )
+    raw = f'{request.path}?{params}:{":".join(map(str, generations))}'
+    return f'page:{hashlib.md5(raw.encode()).hexdigest()}'
+
+
+def conditional_response(request, response, headers):
+    return get_conditional_response(
+        request,
+        etag=headers.get('ETag'),
+        last_modified=parse_http_date_safe(headers.get('Last-Modified')),
+        response=response,
+    )
+
+
+def cached_response(request, content, headers):
+    response = HttpResponse(content)
+    for name, value in headers.items():
+        response[name] = value
+    return conditional_response(request, response, headers)
+
+
+def anonymous_page_cache(get_scopes):
+    '''
+    Кэширует страницу для анонимных читателей. get_scopes получает
+    аргументы view и возвращает области, при записи в которые
+    страница должна устареть.
+    '''
+    def decorator(view):
+        @wraps(view)
+        def wrapper(request, *args, **kwargs):
+            if request.method != 'GET' or request.user.is_authenticated:
+                return view(request, *args, **kwargs)
+            generations = get_generations(get_scopes(*args, **kwargs))
+            key = page_key(request, generations)
+            cached = cache.get(key)
+            if cached is not None:
+                content, headers, dependencies = cached
+                if not dependencies_changed(dependencies):
+                    return cached_response(request, content, headers)
+            started = new_generation()
+            with primary_reads():
+                response = view(request, *args, **kwargs)
+            if response.status_code == 200:
+                headers = {
+                    name: response[name]
+                    for name in CACHED_HEADERS if response.has_header(name)
+                }
+                dependencies = dependency_generations(request, started)
+                if dependencies is not None:
+                    cache.set(
+                        key,
+                        (response.content, headers, dependencies),
+                        settings.PAGE_CACHE_TIMEOUT
+                    )
+                # страница могла пересобраться без изменений: клиенту
+                # с прежним ETag хватит 304
+                return conditional_response(request, response, headers)
+            return response
+        return wrapper
+    return decorator
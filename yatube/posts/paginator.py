@@ -0,0 +1,286 @@
+import base64
+import binascii
+import json
+from collections.abc import Sequence
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.paginator import Page, Paginator
+from django.db import transaction
+from django.utils.dateparse import parse_datetime
+from django.utils.functional import cached_property
+
+from .routers import primary_reads
+
+FORWARD = 'n'
+BACKWARD = 'p'
+
+
+def encode_cursor(key, pk, direction):
+    '''
+    Упаковывает позицию в ленте (ключ сортировки и id) в непрозрачный
+    токен.
+    '''
+    raw = json.dumps([key, pk, direction])
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip('=')
+
+
+def decode_cursor(token):
+    '''
+    Возвращает (ключ, id, направление) или None для битого токена.
+    '''
+    if not token:
+        return None
+    try:
+        raw = base64.urlsafe_b64decode(token + '=' * (-len(token) % 4))
+        key, pk, direction = json.loads(raw.decode())
+    except (binascii.Error, ValueError, TypeError):
+        return None
+    if not isinstance(pk, int) or direction not in (FORWARD, BACKWARD):
+        return None
+    return key, pk, direction
+
+
+def decode_date_cursor(token):
+    cursor = decode_cursor(token)
+    if cursor is None or not isinstance(cursor[0], str):
+        return None
+    try:
+        pub_date = parse_datetime(cursor[0])
+    except ValueError:
+        return None
+    if pub_date is None:
+        return None
+    return (pub_date,) + cursor[1:]
+
+
+class CursorPage(Sequence):
+    is_cursor = True
+
+    def __init__(self, object_list, next_cursor, previous_cursor):
+        self.object_list = object_list
+        self.next_cursor = next_cursor
+        self.previous_cursor = previous_cursor
+
+    def __repr__(self):
+        return f'<CursorPage of {len(self.object_list)} objects>'
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def __getitem__(self, index):
+        return self.object_list[index]
+
+    def has_next(self):
+        return self.next_cursor is not None
+
+    def has_previous(self):
+        return self.previous_cursor is not None
+
+    def has_other_pages(self):
+        return self.has_next() or self.has_previous()
+
+
+class CursorPaginator:
+    '''
+    Паджинация по ключу (pub_date, id) без OFFSET и COUNT(*):
+    каждая страница - один запрос с условием по границе предыдущей.
+    '''
+    # поля ключа сортировки: дата и уникальный id
+    key_fields = ('pub_date', 'id')
+
+    def __init__(self, object_list, per_page):
+        self.object_list = object_list
+        self.per_page = int(per_page)
+
+    def page_queryset(self, cursor):
+        '''
+        Запрос страницы после (или до) позиции курсора. Условие записано
+        как диапазон по дате, чтобы SQLite искал по индексу, а не
+        просматривал его целиком.
+        '''
+        date, key = self.key_fields
+        if cursor is None:
+            return self.object_list.order_by(f'-{date}', key)
+        pub_date, pk = cursor[:2]
+        if cursor[2] == FORWARD:
+            return self.object_list.filter(
+                **{f'{date}__lte': pub_date}
+            ).exclude(
+                **{date: pub_date, f'{key}__lte': pk}
+            ).order_by(f'-{date}', key)
+        return self.object_list.filter(
+            **{f'{date}__gte': pub_date}
+        ).exclude(
+            **{date: pub_date, f'{key}__gte': pk}
+        ).order_by(date, f'-{key}')
+
+    def fetch(self, cursor):
+        '''
+        До per_page + 1 элементов после курсора в порядке его
+        направления: лишний элемент показывает, есть ли продолжение.
+        '''
+        return list(self.page_queryset(cursor)[:self.per_page + 1])
+
+    def position(self, item):
+        '''
+        Ключ сортировки элемента страницы: (pub_date, id).
+        '''
+        return item.pub_date, item.pk
+
+    def get_page(self, token):
+        cursor = decode_date_cursor(token)
+        direction = FORWARD if cursor is None else cursor[2]
+        posts = self.fetch(cursor)
+        has_more = len(posts) > self.per_page
+        posts = posts[:self.per_page]
+        if direction == BACKWARD and not has_more:
+            # дошли до начала ленты: отдаём первую страницу целиком
+            return self.get_page(None)
+        if direction == BACKWARD:
+            posts.reverse()
+            has_next, has_previous = True, has_more
+        else:
+            has_next, has_previous = has_more, cursor is not None
+        next_cursor = previous_cursor = None
+        if posts and has_next:
+            pub_date, pk = self.position(posts[-1])
+            next_cursor = encode_cursor(pub_date.isoformat(), pk, FORWARD)
+        if posts and has_previous:
+            pub_date, pk = self.position(posts[0])
+            previous_cursor = encode_cursor(
+                pub_date.isoformat(), pk, BACKWARD
+            )
+        return CursorPage(posts, next_cursor, previous_cursor)
+
+
+class InboxCursorPaginator(CursorPaginator):
+    '''
+    Курсор по строкам входящих: ключ - скопированная дата поста и его
+    id, на страницу попадают сами посты.
+    '''
+    key_fields = ('pub_date', 'post_id')
+
+    def fetch(self, cursor):
+        return [entry.post for entry in super().fetch(cursor)]
+
+
+class MergedCursorPaginator(CursorPaginator):
+    '''
+    Сливает несколько курсорных лент постов в одну: каждая отдаёт
+    страницу одним запросом, порядок и дубли разбираются в Python.
+    '''
+
+    def __init__(self, paginators, per_page):
+        super().__init__(None, per_page)
+        self.paginators = paginators
+
+    def fetch(self, cursor):
+        forward = cursor is None or cursor[2] == FORWARD
+        merged = {}
+        for paginator in self.paginators:
+            for post in paginator.fetch(cursor):
+                merged.setdefault(post.pk, post)
+        posts = sorted(
+            merged.values(),
+            key=lambda post: (post.pub_date, -post.pk),
+            reverse=forward
+        )
+        return posts[:self.per_page + 1]
+
+
+def feed_count_key(scope):
+    return f'feed_count:{scope}'
+
+
+def invalidate_feed_count(scope):
+    key = feed_count_key(scope)
+    cache.delete(key)
+    transaction.on_commit(lambda: cache.delete(key))
+
+
+class ValuesCursorPaginator(CursorPaginator):
+    '''
+    Курсорная паджинация для values(): элементы страницы - словари.
+    '''
+
+    def position(self, item):
+        return item['pub_date'], item['id']
+
+
+class FeedPage(Page):
+    @property
+    def elided_page_range(self):
+        return self.paginator.get_elided_page_range(self.number)
+
+
+class FeedPaginator(Paginator):
+    '''
+    Paginator лент: число постов берётся из счётчика (count) или из кэша
+    (count_key) вместо COUNT(*) на каждый запрос, а навигация показывает
+    только окно страниц вокруг текущей.
+    '''
+    ELLIPSIS = None
+
+    def __init__(self, object_list, per_page, count=None, count_key=None,
+                 **kwargs):
+        super().__init__(object_list, per_page, **kwargs)
+        self.known_count = count
+        self.count_key = count_key
+
+    @cached_property
+    def count(self):
+        if self.known_count is not None:
+            return self.known_count
+        if self.count_key is None:
+            return super().count
+        count = cache.get(self.count_key)
+        if count is None:
+            # число общее для всех читателей: не из отстающей реплики
+            with primary_reads():
+                count = super().count
+            cache.set(
+                self.count_key, count, settings.FEED_COUNT_CACHE_TIMEOUT
+            )
+        return count
+
+    def _get_page(self, *args, **kwargs):
+        return FeedPage(*args, **kwargs)
+
+    def get_elided_page_range(self, number, on_each_side=3, on_ends=2):
+        '''
+        Номера страниц: on_ends с каждого края и on_each_side вокруг
+        текущей, пропуски отмечены ELLIPSIS.
+        '''
+        number = self.validate_number(number)
+        num_pages = self.num_pages
+        if num_pages <= (on_each_side + on_ends) * 2:
+            return list(self.page_range)
+        pages = set(range(1, on_ends + 1))
+        pages.update(range(num_pages - on_ends + 1, num_pages + 1))
+        pages.update(range(
+            max(number - on_each_side, 1),
+            min(number + on_each_side, num_pages) + 1
+        ))
+        result = []
+        for page in sorted(pages):
+            if result and page - result[-1] > 1:
+                result.append(self.ELLIPSIS)
+            result.append(page)
+        return result
+
+
+def paginate(request, queryset, view_name, count=None, count_key=None):
+    '''
+    Возвращает страницу ленты в режиме из settings.PAGINATOR_MODES.
+    count - известное число постов ленты, если оно хранится счётчиком,
+    count_key - ключ кэша, где число постов хранится между запросами.
+    '''
+    per_page = settings.PAGINATOR_PER_PAGE_VAL
+    if settings.PAGINATOR_MODES.get(view_name) == 'cursor':
+        paginator = CursorPaginator(queryset, per_page)
+        return paginator.get_page(request.GET.get('cursor'))
+    paginator = FeedPaginator(
+        queryset, per_page, count=count, count_key=count_key
+    )
+    return paginator.get_page(request.GET.get('page'))
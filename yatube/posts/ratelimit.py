@@ -0,0 +1,121 @@
+import math
+import time
+from functools import wraps
+
+from django.conf import settings
+from django.contrib.auth import SESSION_KEY
+from django.core.cache import caches
+from django.http import HttpResponse
+
+
+def limiter_cache():
+    return caches[settings.RATE_LIMIT_CACHE]
+
+
+def increment(cache, key, timeout):
+    # incr атомарен в memcached и locmem; add - только если ключа нет
+    try:
+        return cache.incr(key)
+    except ValueError:
+        if cache.add(key, 1, timeout):
+            return 1
+        return cache.incr(key)
+
+
+def windows(key, per_minute, burst, now=None):
+    now = time.time() if now is None else now
+    period = burst / per_minute * 60
+    window, position = divmod(now / period, 1)
+    return (period, position, f'{key}:{int(window)}',
+            f'{key}:{int(window) - 1}')
+
+
+def take_token(key, per_minute, burst, now=None):
+    '''
+    Берёт токен из ведра ёмкостью burst, которое пополняется на
+    per_minute токенов в минуту. Возвращает 0 или через сколько секунд
+    повторить.
+
+    В API кэша Django есть атомарный incr, но нет compare-and-set,
+    поэтому ведро считается скользящим окном длиной burst / per_minute
+    минут: счётчик текущего окна плюс доля предыдущего. Отказ стоит
+    одного чтения из кэша и ничего не пишет.
+    '''
+    cache = limiter_cache()
+    period, position, current, previous = windows(
+        key, per_minute, burst, now
+    )
+    counts = cache.get_many([current, previous])
+    carried = counts.get(previous, 0) * (1 - position)
+    retry_after = math.ceil(60 / per_minute)
+    if carried + counts.get(current, 0) >= burst:
+        return retry_after
+    # между чтением и incr другие процессы могли забрать токены
+    if carried + increment(cache, current, 2 * period) > burst:
+        return retry_after
+    return 0
+
+
+def return_token(key, per_minute, burst, now=None):
+    # запрос всё же отклонён другим лимитом
+    current = windows(key, per_minute, burst, now)[2]
+    try:
+        limiter_cache().decr(current)
+    except ValueError:
+        pass
+
+
+def client_ip(request):
+    # в X-Forwarded-For последний адрес дописал наш прокси, остальные
+    # мог подставить сам клиент
+    return request.META.get(settings.RATE_LIMIT_IP_HEADER, '').split(
+        ','
+    )[-1].strip()
+
+
+def session_user_id(request):
+    # id из сессии без загрузки пользователя
+    return request.session.get(SESSION_KEY)
+
+
+def too_many_requests(retry_after):
+    response = HttpResponse(
+        'Слишком много запросов, попробуйте позже',
+        status=429, content_type='text/plain; charset=utf-8'
+    )
+    response['Retry-After'] = str(retry_after)
+    return response
+
+
+def rate_limit(name):
+    '''
+    Ограничивает частоту POST-запросов к представлению по
+    settings.RATE_LIMITS[name] отдельно для IP и для пользователя.
+    Ставится над login_required: проверка IP не трогает БД, для
+    пользователя читается только сессия. Отказ - 429 без шаблона.
+    '''
+    def decorator(view):
+        @wraps(view)
+        def wrapper(request, *args, **kwargs):
+            if request.method != 'POST':
+                return view(request, *args, **kwargs)
+            limits = settings.RATE_LIMITS.get(name, {})
+            taken = []
+            for scope, identify in (('ip', client_ip),
+                                    ('user', session_user_id)):
+                if scope not in limits:
+                    continue
+                ident = identify(request)
+                if not ident:
+                    continue
+                bucket = (f'ratelimit:{name}:{scope}:{ident}',
+                          *limits[scope])
+                retry_after = take_token(*bucket)
+                if retry_after:
+                    for other in taken:
+                        return_token(*other)
+                    return too_many_requests(retry_after)
+                taken.append(bucket)
+            return view(request, *args, **kwargs)
+        return wrapper
+    return decorator
@@ -0,0 +1,103 @@
+import random
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, connections
+
+# читать из default до конца запроса: он уже писал или недавно писал
+primary_pinned = ContextVar('primary_pinned', default=False)
+# в этом запросе была запись
+wrote = ContextVar('wrote', default=False)
+
+STICKY_COOKIE = 'primary_until'
+# сессии и пользователи пишутся при входе и нужны сразу в следующем
+# запросе: с отстающей реплики клиент оказался бы разлогинен, когда
+# истечёт cookie закрепления
+PRIMARY_ONLY_APPS = ('sessions', 'auth')
+
+
+@contextmanager
+def primary_reads():
+    '''
+    Чтения внутри блока идут в default. Для данных, которые уходят
+    в общий кэш (страницы анонимов, число постов ленты): реплика может
+    отставать от записи, которая этот кэш уже сбросила, и устаревшие
+    данные легли бы в кэш под новым поколением.
+    '''
+    token = primary_pinned.set(True)
+    try:
+        yield
+    finally:
+        # запись внутри блока закрепляет чтения до конца запроса
+        if not wrote.get():
+            primary_pinned.reset(token)
+
+
+class PrimaryReplicaRouter:
+    '''
+    Пишет в default, читает из случайной реплики settings.DATABASE_REPLICAS.
+    Чтение идёт в default внутри транзакции, после записи в этом запросе
+    и в течение REPLICA_STICKY_SECONDS после записи этого клиента
+    (см. PrimaryStickinessMiddleware), чтобы он видел свои изменения.
+    Вне запросов (команды, shell) после первой записи все чтения тоже
+    идут в default. То, что кэшируется для всех, читается из default
+    (primary_reads). Сессии и пользователи всегда читаются из default
+    (PRIMARY_ONLY_APPS).
+    '''
+
+    def db_for_read(self, model, **hints):
+        replicas = settings.DATABASE_REPLICAS
+        if (not replicas or primary_pinned.get()
+                or model._meta.app_label in PRIMARY_ONLY_APPS
+                or connections[DEFAULT_DB_ALIAS].in_atomic_block):
+            return DEFAULT_DB_ALIAS
+        return random.choice(replicas)
+
+    def db_for_write(self, model, **hints):
+        wrote.set(True)
+        primary_pinned.set(True)
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        databases = {DEFAULT_DB_ALIAS, *settings.DATABASE_REPLICAS}
+        if obj1._state.db in databases and obj2._state.db in databases:
+            return True
+        return None
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        # реплики - копии default, схему им не меняем
+        if db in settings.DATABASE_REPLICAS:
+            return False
+        return None
+
+
+class PrimaryStickinessMiddleware:
+    '''
+    Закрепляет чтения клиента за default на REPLICA_STICKY_SECONDS после
+    запроса, который что-то записал: метка хранится в cookie.
+    '''
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        try:
+            until = float(request.COOKIES.get(STICKY_COOKIE, 0))
+        except ValueError:
+            until = 0
+        pinned = primary_pinned.set(until > time.time())
+        written = wrote.set(False)
+        try:
+            response = self.get_response(request)
+            if wrote.get():
+                seconds = settings.REPLICA_STICKY_SECONDS
+                response.set_cookie(
+                    STICKY_COOKIE, str(time.time() + seconds),
+                    max_age=seconds, httponly=True
+                )
+            return response
+        finally:
+            primary_pinned.reset(pinned)
+            wrote.reset(written)
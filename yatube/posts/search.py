@@ -0,0 +1,140 @@
+import re
+
+from django.db import connection
+
+from .models import Post
+from .paginator import FORWARD, CursorPage, decode_cursor, encode_cursor
+
+FTS_TABLE = 'posts_post_fts'
+
+CREATE_TABLE_SQL = f'''
+CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} USING fts5(
+    text,
+    content='posts_post',
+    content_rowid='id',
+    tokenize='unicode61 remove_diacritics 2'
+)
+'''
+
+# SQLite пересоздаёт posts_post при изменении схемы и теряет триггеры,
+# поэтому миграции, меняющие Post, должны снова вызвать create_triggers
+CREATE_TRIGGERS_SQL = [
+    f'''
+    CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_ai
+    AFTER INSERT ON posts_post BEGIN
+        INSERT INTO {FTS_TABLE}(rowid, text) VALUES (new.id, new.text);
+    END
+    ''',
+    f'''
+    CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_ad
+    AFTER DELETE ON posts_post BEGIN
+        INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, text)
+        VALUES ('delete', old.id, old.text);
+    END
+    ''',
+    f'''
+    CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_au
+    AFTER UPDATE OF text ON posts_post BEGIN
+        INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, text)
+        VALUES ('delete', old.id, old.text);
+        INSERT INTO {FTS_TABLE}(rowid, text) VALUES (new.id, new.text);
+    END
+    ''',
+]
+
+DROP_SQL = [
+    f'DROP TRIGGER IF EXISTS {FTS_TABLE}_ai',
+    f'DROP TRIGGER IF EXISTS {FTS_TABLE}_ad',
+    f'DROP TRIGGER IF EXISTS {FTS_TABLE}_au',
+    f'DROP TABLE IF EXISTS {FTS_TABLE}',
+]
+
+
+def execute_all(connection, statements):
+    with connection.cursor() as cursor:
+        for sql in statements:
+            cursor.execute(sql)
+
+
+def create_triggers(connection):
+    if connection.vendor == 'sqlite':
+        execute_all(connection, CREATE_TRIGGERS_SQL)
+
+
+def create_search_index(connection):
+    '''
+    Создаёт индекс, если его нет, и перестраивает его по содержимому
+    posts_post целиком.
+    '''
+    if connection.vendor != 'sqlite':
+        return
+    execute_all(connection, [CREATE_TABLE_SQL, *CREATE_TRIGGERS_SQL, (
+        f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('rebuild')"
+    )])
+
+
+def drop_search_index(connection):
+    if connection.vendor == 'sqlite':
+        execute_all(connection, DROP_SQL)
+
+
+def match_expression(query):
+    '''
+    Превращает пользовательский ввод в выражение MATCH: каждое слово
+    в кавычках, чтобы синтаксис FTS5 во вводе не ломал запрос.
+    '''
+    words = re.findall(r'\w+', query)
+    return ' '.join(f'"{word}"' for word in words)
+
+
+def search_posts(query, per_page, group=None, author=None, token=None):
+    '''
+    Страница результатов поиска, упорядоченная по bm25. Курсор хранит
+    (ранг, id) последнего результата.
+    '''
+    expression = match_expression(query)
+    if not expression:
+        return CursorPage([], None, None)
+    where = [f'{FTS_TABLE} MATCH %s']
+    params = [expression]
+    if group is not None:
+        where.append('p.group_id = %s')
+        params.append(group.pk)
+    if author is not None:
+        where.append('p.author_id = %s')
+        params.append(author.pk)
+    cursor = decode_cursor(token)
+    if (
+        cursor is not None
+        and isinstance(cursor[0], (int, float))
+        and not isinstance(cursor[0], bool)
+    ):
+        rank, pk, _ = cursor
+        where.append(
+            f'(bm25({FTS_TABLE}) > %s '
+            f'OR (bm25({FTS_TABLE}) = %s AND p.id > %s))'
+        )
+        params.extend([rank, rank, pk])
+    sql = (
+        f'SELECT p.id, bm25({FTS_TABLE}) AS rank '
+        f'FROM {FTS_TABLE} JOIN posts_post p ON p.id = {FTS_TABLE}.rowid '
+        f'WHERE {" AND ".join(where)} '
+        f'ORDER BY rank, p.id LIMIT %s'
+    )
+    params.append(per_page + 1)
+    with connection.cursor() as db_cursor:
+        db_cursor.execute(sql, params)
+        rows = db_cursor.fetchall()
+    has_next = len(rows) > per_page
+    rows = rows[:per_page]
+    posts = Post.objects.feed().in_bulk([pk for pk, _ in rows])
+    results = []
+    for pk, rank in rows:
+        post = posts[pk]
+        post.rank = rank
+        results.append(post)
+    next_cursor = None
+    if has_next:
+        last = results[-1]
+        next_cursor = encode_cursor(last.rank, last.pk, FORWARD)
+    return CursorPage(results, next_cursor, None)
@@ -0,0 +1,230 @@
+from django.conf import settings
+from django.contrib.auth.signals import user_logged_out
+from django.db.models.signals import (post_delete, post_init, post_save,
+                                      pre_save)
+from django.dispatch import receiver
+
+from .auth import forget_user
+from .counters import (change_author_posts_count, change_follow_counts,
+                       change_group_posts_count, change_post_comments_count,
+                       touch_author, touch_group, touch_groups)
+from .models import Comment, Follow, Group, Post, User, UserStats
+from .page_cache import (GROUPS_SCOPE, INDEX_SCOPE, author_scope,
+                         group_scope, invalidate_scopes, post_scope)
+from .paginator import invalidate_feed_count
+from .thumbnails import schedule_thumbnails
+from .timeline import fan_out, forget, queue_backfill
+
+
+def invalidate_post_pages(post, *group_ids):
+    slugs = Group.objects.filter(
+        pk__in=[pk for pk in group_ids if pk is not None]
+    ).values_list('slug', flat=True)
+    invalidate_scopes(
+        INDEX_SCOPE,
+        author_scope(post.author.username),
+        *map(group_scope, slugs)
+    )
+
+
+@receiver(post_save, sender=User)
+def create_user_stats(sender, instance, created, raw=False, **kwargs):
+    if created and not raw:
+        UserStats.objects.get_or_create(user=instance)
+
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def forget_user_snapshot(sender, instance, **kwargs):
+    # правка, смена пароля (и вход: пишется last_login) или удаление
+    forget_user(instance.pk)
+
+
+@receiver(user_logged_out)
+def forget_logged_out_user(sender, request, user, **kwargs):
+    if user is not None:
+        forget_user(user.pk)
+
+
+@receiver(pre_save, sender=User)
+def invalidate_renamed_author(sender, instance, raw=False, update_fields=None,
+                              **kwargs):
+    if raw or instance.pk is None:
+        return
+    names = {'username', 'first_name', 'last_name'}
+    if update_fields is not None and not names & set(update_fields):
+        return
+    old = User.objects.filter(pk=instance.pk).values(*names).first()
+    if old is None or all(old[name] == getattr(instance, name)
+                          for name in names):
+        return
+    touch_author(instance.pk)
+    groups = dict(Group.objects.filter(
+        posts__author_id=instance.pk
+    ).distinct().values_list('pk', 'slug'))
+    # имя автора видно и в лентах его групп
+    touch_groups(groups)
+    slugs = groups.values()
+    invalidate_scopes(
+        INDEX_SCOPE,
+        author_scope(old['username']),
+        author_scope(instance.username),
+        *map(group_scope, slugs)
+    )
+
+
+@receiver(pre_save, sender=Group)
+def invalidate_changed_group(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    scopes = [GROUPS_SCOPE, group_scope(instance.slug)]
+    if instance.pk is None:
+        invalidate_feed_count(GROUPS_SCOPE)
+    else:
+        old_slug = Group.objects.filter(
+            pk=instance.pk
+        ).values_list('slug', flat=True).first()
+        if old_slug is not None:
+            scopes.append(group_scope(old_slug))
+    invalidate_scopes(*scopes)
+
+
+@receiver(post_delete, sender=Group)
+def invalidate_deleted_group(sender, instance, **kwargs):
+    invalidate_feed_count(GROUPS_SCOPE)
+    invalidate_scopes(GROUPS_SCOPE, group_scope(instance.slug))
+
+
+@receiver(post_init, sender=Post)
+def remember_post_owners(sender, instance, **kwargs):
+    # __dict__, чтобы не подгружать отложенные поля
+    instance._saved_author_id = instance.__dict__.get('author_id')
+    instance._saved_group_id = instance.__dict__.get('group_id')
+    if 'image' in instance.__dict__:
+        image = instance.__dict__['image']
+        instance._saved_image = getattr(image, 'name', image) or ''
+
+
+@receiver(pre_save, sender=Post)
+def reset_thumbnails(sender, instance, raw=False, **kwargs):
+    if raw or not hasattr(instance, '_saved_image'):
+        return
+    instance._image_changed = (
+        (instance.image.name or '') != instance._saved_image
+    )
+    if instance._image_changed:
+        instance.thumbnails_ready = False
+
+
+@receiver(post_save, sender=Post)
+def queue_thumbnails(sender, instance, raw=False, **kwargs):
+    if raw or not getattr(instance, '_image_changed', False):
+        return
+    instance._image_changed = False
+    instance._saved_image = instance.image.name or ''
+    if instance.image:
+        schedule_thumbnails(instance.pk, instance.image.name)
+
+
+@receiver(post_save, sender=Post)
+def count_saved_post(sender, instance, created, raw=False, **kwargs):
+    if raw:
+        return
+    if created:
+        change_author_posts_count(instance.author_id, 1)
+        change_group_posts_count(instance.group_id, 1)
+        invalidate_feed_count(INDEX_SCOPE)
+        fan_out(instance)
+    else:
+        if instance._saved_author_id != instance.author_id:
+            change_author_posts_count(instance._saved_author_id, -1)
+            change_author_posts_count(instance.author_id, 1)
+        else:
+            touch_author(instance.author_id)
+        if instance._saved_group_id != instance.group_id:
+            change_group_posts_count(instance._saved_group_id, -1)
+            change_group_posts_count(instance.group_id, 1)
+        else:
+            touch_group(instance.group_id)
+    invalidate_post_pages(
+        instance, instance.group_id, instance._saved_group_id
+    )
+    if instance._saved_author_id not in (None, instance.author_id):
+        invalidate_scopes(*map(author_scope, User.objects.filter(
+            pk=instance._saved_author_id
+        ).values_list('username', flat=True)))
+    instance._saved_author_id = instance.author_id
+    instance._saved_group_id = instance.group_id
+
+
+@receiver(post_delete, sender=Post)
+def count_deleted_post(sender, instance, **kwargs):
+    change_author_posts_count(instance.author_id, -1)
+    change_group_posts_count(instance.group_id, -1)
+    invalidate_feed_count(INDEX_SCOPE)
+    invalidate_post_pages(instance, instance.group_id)
+
+
+def touch_commented_post(post_id):
+    '''
+    Число комментариев видно в карточках профиля и группы: их
+    ETag/Last-Modified тоже меняются.
+    '''
+    owners = Post.objects.filter(pk=post_id).values_list(
+        'author_id', 'group_id'
+    ).first()
+    if owners is not None:
+        author_id, group_id = owners
+        touch_author(author_id)
+        touch_group(group_id)
+
+
+@receiver(post_save, sender=Comment)
+def count_saved_comment(sender, instance, created, raw=False, **kwargs):
+    if raw:
+        return
+    # правка комментария не меняет счётчик, но меняет страницу поста
+    change_post_comments_count(instance.post_id, 1 if created else 0)
+    if created:
+        touch_commented_post(instance.post_id)
+        # устаревают только закэшированные страницы с карточкой этого
+        # поста, а не вся главная, профиль и группа
+        invalidate_scopes(post_scope(instance.post_id))
+
+
+@receiver(post_delete, sender=Comment)
+def count_deleted_comment(sender, instance, **kwargs):
+    change_post_comments_count(instance.post_id, -1)
+    touch_commented_post(instance.post_id)
+    invalidate_scopes(post_scope(instance.post_id))
+
+
+def invalidate_follow_pages(follow):
+    # счётчики подписок видны в профилях обоих
+    invalidate_scopes(*map(author_scope, User.objects.filter(
+        pk__in=[follow.user_id, follow.author_id]
+    ).values_list('username', flat=True)))
+
+
+@receiver(post_save, sender=Follow)
+def count_follow(sender, instance, created, raw=False, **kwargs):
+    if raw or not created:
+        return
+    change_follow_counts(instance.user_id, instance.author_id, 1)
+    queue_backfill(instance.author_id, instance.user_id,
+                   key=f'backfill:{instance.pk}')
+    invalidate_follow_pages(instance)
+
+
+@receiver(post_delete, sender=Follow)
+def count_unfollow(sender, instance, **kwargs):
+    change_follow_counts(instance.user_id, instance.author_id, -1)
+    forget(instance.user_id, instance.author_id)
+    followers = UserStats.objects.filter(
+        user_id=instance.author_id
+    ).values_list('followers_count', flat=True).first()
+    if followers == settings.FOLLOW_FANOUT_LIMIT:
+        # автор снова раскладывается по лентам: постов, вышедших без
+        # раскладки, у подписчиков нет
+        queue_backfill(instance.author_id)
+    invalidate_follow_pages(instance)
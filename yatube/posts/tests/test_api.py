@@ -0,0 +1,99 @@
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+
+from posts.models import Group, Post, User
+
+
+class ApiTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='leo')
+        cls.other = User.objects.create_user(username='other')
+        cls.group = Group.objects.create(
+            title='Тестовая группа', slug='test', description='Описание'
+        )
+        cls.posts = [
+            Post.objects.create(
+                text=f'Пост {i}',
+                author=cls.user if i % 2 else cls.other,
+                group=cls.group if i % 3 else None
+            )
+            for i in range(7)
+        ]
+
+    def setUp(self):
+        self.client = Client()
+
+    def get(self, url, **params):
+        response = self.client.get(url, params)
+        return response, response.json()
+
+    def walk(self, url, **params):
+        ids = []
+        while url:
+            response = self.client.get(url, params)
+            params = {}
+            data = response.json()
+            ids += [row['id'] for row in data['results']]
+            url = data['next']
+        return ids
+
+    def test_index_fields(self):
+        _, data = self.get(reverse('api_posts'))
+        newest = self.posts[-1]
+        self.assertEqual(data['results'][0], {
+            'id': newest.id,
+            'text': newest.text,
+            'pub_date': data['results'][0]['pub_date'],
+            'updated': data['results'][0]['updated'],
+            'author': 'other',
+            'group': None,
+            'comments_count': 0,
+        })
+
+    def test_sparse_fields(self):
+        _, data = self.get(reverse('api_posts'), fields='text,author')
+        self.assertEqual(set(data['results'][0]), {'text', 'author'})
+        response, data = self.get(reverse('api_posts'), fields='password')
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('error', data)
+
+    @override_settings(PAGINATOR_PER_PAGE_VAL=2)
+    def test_cursor_walks_whole_feed(self):
+        expected = [post.id for post in reversed(self.posts)]
+        self.assertEqual(self.walk(reverse('api_posts')), expected)
+        group_ids = [post.id for post in reversed(self.posts)
+                     if post.group_id]
+        self.assertEqual(
+            self.walk(reverse('api_group_posts', args=['test'])), group_ids
+        )
+        user_ids = [post.id for post in reversed(self.posts)
+                    if post.author == self.user]
+        self.assertEqual(
+            self.walk(reverse('api_profile_posts', args=['leo'])), user_ids
+        )
+
+    def test_previous_link(self):
+        _, first = self.get(reverse('api_posts'), limit=3)
+        self.assertIsNone(first['previous'])
+        second = self.client.get(first['next']).json()
+        back = self.client.get(second['previous']).json()
+        self.assertEqual(back['results'], first['results'])
+
+    def test_missing_owner(self):
+        response = self.client.get(reverse('api_group_posts', args=['no']))
+        self.assertEqual(response.status_code, 404)
+        response = self.client.get(reverse('api_profile_posts', args=['no']))
+        self.assertEqual(response.status_code, 404)
+
+    def test_fixed_query_count(self):
+        cases = [
+            (reverse('api_posts'), 1),
+            (reverse('api_group_posts', args=['test']), 2),
+            (reverse('api_profile_posts', args=['leo']), 2),
+        ]
+        for url, budget in cases:
+            for limit in (1, 100):
+                with self.subTest(url=url, limit=limit):
+                    with self.assertNumQueries(budget):
+                        self.client.get(url, {'limit': limit})
@@ -0,0 +1,128 @@
+import gzip
+import json
+import os
+import shutil
+import tempfile
+import unittest
+
+from django.contrib.staticfiles.storage import staticfiles_storage
+from django.core.management import call_command
+from django.test import SimpleTestCase, override_settings
+
+from posts.assets import PrecompressedStaticFiles, accepted_encodings, brotli
+
+STATIC_ROOT = tempfile.mkdtemp()
+PLACEHOLDER = 'posts/img/placeholder.svg'
+
+
+def fallback(environ, start_response):
+    start_response('404 Not Found', [('Content-Type', 'text/plain')])
+    return [b'django']
+
+
+@override_settings(STATIC_ROOT=STATIC_ROOT)
+class StaticPipelineTests(SimpleTestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        call_command('collectstatic', interactive=False, verbosity=0,
+                     ignore_patterns=['admin'])
+        with open(os.path.join(STATIC_ROOT, 'staticfiles.json')) as manifest:
+            cls.hashed = json.load(manifest)['paths'][PLACEHOLDER]
+        cls.app = PrecompressedStaticFiles(fallback, STATIC_ROOT, '/static/')
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(STATIC_ROOT, ignore_errors=True)
+
+    def get(self, path, **environ):
+        environ.setdefault('REQUEST_METHOD', 'GET')
+        environ['PATH_INFO'] = path
+        response = {}
+
+        def start_response(status, headers):
+            response['status'] = status
+            response['headers'] = dict(headers)
+
+        body = b''.join(self.app(environ, start_response))
+        return response['status'], response['headers'], body
+
+    def read(self, name):
+        with open(os.path.join(STATIC_ROOT, name), 'rb') as source:
+            return source.read()
+
+    def test_collectstatic_writes_hashed_and_compressed_files(self):
+        self.assertRegex(self.hashed, r'placeholder\.[0-9a-f]{12}\.svg$')
+        original = self.read(self.hashed)
+        self.assertEqual(
+            gzip.decompress(self.read(self.hashed + '.gz')), original
+        )
+        self.assertEqual(
+            os.path.exists(os.path.join(STATIC_ROOT, self.hashed + '.br')),
+            brotli is not None
+        )
+
+    def test_static_tag_uses_hashed_name(self):
+        self.assertEqual(
+            staticfiles_storage.url(PLACEHOLDER), '/static/' + self.hashed
+        )
+
+    def test_serves_gzip_variant_with_immutable_caching(self):
+        status, headers, body = self.get(
+            '/static/' + self.hashed, HTTP_ACCEPT_ENCODING='gzip, deflate'
+        )
+        self.assertEqual(status, '200 OK')
+        self.assertEqual(headers['Content-Encoding'], 'gzip')
+        self.assertEqual(headers['Content-Type'], 'image/svg+xml')
+        self.assertIn('immutable', headers['Cache-Control'])
+        self.assertEqual(headers['Vary'], 'Accept-Encoding')
+        self.assertEqual(int(headers['Content-Length']), len(body))
+        self.assertEqual(gzip.decompress(body), self.read(self.hashed))
+
+    @unittest.skipIf(brotli is None, 'пакет brotli не установлен')
+    def test_prefers_brotli(self):
+        _, headers, body = self.get(
+            '/static/' + self.hashed, HTTP_ACCEPT_ENCODING='gzip, br'
+        )
+        self.assertEqual(headers['Content-Encoding'], 'br')
+        self.assertEqual(brotli.decompress(body), self.read(self.hashed))
+
+    def test_identity_without_accept_encoding(self):
+        _, headers, body = self.get(
+            '/static/' + self.hashed, HTTP_ACCEPT_ENCODING='gzip;q=0'
+        )
+        self.assertNotIn('Content-Encoding', headers)
+        self.assertEqual(body, self.read(self.hashed))
+
+    def test_unhashed_name_is_cached_briefly(self):
+        _, headers, _ = self.get('/static/' + PLACEHOLDER)
+        self.assertNotIn('immutable', headers['Cache-Control'])
+
+    def test_head_and_not_modified(self):
+        status, headers, body = self.get(
+            '/static/' + self.hashed, REQUEST_METHOD='HEAD'
+        )
+        self.assertEqual(status, '200 OK')
+        self.assertEqual(body, b'')
+        status, _, body = self.get(
+            '/static/' + self.hashed,
+            HTTP_IF_MODIFIED_SINCE=headers['Last-Modified']
+        )
+        self.assertEqual(status, '304 Not Modified')
+        self.assertEqual(body, b'')
+
+    def test_other_paths_reach_django(self):
+        for path in ('/', '/static/missing.css', '/static/../manage.py',
+                     '/static/' + self.hashed + '.gz'):
+            with self.subTest(path=path):
+                self.assertEqual(self.get(path)[2], b'django')
+        status, _, _ = self.get('/static/' + self.hashed,
+                                REQUEST_METHOD='POST')
+        self.assertEqual(status, '404 Not Found')
+
+    def test_accepted_encodings(self):
+        self.assertEqual(
+            accepted_encodings('gzip;q=0.5, br;q=0, identity, *;q=x'),
+            {'gzip', 'identity'}
+        )
@@ -0,0 +1,93 @@
+from io import StringIO
+
+from django.contrib.auth.models import AnonymousUser
+from django.core.cache import caches
+from django.core.management import call_command
+from django.test import (Client, RequestFactory, TestCase,
+                         override_settings)
+from django.urls import reverse
+
+from posts.auth import get_user, snapshot_key, user_snapshot
+from posts.management.commands.benchmark_auth import modes
+from posts.models import Post, User
+
+
+# как при общем кэше YATUBE_AUTH_CACHE_BACKEND
+@override_settings(**modes()['cached'])
+class CachedAuthTests(TestCase):
+    def setUp(self):
+        caches['auth'].clear()
+        self.user = User.objects.create_user(
+            username='reader', password='old-secret-1'
+        )
+        self.client = Client()
+        self.client.force_login(self.user)
+
+    def snapshot(self):
+        return caches['auth'].get(snapshot_key(self.user.pk))
+
+    def test_logged_in_request_skips_session_and_user_queries(self):
+        self.client.get(reverse('new_post'))
+        self.assertIsNotNone(self.snapshot())
+        # только список групп формы
+        with self.assertNumQueries(1):
+            response = self.client.get(reverse('new_post'))
+        self.assertEqual(response.context['user'], self.user)
+
+    def test_edit_invalidates_snapshot(self):
+        self.client.get(reverse('new_post'))
+        self.user.first_name = 'Новое'
+        self.user.save()
+        self.assertIsNone(self.snapshot())
+        response = self.client.get(reverse('new_post'))
+        self.assertEqual(response.context['user'].first_name, 'Новое')
+
+    def test_password_change_ends_other_sessions(self):
+        self.client.get(reverse('new_post'))
+        self.user.set_password('new-secret-2')
+        self.user.save()
+        response = self.client.get(reverse('new_post'))
+        self.assertEqual(response.status_code, 302)
+        self.assertIn(reverse('login'), response['Location'])
+
+    def test_logout_invalidates_snapshot_and_session(self):
+        self.client.get(reverse('new_post'))
+        self.client.get(reverse('logout'))
+        self.assertIsNone(self.snapshot())
+        response = self.client.get(reverse('new_post'))
+        self.assertEqual(response.status_code, 302)
+
+    def test_inactive_user_is_anonymous(self):
+        self.user.is_active = False
+        self.user.save()
+        response = self.client.get(reverse('new_post'))
+        self.assertEqual(response.status_code, 302)
+
+    def test_snapshot_save_keeps_unloaded_fields(self):
+        snapshot, _ = user_snapshot(self.user.pk)
+        self.assertIn('password', snapshot.get_deferred_fields())
+        snapshot.last_name = 'Иванов'
+        snapshot.save()
+        self.user.refresh_from_db()
+        self.assertEqual(self.user.last_name, 'Иванов')
+        self.assertTrue(self.user.check_password('old-secret-1'))
+
+    def test_author_sees_edit_link(self):
+        post = Post.objects.create(text='Пост', author=self.user)
+        self.client.get(reverse('new_post'))
+        response = self.client.get(
+            reverse('post', args=[self.user.username, post.pk])
+        )
+        self.assertContains(
+            response, reverse('post_edit', args=[self.user.username, post.pk])
+        )
+
+    def test_session_without_user_is_anonymous(self):
+        request = RequestFactory().get('/')
+        request.session = {}
+        self.assertIsInstance(get_user(request), AnonymousUser)
+
+    def test_benchmark_auth(self):
+        out = StringIO()
+        call_command('benchmark_auth', requests=2, stdout=out)
+        self.assertIn('Экономия на запрос: 2-2', out.getvalue())
@@ -0,0 +1,77 @@
+import json
+import os
+import tempfile
+from io import StringIO
+
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import TestCase
+
+from posts.management.commands.benchmark import percentile
+from posts.models import Comment, Group, Post, UserStats
+
+
+class SeedBenchmarkTests(TestCase):
+    def setUp(self):
+        cache.clear()
+
+    def seed(self, **options):
+        call_command('seed', stdout=StringIO(), seed=1, **options)
+
+    def test_seed_creates_rows_and_counters(self):
+        self.seed(users=5, groups=3, posts=120, batch_size=50)
+        self.assertEqual(Post.objects.count(), 120)
+        self.assertEqual(Group.objects.count(), 3)
+        for stats in UserStats.objects.select_related('user'):
+            self.assertEqual(
+                stats.posts_count, stats.user.posts.count()
+            )
+        for group in Group.objects.all():
+            self.assertEqual(group.posts_count, group.posts.count())
+
+    def test_seed_skews_authors(self):
+        self.seed(users=20, groups=0, posts=400, skew=1.5)
+        counts = sorted(
+            UserStats.objects.values_list('posts_count', flat=True),
+            reverse=True
+        )
+        self.assertGreater(counts[0], 400 / 20 * 3)
+
+    def test_percentile_is_nearest_rank(self):
+        for count, expected in ((50, (25, 48, 50)), (100, (50, 95, 99))):
+            values = list(range(count, 0, -1))
+            with self.subTest(count=count):
+                self.assertEqual(
+                    tuple(percentile(values, share)
+                          for share in (0.50, 0.95, 0.99)),
+                    expected
+                )
+        self.assertEqual(percentile([7], 0.99), 7)
+        self.assertEqual(percentile([1, 2], 0), 1)
+
+    def test_benchmark_writes_report(self):
+        self.seed(users=3, groups=2, posts=30)
+        edited = Post.objects.order_by('pk').values_list('pk', 'text')
+        before = list(edited)
+        handle, path = tempfile.mkstemp(suffix='.json')
+        os.close(handle)
+        self.addCleanup(os.remove, path)
+        call_command('benchmark', requests=2, output=path, stdout=StringIO())
+        with open(path) as report_file:
+            report = json.load(report_file)
+        self.assertEqual(report['posts'], 30)
+        self.assertEqual(report['replicas'], [])
+        self.assertIn('index:anonymous', report['results'])
+        self.assertIn('post:author', report['results'])
+        for name in ('new_post', 'post_edit', 'add_comment'):
+            result = report['results'][f'{name}:author:post']
+            # форма принята, записи откачены
+            self.assertEqual(result['status'], 302)
+            self.assertGreater(result['queries_max'], 2)
+        self.assertEqual(list(edited), before)
+        self.assertFalse(Comment.objects.exists())
+        for result in report['results'].values():
+            self.assertLess(result['status'], 400)
+            self.assertLessEqual(
+                result['p50_ms'], result['p99_ms']
+            )
@@ -0,0 +1,179 @@
+from io import StringIO
+from unittest import mock
+
+from django.core.cache import cache, caches
+from django.core.management import call_command
+from django.db import connection
+from django.test import Client, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from posts import views
+from posts.models import Comment, Group, Post, User
+from posts.views import QUERY_BUDGETS
+
+
+@override_settings(PAGE_CACHE_CLOCK_SKEW=0)
+class CommentTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='leo')
+        cls.other = User.objects.create_user(username='other')
+        cls.reader = User.objects.create_user(username='reader')
+        cls.guest_client = Client()
+
+    def setUp(self):
+        cache.clear()
+        caches['ratelimit'].clear()
+        self.client = Client()
+        self.client.force_login(self.reader)
+        self.post = Post.objects.create(text='Пост', author=self.author)
+        self.other_post = Post.objects.create(
+            text='Чужой пост', author=self.other
+        )
+        self.post_url = reverse('post', args=['leo', self.post.pk])
+
+    def comment(self, text='Комментарий', post=None):
+        post = post or self.post
+        return self.client.post(
+            reverse('add_comment', args=[post.author.username, post.pk]),
+            {'text': text}
+        )
+
+    def cached(self, url):
+        with CaptureQueriesContext(connection) as queries:
+            self.guest_client.get(url)
+        return len(queries) == 0
+
+    def test_comment_is_shown_and_counted(self):
+        response = self.comment('Первый!')
+        comment = Comment.objects.get()
+        self.assertRedirects(
+            response, f'{self.post_url}?page=1#comment-{comment.pk}',
+            fetch_redirect_response=False
+        )
+        self.assertEqual(comment.author, self.reader)
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.comments_count, 1)
+        response = self.guest_client.get(self.post_url)
+        self.assertContains(response, 'Первый!')
+        self.assertContains(response, 'Комментарии: 1')
+
+    def test_guest_cannot_comment(self):
+        response = self.guest_client.post(
+            reverse('add_comment', args=['leo', self.post.pk]),
+            {'text': 'Гость'}
+        )
+        self.assertEqual(response.status_code, 302)
+        self.assertIn(reverse('login'), response['Location'])
+        self.assertFalse(Comment.objects.exists())
+
+    def test_empty_comment_is_rejected(self):
+        self.comment('')
+        self.assertFalse(Comment.objects.exists())
+
+    @override_settings(PAGINATOR_PER_PAGE_VAL=5)
+    def test_comments_are_paginated(self):
+        for i in range(6):
+            Comment.objects.create(
+                post=self.post, author=self.reader, text=f'Текст {i}'
+            )
+        response = self.comment('Седьмой')
+        self.assertIn('?page=2#', response['Location'])
+        response = self.guest_client.get(self.post_url, {'page': 2})
+        self.assertEqual(
+            [comment.text for comment in response.context['page']],
+            ['Текст 5', 'Седьмой']
+        )
+        self.assertEqual(response.context['page'].paginator.count, 7)
+
+    def test_feed_counts_come_from_post_row(self):
+        for post in (self.post, self.other_post):
+            self.comment(post=post)
+        self.comment(post=self.other_post)
+        cache.clear()
+        with CaptureQueriesContext(connection) as queries:
+            response = self.guest_client.get(reverse('index'))
+        self.assertLessEqual(len(queries), QUERY_BUDGETS['index'])
+        self.assertContains(response, 'Комментарии: 1')
+        self.assertContains(response, 'Комментарии: 2')
+
+    @override_settings(PAGINATOR_PER_PAGE_VAL=1)
+    def test_comment_invalidates_only_pages_with_the_post(self):
+        urls = {
+            'index': reverse('index'),
+            'index_page_2': reverse('index') + '?page=2',
+            'profile': reverse('profile', args=['leo']),
+            'other_profile': reverse('profile', args=['other']),
+        }
+        for url in urls.values():
+            self.guest_client.get(url)
+        self.comment()
+        # на первой странице главной - свежий пост other, пост leo
+        # только на второй
+        self.assertTrue(self.cached(urls['index']))
+        self.assertTrue(self.cached(urls['other_profile']))
+        self.assertFalse(self.cached(urls['index_page_2']))
+        self.assertFalse(self.cached(urls['profile']))
+        response = self.guest_client.get(urls['profile'])
+        self.assertContains(response, 'Комментарии: 1')
+
+    def test_comment_during_render_is_not_cached(self):
+        attach_cards = views.attach_cards
+
+        def comment_while_rendering(request, page, *args):
+            # лента уже прочитана, комментарий записан до кэширования
+            list(page)
+            Comment.objects.create(
+                post=self.post, author=self.reader, text='Гонка'
+            )
+            return attach_cards(request, page, *args)
+
+        with mock.patch('posts.views.attach_cards', comment_while_rendering):
+            response = self.guest_client.get(reverse('index'))
+        self.assertNotContains(response, 'Комментарии: 1')
+        self.assertContains(
+            self.guest_client.get(reverse('index')), 'Комментарии: 1'
+        )
+
+    def test_comment_changes_post_etag(self):
+        etag = self.guest_client.get(self.post_url)['ETag']
+        self.comment()
+        response = self.guest_client.get(
+            self.post_url, HTTP_IF_NONE_MATCH=etag
+        )
+        self.assertEqual(response.status_code, 200)
+
+    def test_comment_changes_profile_and_group_etags(self):
+        group = Group.objects.create(
+            title='Группа', slug='group', description='Описание'
+        )
+        self.post.group = group
+        self.post.save()
+        urls = [
+            reverse('profile', args=['leo']),
+            reverse('show_group_post', args=['group']),
+        ]
+        etags = [self.guest_client.get(url)['ETag'] for url in urls]
+        self.comment()
+        for url, etag in zip(urls, etags):
+            with self.subTest(url=url):
+                response = self.guest_client.get(
+                    url, HTTP_IF_NONE_MATCH=etag
+                )
+                self.assertEqual(response.status_code, 200)
+                self.assertContains(response, 'Комментарии: 1')
+
+    def test_delete_and_recount(self):
+        self.comment()
+        Comment.objects.get().delete()
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.comments_count, 0)
+        Comment.objects.bulk_create(
+            Comment(post=self.post, author=self.reader, text='Текст')
+            for _ in range(3)
+        )
+        call_command('recount', batch_size=1, stdout=StringIO())
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.comments_count, 3)
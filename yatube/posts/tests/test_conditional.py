@@ -0,0 +1,95 @@
+from django.core.cache import cache
+from django.db import connection
+from django.test import Client, TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from posts.models import Group, Post, User
+
+
+class ConditionalGetTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='leo')
+        cls.group = Group.objects.create(
+            title="Тестовая группа",
+            slug="test",
+            description="Описание тестовой группы"
+        )
+        cls.guest_client = Client()
+        cls.authorized_client = Client()
+        cls.authorized_client.force_login(cls.user)
+
+    def setUp(self):
+        cache.clear()
+        self.post = Post.objects.create(
+            text='Текст', author=self.user, group=self.group
+        )
+        self.urls = [
+            reverse('show_group_post', kwargs={'slug': self.group.slug}),
+            reverse('profile', kwargs={'username': self.user.username}),
+            reverse('post', kwargs={
+                'username': self.user.username,
+                'post_id': self.post.id
+            }),
+        ]
+
+    def test_matching_etag_returns_304_without_rendering(self):
+        for url in self.urls:
+            with self.subTest(url=url):
+                etag = self.guest_client.get(url)['ETag']
+                cache.clear()
+                with CaptureQueriesContext(connection) as queries:
+                    response = self.guest_client.get(
+                        url, HTTP_IF_NONE_MATCH=etag
+                    )
+                self.assertEqual(response.status_code, 304)
+                self.assertLessEqual(len(queries), 1)
+
+    def test_page_cache_hit_honours_validators(self):
+        url = self.urls[0]
+        response = self.guest_client.get(url)
+        modified = self.guest_client.get(
+            url, HTTP_IF_MODIFIED_SINCE=response['Last-Modified']
+        )
+        self.assertEqual(modified.status_code, 304)
+
+    def test_edit_changes_validators(self):
+        etags = [self.guest_client.get(url)['ETag'] for url in self.urls]
+        self.authorized_client.post(
+            reverse('post_edit', kwargs={
+                'username': self.user.username,
+                'post_id': self.post.id
+            }),
+            data={'text': 'Новый текст', 'group': self.group.id}
+        )
+        for url, etag in zip(self.urls, etags):
+            with self.subTest(url=url):
+                response = self.guest_client.get(
+                    url, HTTP_IF_NONE_MATCH=etag
+                )
+                self.assertEqual(response.status_code, 200)
+
+    def test_rename_changes_validators(self):
+        etags = [self.guest_client.get(url)['ETag'] for url in self.urls]
+        self.user.first_name = 'Лев'
+        self.user.save()
+        for url, etag in zip(self.urls, etags):
+            with self.subTest(url=url):
+                response = self.guest_client.get(
+                    url, HTTP_IF_NONE_MATCH=etag
+                )
+                self.assertEqual(response.status_code, 200)
+
+    def test_etag_depends_on_viewer(self):
+        for url in self.urls:
+            with self.subTest(url=url):
+                guest = self.guest_client.get(url)
+                author = self.authorized_client.get(url)
+                self.assertNotEqual(guest['ETag'], author['ETag'])
+                self.assertFalse(author.has_header('Last-Modified'))
+                response = self.authorized_client.get(
+                    url, HTTP_IF_NONE_MATCH=guest['ETag']
+                )
+                self.assertEqual(response.status_code, 200)
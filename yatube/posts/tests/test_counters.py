@@ -0,0 +1,72 @@
+from io import StringIO
+
+from django.core.management import call_command
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from posts.models import Group, Post, User, UserStats
+
+
+class PostCountersTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='leo')
+        cls.authorized_client = Client()
+        cls.authorized_client.force_login(cls.user)
+        cls.group = Group.objects.create(
+            title="Тестовая группа",
+            slug="test",
+            description="Описание тестовой группы"
+        )
+        cls.other_group = Group.objects.create(
+            title="Другая группа",
+            slug="other",
+            description="Описание другой группы"
+        )
+
+    def assertCounts(self, author, group, other_group):
+        self.group.refresh_from_db()
+        self.other_group.refresh_from_db()
+        self.assertEqual(UserStats.objects.get(user=self.user).posts_count,
+                         author)
+        self.assertEqual(self.group.posts_count, group)
+        self.assertEqual(self.other_group.posts_count, other_group)
+
+    def test_counters_follow_post_lifecycle(self):
+        self.authorized_client.post(
+            reverse('new_post'),
+            data={'text': 'Тестовый текст', 'group': self.group.id}
+        )
+        self.assertCounts(1, 1, 0)
+        post = Post.objects.get(author=self.user)
+        self.authorized_client.post(
+            reverse('post_edit', kwargs={
+                'username': self.user.username,
+                'post_id': post.id
+            }),
+            data={'text': 'Новый текст', 'group': self.other_group.id}
+        )
+        self.assertCounts(1, 0, 1)
+        Post.objects.filter(pk=post.pk).delete()
+        self.assertCounts(0, 0, 0)
+
+    def test_recount_repairs_drift(self):
+        Post.objects.bulk_create(
+            Post(text=f'Текст {i}', author=self.user, group=self.group)
+            for i in range(7)
+        )
+        UserStats.objects.filter(user=self.user).delete()
+        self.group.refresh_from_db()
+        self.assertEqual(self.group.posts_count, 0)
+        call_command('recount', batch_size=1, stdout=StringIO())
+        self.assertCounts(7, 7, 0)
+
+    def test_profile_shows_stored_count(self):
+        Post.objects.create(text='Текст', author=self.user)
+        UserStats.objects.filter(user=self.user).update(posts_count=42)
+        response = self.authorized_client.get(
+            reverse('profile', kwargs={'username': self.user.username})
+        )
+        self.assertContains(response, 'Количество записей: 42')
+        self.assertEqual(response.context['page'].paginator.count, 42)
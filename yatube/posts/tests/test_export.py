@@ -0,0 +1,98 @@
+import csv
+import gzip
+import io
+import json
+import os
+import tempfile
+from datetime import datetime
+
+from django.core.management import call_command
+from django.test import Client, TestCase
+from django.urls import reverse
+from django.utils import timezone
+
+from posts.export import encode, export_lines, export_queryset
+from posts.models import Group, Post, User
+
+
+class ExportTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.leo = User.objects.create_user(username='leo')
+        cls.other = User.objects.create_user(username='other')
+        cls.group = Group.objects.create(
+            title='Тестовая группа', slug='test', description='Описание'
+        )
+        cls.old = Post.objects.create(
+            text='Старый, "с запятой"', author=cls.leo, group=cls.group
+        )
+        Post.objects.filter(pk=cls.old.pk).update(
+            pub_date=timezone.make_aware(datetime(2019, 5, 1, 12))
+        )
+        cls.new = Post.objects.create(text='Новый', author=cls.other)
+        cls.staff = User.objects.create_user(username='boss', is_staff=True)
+
+    def export(self, headers=None, **params):
+        client = Client()
+        client.force_login(self.staff)
+        return client.get(reverse('export_posts'), params, **(headers or {}))
+
+    def jsonl(self, response):
+        body = b''.join(response.streaming_content).decode()
+        return [json.loads(line) for line in body.splitlines()]
+
+    def test_jsonl_export(self):
+        rows = self.jsonl(self.export())
+        self.assertEqual([row['id'] for row in rows],
+                         [self.old.id, self.new.id])
+        self.assertEqual(rows[0]['author'], 'leo')
+        self.assertEqual(rows[0]['group'], 'test')
+        self.assertIsNone(rows[1]['group'])
+
+    def test_filters(self):
+        self.assertEqual(
+            [row['id'] for row in self.jsonl(self.export(group='test'))],
+            [self.old.id]
+        )
+        self.assertEqual(
+            [row['id'] for row in self.jsonl(self.export(author='other'))],
+            [self.new.id]
+        )
+        self.assertEqual(
+            [row['id'] for row in self.jsonl(
+                self.export(since='2019-05-01', until='2019-05-01')
+            )],
+            [self.old.id]
+        )
+        self.assertEqual(self.export(since='вчера').status_code, 400)
+
+    def test_csv_with_gzip(self):
+        response = self.export(
+            headers={'HTTP_ACCEPT_ENCODING': 'gzip'}, format='csv'
+        )
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        body = gzip.decompress(b''.join(response.streaming_content))
+        rows = list(csv.reader(io.StringIO(body.decode())))
+        self.assertEqual(rows[0], ['id', 'text', 'author', 'group',
+                                   'pub_date'])
+        self.assertEqual(rows[1][1], 'Старый, "с запятой"')
+
+    def test_staff_only(self):
+        client = Client()
+        client.force_login(self.leo)
+        response = client.get(reverse('export_posts'))
+        self.assertEqual(response.status_code, 302)
+
+    def test_streams_in_chunks(self):
+        lines = export_lines(export_queryset(), 'jsonl', chunk_size=1)
+        chunks = list(encode(lines, buffer_size=1))
+        self.assertEqual(len(chunks), 2)
+
+    def test_command_writes_gzip_file(self):
+        handle, path = tempfile.mkstemp(suffix='.jsonl.gz')
+        os.close(handle)
+        self.addCleanup(os.remove, path)
+        call_command('export_posts', output=path, author='leo')
+        with gzip.open(path, 'rt', encoding='utf-8') as dump:
+            rows = [json.loads(line) for line in dump]
+        self.assertEqual([row['id'] for row in rows], [self.old.id])
@@ -0,0 +1,94 @@
+from django.core.cache import cache
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from posts.models import Group, Post, User
+
+
+class SyndicationFeedTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='leo')
+        cls.other = User.objects.create_user(username='other')
+        cls.group = Group.objects.create(
+            title='Тестовая группа', slug='test', description='Описание'
+        )
+        cls.group_post = Post.objects.create(
+            text='Пост в группе', author=cls.user, group=cls.group
+        )
+        cls.other_post = Post.objects.create(
+            text='Пост без группы', author=cls.other
+        )
+
+    def setUp(self):
+        cache.clear()
+        self.client = Client()
+
+    def test_feeds_list_scope_posts(self):
+        cases = [
+            (reverse('feed_rss'), ['Пост в группе', 'Пост без группы']),
+            (reverse('feed_atom'), ['Пост в группе', 'Пост без группы']),
+            (reverse('group_feed_rss', args=['test']), ['Пост в группе']),
+            (reverse('group_feed_atom', args=['test']), ['Пост в группе']),
+            (reverse('author_feed_rss', args=['other']),
+             ['Пост без группы']),
+            (reverse('author_feed_atom', args=['other']),
+             ['Пост без группы']),
+        ]
+        for url, texts in cases:
+            with self.subTest(url=url):
+                content = self.client.get(url).content.decode()
+                for text in ['Пост в группе', 'Пост без группы']:
+                    if text in texts:
+                        self.assertIn(text, content)
+                    else:
+                        self.assertNotIn(text, content)
+
+    def test_atom_and_rss_formats(self):
+        rss = self.client.get(reverse('feed_rss'))
+        atom = self.client.get(reverse('feed_atom'))
+        self.assertIn('<rss', rss.content.decode())
+        self.assertIn('http://www.w3.org/2005/Atom',
+                      atom.content.decode())
+
+    def test_unknown_scope(self):
+        response = self.client.get(reverse('group_feed_rss', args=['no']))
+        self.assertEqual(response.status_code, 404)
+
+    def test_repeated_poll_is_not_modified(self):
+        url = reverse('group_feed_atom', args=['test'])
+        first = self.client.get(url)
+        self.assertTrue(first.has_header('Last-Modified'))
+        with self.assertNumQueries(0):
+            again = self.client.get(
+                url, HTTP_IF_NONE_MATCH=first['ETag']
+            )
+        self.assertEqual(again.status_code, 304)
+        again = self.client.get(
+            url, HTTP_IF_MODIFIED_SINCE=first['Last-Modified']
+        )
+        self.assertEqual(again.status_code, 304)
+
+    def test_post_in_scope_refreshes_feed(self):
+        url = reverse('group_feed_rss', args=['test'])
+        first = self.client.get(url)
+        Post.objects.create(text='Свежий', author=self.other)
+        self.assertEqual(
+            self.client.get(url, HTTP_IF_NONE_MATCH=first['ETag'])
+            .status_code,
+            304
+        )
+        Post.objects.create(text='Свежий', author=self.other,
+                            group=self.group)
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=first['ETag'])
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('Свежий', response.content.decode())
+
+    def test_edit_refreshes_feed(self):
+        url = reverse('author_feed_rss', args=['leo'])
+        self.client.get(url)
+        post = Post.objects.get(pk=self.group_post.pk)
+        post.text = 'Исправленный пост'
+        post.save()
+        self.assertIn('Исправленный пост',
+                      self.client.get(url).content.decode())
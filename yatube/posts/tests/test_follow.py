@@ -0,0 +1,143 @@
+from io import StringIO
+
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+
+from posts.jobs import work
+from posts.models import Follow, InboxEntry, Post, User, UserStats
+
+
+class FollowTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.reader = User.objects.create_user(username='reader')
+        self.author = User.objects.create_user(username='author')
+        self.star = User.objects.create_user(username='star')
+        self.client = Client()
+        self.client.force_login(self.reader)
+
+    def follow(self, author, client=None):
+        (client or self.client).get(
+            reverse('profile_follow', args=[author.username])
+        )
+
+    def unfollow(self, author):
+        self.client.get(reverse('profile_unfollow', args=[author.username]))
+
+    def stats(self, user):
+        return UserStats.objects.get(user=user)
+
+    def feed(self, url=None):
+        # раскладка по лентам идёт фоновыми задачами
+        work()
+        response = self.client.get(url or reverse('follow_index'))
+        return response, [post.id for post in response.context['page']]
+
+    def test_follow_and_unfollow_update_counts(self):
+        self.follow(self.author)
+        self.follow(self.author)
+        self.assertEqual(self.stats(self.author).followers_count, 1)
+        self.assertEqual(self.stats(self.reader).following_count, 1)
+        response = Client().get(reverse('profile', args=['author']))
+        self.assertContains(response, 'Подписчиков: 1')
+        self.unfollow(self.author)
+        self.assertEqual(self.stats(self.author).followers_count, 0)
+        self.assertEqual(self.stats(self.reader).following_count, 0)
+        response = Client().get(reverse('profile', args=['author']))
+        self.assertContains(response, 'Подписчиков: 0')
+
+    def test_cannot_follow_self(self):
+        self.follow(self.reader)
+        self.assertFalse(Follow.objects.exists())
+
+    def test_new_posts_reach_followers_only(self):
+        old = Post.objects.create(text='Старый', author=self.author)
+        self.follow(self.author)
+        new = Post.objects.create(text='Новый', author=self.author)
+        Post.objects.create(text='Чужой', author=self.star)
+        self.assertEqual(self.feed()[1], [new.id, old.id])
+        self.unfollow(self.author)
+        self.assertEqual(self.feed()[1], [])
+
+    @override_settings(FOLLOW_FANOUT_LIMIT=1)
+    def test_big_authors_are_merged_at_read_time(self):
+        fan = User.objects.create_user(username='fan')
+        fan_client = Client()
+        fan_client.force_login(fan)
+        self.follow(self.star, fan_client)
+        self.follow(self.star)
+        self.follow(self.author)
+        posts = []
+        for i in range(3):
+            posts.append(Post.objects.create(text=f'a{i}', author=self.author))
+            posts.append(Post.objects.create(text=f's{i}', author=self.star))
+        work()
+        self.assertFalse(
+            InboxEntry.objects.filter(post__author=self.star).exists()
+        )
+        expected = [post.id for post in reversed(posts)]
+        url = reverse('follow_index')
+        with self.settings(PAGINATOR_PER_PAGE_VAL=4):
+            response, first = self.feed()
+            cursor = response.context['page'].next_cursor
+            response, second = self.feed(f'{url}?cursor={cursor}')
+            cursor = response.context['page'].previous_cursor
+            _, back = self.feed(f'{url}?cursor={cursor}')
+        self.assertEqual(first + second, expected)
+        self.assertEqual(back, first)
+
+    @override_settings(FOLLOW_FANOUT_LIMIT=1)
+    def test_author_back_under_limit_is_backfilled(self):
+        fan = User.objects.create_user(username='fan')
+        fan_client = Client()
+        fan_client.force_login(fan)
+        self.follow(self.star)
+        self.follow(self.star, fan_client)
+        post = Post.objects.create(text='Без раскладки', author=self.star)
+        fan_client.get(reverse('profile_unfollow', args=['star']))
+        work()
+        self.assertTrue(InboxEntry.objects.filter(
+            user=self.reader, post=post
+        ).exists())
+
+    @override_settings(INBOX_SIZE=3, INBOX_TRIM_SLACK=1)
+    def test_inbox_is_bounded(self):
+        self.follow(self.author)
+        posts = []
+        for i in range(10):
+            posts.append(Post.objects.create(text=f'{i}', author=self.author))
+            work()
+        entries = InboxEntry.objects.filter(user=self.reader)
+        self.assertLessEqual(entries.count(), 4)
+        self.assertEqual(
+            list(entries.order_by('-pub_date', '-post_id')
+                 .values_list('post_id', flat=True)[:3]),
+            [post.id for post in reversed(posts)][:3]
+        )
+
+    @override_settings(FOLLOW_FANOUT_LIMIT=1)
+    def test_fixed_query_count(self):
+        fan = User.objects.create_user(username='fan')
+        fan_client = Client()
+        fan_client.force_login(fan)
+        self.follow(self.star, fan_client)
+        self.follow(self.star)
+        self.follow(self.author)
+        for i in range(30):
+            Post.objects.create(text=f'{i}', author=self.author)
+            Post.objects.create(text=f'{i}', author=self.star)
+        for per_page in (1, 10, 50):
+            with self.subTest(per_page=per_page):
+                with self.settings(PAGINATOR_PER_PAGE_VAL=per_page):
+                    # сессия, пользователь, крупные авторы, входящие и
+                    # посты крупных авторов
+                    with self.assertNumQueries(5):
+                        self.client.get(reverse('follow_index'))
+
+    def test_recount_fixes_follow_counts(self):
+        self.follow(self.author)
+        UserStats.objects.filter(user=self.author).update(followers_count=7)
+        call_command('recount', stdout=StringIO())
+        self.assertEqual(self.stats(self.author).followers_count, 1)
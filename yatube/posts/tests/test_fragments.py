@@ -0,0 +1,98 @@
+from unittest import mock
+
+from django.core.cache import cache
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from posts import fragments
+from posts.models import Group, Post, User
+
+
+class PostCardCacheTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='leo')
+        cls.group = Group.objects.create(
+            title="Тестовая группа",
+            slug="test",
+            description="Описание тестовой группы"
+        )
+        cls.guest_client = Client()
+        cls.authorized_client = Client()
+        cls.authorized_client.force_login(cls.user)
+
+    def setUp(self):
+        cache.clear()
+        self.post = Post.objects.create(
+            text='Первый текст', author=self.user, group=self.group
+        )
+
+    def count_renders(self, client, url):
+        render = mock.Mock(wraps=fragments.render_cards)
+        with mock.patch.object(fragments, 'render_cards', render):
+            response = client.get(url)
+        return response, sum(len(call[0][0]) for call in render.call_args_list)
+
+    def test_cards_rendered_once(self):
+        Post.objects.create(text='Второй текст', author=self.user)
+        url = reverse('index')
+        _, renders = self.count_renders(self.guest_client, url)
+        self.assertEqual(renders, 2)
+        response, renders = self.count_renders(self.guest_client, url)
+        self.assertEqual(renders, 0)
+        self.assertContains(response, 'Первый текст')
+
+    def test_edit_and_rename_invalidate_card(self):
+        url = reverse('profile', kwargs={'username': self.user.username})
+        self.guest_client.get(url)
+        self.authorized_client.post(
+            reverse('post_edit', kwargs={
+                'username': self.user.username,
+                'post_id': self.post.id
+            }),
+            data={'text': 'Исправленный текст'}
+        )
+        response, renders = self.count_renders(self.guest_client, url)
+        self.assertEqual(renders, 1)
+        self.assertContains(response, 'Исправленный текст')
+        author = User.objects.get(pk=self.user.pk)
+        author.username = 'leonardo'
+        author.save()
+        url = reverse('profile', kwargs={'username': author.username})
+        response, renders = self.count_renders(self.guest_client, url)
+        self.assertEqual(renders, 1)
+        self.assertContains(response, '@leonardo')
+
+    def test_card_links(self):
+        response = self.guest_client.get(
+            reverse('profile', kwargs={'username': self.user.username})
+        )
+        profile_url = reverse('profile', args=['leo'])
+        post_url = reverse('post', args=['leo', self.post.id])
+        self.assertContains(response, f'href="{profile_url}"')
+        self.assertContains(response, f'href="{post_url}"')
+
+    def test_links_for_numeric_username(self):
+        author = User.objects.create_user(
+            username=str(fragments.URL_SENTINEL)
+        )
+        post = Post.objects.create(text='Текст', author=author)
+        fragments.attach_links([post])
+        self.assertEqual(
+            post.url, reverse('post', args=[author.username, post.id])
+        )
+        self.assertEqual(
+            post.edit_url,
+            reverse('post_edit', args=[author.username, post.id])
+        )
+
+    def test_author_gets_own_card(self):
+        url = reverse('profile', kwargs={'username': self.user.username})
+        edit_url = reverse('post_edit', kwargs={
+            'username': self.user.username,
+            'post_id': self.post.id
+        })
+        self.assertNotContains(self.guest_client.get(url), edit_url)
+        self.assertContains(self.authorized_client.get(url), edit_url)
+        self.assertNotContains(self.guest_client.get(url), edit_url)
@@ -0,0 +1,116 @@
+from io import StringIO
+from unittest import mock
+
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connection
+from django.test import Client, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from posts import views
+from posts.models import Group, Post, User
+
+
+@override_settings(PAGINATOR_PER_PAGE_VAL=2, PAGE_CACHE_CLOCK_SKEW=0)
+class GroupIndexTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='leo')
+        cls.guest_client = Client()
+
+    def setUp(self):
+        cache.clear()
+        self.groups = [
+            Group.objects.create(
+                title=f'Группа {letter}',
+                slug=f'group-{letter}',
+                description=f'Описание {letter}'
+            ) for letter in 'abc'
+        ]
+        self.first_page = reverse('group_index')
+        self.second_page = self.first_page + '?page=2'
+
+    def cached(self, url):
+        with CaptureQueriesContext(connection) as queries:
+            self.guest_client.get(url)
+        return len(queries) == 0
+
+    def test_directory_lists_groups_with_aggregates(self):
+        post = Post.objects.create(
+            text='Пост', author=self.user, group=self.groups[0]
+        )
+        response = self.guest_client.get(self.first_page)
+        groups = list(response.context['page'])
+        self.assertEqual(groups, self.groups[:2])
+        self.assertEqual(groups[0].posts_count, 1)
+        self.assertEqual(groups[0].last_post, post.pub_date)
+        self.assertIsNone(groups[1].last_post)
+        self.assertContains(
+            response, reverse('show_group_post', args=['group-a'])
+        )
+        self.assertEqual(response.context['page'].paginator.count, 3)
+
+    def test_last_post_follows_moves_and_deletes(self):
+        older = Post.objects.create(
+            text='Старый', author=self.user, group=self.groups[0]
+        )
+        newer = Post.objects.create(
+            text='Новый', author=self.user, group=self.groups[0]
+        )
+        newer.group = self.groups[1]
+        newer.save()
+        first, second = Group.objects.filter(
+            pk__in=[self.groups[0].pk, self.groups[1].pk]
+        ).order_by('pk')
+        self.assertEqual(first.last_post, older.pub_date)
+        self.assertEqual(second.last_post, newer.pub_date)
+        older.delete()
+        first.refresh_from_db()
+        self.assertIsNone(first.last_post)
+        self.assertEqual(first.posts_count, 0)
+
+    def test_new_post_refreshes_only_its_page(self):
+        for url in (self.first_page, self.second_page):
+            self.guest_client.get(url)
+        Post.objects.create(text='Пост', author=self.user,
+                            group=self.groups[2])
+        self.assertTrue(self.cached(self.first_page))
+        self.assertFalse(self.cached(self.second_page))
+        self.assertContains(
+            self.guest_client.get(self.second_page), 'Записей: 1.'
+        )
+
+    def test_post_during_render_is_not_cached(self):
+        depend_on = views.depend_on
+
+        def post_while_rendering(request, *scopes):
+            # группы страницы уже прочитаны
+            Post.objects.create(text='Пост', author=self.user,
+                                group=self.groups[0])
+            depend_on(request, *scopes)
+
+        with mock.patch('posts.views.depend_on', post_while_rendering):
+            response = self.guest_client.get(self.first_page)
+        self.assertNotContains(response, 'Записей: 1.')
+        self.assertContains(
+            self.guest_client.get(self.first_page), 'Записей: 1.'
+        )
+
+    def test_new_group_refreshes_directory(self):
+        self.guest_client.get(self.second_page)
+        Group.objects.create(title='Группа d', slug='group-d',
+                             description='Описание d')
+        response = self.guest_client.get(self.second_page)
+        self.assertEqual(response.context['page'].paginator.count, 4)
+        self.assertContains(response, 'Группа d')
+
+    def test_recount_repairs_last_post(self):
+        post = Post.objects.create(
+            text='Пост', author=self.user, group=self.groups[0]
+        )
+        Group.objects.update(last_post=None)
+        call_command('recount', stdout=StringIO())
+        self.groups[0].refresh_from_db()
+        self.assertEqual(self.groups[0].last_post, post.pub_date)
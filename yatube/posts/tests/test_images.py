@@ -0,0 +1,121 @@
+import os
+import shutil
+import tempfile
+from io import BytesIO, StringIO
+
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+from PIL import Image
+
+from posts.jobs import work
+from posts.models import Job, Post, User
+from posts.thumbnails import PLACEHOLDER, generate_thumbnails, thumbnail_name
+
+MEDIA_ROOT = tempfile.mkdtemp()
+
+
+def image_file(name='photo.png', size=(1600, 1200)):
+    data = BytesIO()
+    Image.new('RGB', size, 'red').save(data, 'PNG')
+    return SimpleUploadedFile(name, data.getvalue(), 'image/png')
+
+
+@override_settings(MEDIA_ROOT=MEDIA_ROOT, THUMBNAIL_SIZES={
+    'feed': (320, 180, True), 'detail': (640, 640, False)
+})
+class ImageTests(TestCase):
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(MEDIA_ROOT, ignore_errors=True)
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username='painter')
+        self.client = Client()
+        self.client.force_login(self.user)
+
+    def publish(self, image):
+        self.client.post(reverse('new_post'), {
+            'text': 'С картинкой', 'image': image
+        })
+        return Post.objects.get(author=self.user)
+
+    def test_upload_shows_placeholder_until_thumbnails_ready(self):
+        post = self.publish(image_file())
+        self.assertTrue(post.image.name.startswith('posts/'))
+        self.assertFalse(post.thumbnails_ready)
+        response = Client().get(reverse('index'))
+        self.assertContains(response, PLACEHOLDER)
+
+        generate_thumbnails(post.pk, post.image.name)
+        post.refresh_from_db()
+        self.assertTrue(post.thumbnails_ready)
+        feed = os.path.join(
+            MEDIA_ROOT, thumbnail_name(post.image.name, 'feed')
+        )
+        detail = os.path.join(
+            MEDIA_ROOT, thumbnail_name(post.image.name, 'detail')
+        )
+        with Image.open(feed) as thumb:
+            self.assertEqual(thumb.size, (320, 180))
+        with Image.open(detail) as thumb:
+            self.assertEqual(thumb.size, (640, 480))
+        # страница с заглушкой сброшена из кэша
+        response = Client().get(reverse('index'))
+        self.assertNotContains(response, PLACEHOLDER)
+        self.assertContains(
+            response, '/media/' + thumbnail_name(post.image.name, 'feed')
+        )
+
+    def test_new_image_resets_thumbnails(self):
+        post = self.publish(image_file())
+        generate_thumbnails(post.pk, post.image.name)
+        old_name = Post.objects.get(pk=post.pk).image.name
+        self.client.post(
+            reverse('post_edit', args=[self.user.username, post.pk]),
+            {'text': 'Новая картинка', 'image': image_file('other.png')}
+        )
+        post.refresh_from_db()
+        self.assertNotEqual(post.image.name, old_name)
+        self.assertFalse(post.thumbnails_ready)
+        # устаревший результат для старой картинки не помечает новую
+        generate_thumbnails(post.pk, old_name)
+        post.refresh_from_db()
+        self.assertFalse(post.thumbnails_ready)
+
+    def test_text_edit_keeps_thumbnails(self):
+        post = self.publish(image_file())
+        generate_thumbnails(post.pk, post.image.name)
+        self.client.post(
+            reverse('post_edit', args=[self.user.username, post.pk]),
+            {'text': 'Только текст'}
+        )
+        post.refresh_from_db()
+        self.assertEqual(post.text, 'Только текст')
+        self.assertTrue(post.thumbnails_ready)
+
+    def test_not_an_image_is_rejected(self):
+        response = self.client.post(reverse('new_post'), {
+            'text': 'Не картинка',
+            'image': SimpleUploadedFile('fake.png', b'text', 'image/png'),
+        })
+        self.assertFalse(Post.objects.exists())
+        self.assertTrue(response.context['form'].errors['image'])
+
+    def test_regenerate_command(self):
+        post = self.publish(image_file())
+        call_command('regenerate_thumbnails', stdout=StringIO())
+        post.refresh_from_db()
+        self.assertTrue(post.thumbnails_ready)
+
+    def test_upload_queues_thumbnails(self):
+        post = self.publish(image_file())
+        job = Job.objects.get(kind='thumbnails')
+        self.assertEqual(job.key, f'thumbnails:{post.pk}:{post.image.name}')
+        work()
+        post.refresh_from_db()
+        self.assertTrue(post.thumbnails_ready)
@@ -0,0 +1,136 @@
+import json
+import os
+import tempfile
+from io import StringIO
+from unittest import mock
+
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import TestCase
+
+from posts.models import Group, ImportCheckpoint, Post, User, UserStats
+
+
+class ImportPostsTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username='leo')
+        self.group = Group.objects.create(
+            title='Тестовая группа', slug='test', description='Описание'
+        )
+        self.directory = tempfile.TemporaryDirectory()
+        self.addCleanup(self.directory.cleanup)
+
+    def write(self, name, content):
+        path = os.path.join(self.directory.name, name)
+        with open(path, 'w', encoding='utf-8') as source:
+            source.write(content)
+        return path
+
+    def write_jsonl(self, rows):
+        return self.write(
+            'posts.jsonl',
+            '\n'.join(json.dumps(row, ensure_ascii=False) for row in rows)
+        )
+
+    def run_import(self, path, **options):
+        call_command('import_posts', path, stdout=StringIO(),
+                     stderr=StringIO(), **options)
+
+    def test_jsonl_import_keeps_dates_and_counters(self):
+        path = self.write_jsonl([
+            {'text': 'Первый', 'author': 'leo', 'group': 'test',
+             'pub_date': '2019-01-02T03:04:05+00:00'},
+            {'text': 'Второй', 'author': 'leo'},
+        ])
+        self.run_import(path, batch_size=1)
+        first = Post.objects.get(text='Первый')
+        self.assertEqual(first.group, self.group)
+        self.assertEqual(first.pub_date.year, 2019)
+        self.assertEqual(UserStats.objects.get(user=self.user).posts_count, 2)
+        self.group.refresh_from_db()
+        self.assertEqual(self.group.posts_count, 1)
+        self.assertFalse(ImportCheckpoint.objects.exists())
+
+    def test_csv_import_skips_bad_rows(self):
+        path = self.write(
+            'posts.csv',
+            'text,author,group,pub_date\n'
+            'Хороший,leo,,\n'
+            ',leo,,\n'
+            'Чужой,nobody,,\n'
+            'Без группы,leo,missing,\n'
+            'Кривая дата,leo,,вчера\n'
+        )
+        self.run_import(path)
+        self.assertEqual(
+            list(Post.objects.values_list('text', flat=True)), ['Хороший']
+        )
+
+    def test_create_authors(self):
+        path = self.write_jsonl([{'text': 'Привет', 'author': 'newbie'}])
+        self.run_import(path, create_authors=True)
+        author = User.objects.get(username='newbie')
+        self.assertEqual(author.stats.posts_count, 1)
+
+    def test_resume_from_checkpoint(self):
+        rows = [{'text': f'Пост {i}', 'author': 'leo'} for i in range(5)]
+        path = self.write_jsonl(rows)
+        original = Post.objects.bulk_create
+        calls = []
+
+        def failing_bulk_create(posts, *args, **kwargs):
+            calls.append(posts)
+            if len(calls) == 2:
+                raise RuntimeError('сбой')
+            return original(posts, *args, **kwargs)
+
+        with mock.patch.object(Post.objects, 'bulk_create',
+                               failing_bulk_create):
+            with self.assertRaises(RuntimeError):
+                self.run_import(path, batch_size=2)
+        self.assertEqual(Post.objects.count(), 2)
+        self.run_import(path, batch_size=2)
+        self.assertCountEqual(
+            Post.objects.values_list('text', flat=True),
+            [row['text'] for row in rows]
+        )
+        self.assertEqual(UserStats.objects.get(user=self.user).posts_count, 5)
+
+    def test_crash_while_saving_checkpoint_rolls_back_batch(self):
+        rows = [{'text': f'Пост {i}', 'author': 'leo'} for i in range(4)]
+        path = self.write_jsonl(rows)
+        original = ImportCheckpoint.objects.update_or_create
+        calls = []
+
+        def failing_checkpoint(*args, **kwargs):
+            calls.append(kwargs)
+            if len(calls) == 2:
+                raise RuntimeError('сбой')
+            return original(*args, **kwargs)
+
+        with mock.patch.object(ImportCheckpoint.objects, 'update_or_create',
+                               failing_checkpoint):
+            with self.assertRaises(RuntimeError):
+                self.run_import(path, batch_size=2)
+        self.assertEqual(Post.objects.count(), 2)
+        self.assertEqual(ImportCheckpoint.objects.get().rows, 2)
+        self.run_import(path, batch_size=2)
+        self.assertEqual(Post.objects.count(), 4)
+
+    def test_malformed_jsonl_line_is_skipped(self):
+        path = self.write(
+            'posts.jsonl',
+            '{"text": "Первый", "author": "leo"}\n'
+            '{"text": "оборван\n'
+            '[1, 2]\n'
+            '{"text": "Второй", "author": "leo"}\n'
+        )
+        stderr = StringIO()
+        call_command('import_posts', path, stdout=StringIO(), stderr=stderr,
+                     batch_size=3)
+        self.assertCountEqual(
+            Post.objects.values_list('text', flat=True), ['Первый', 'Второй']
+        )
+        self.assertIn('Строка 2 пропущена', stderr.getvalue())
+        self.assertIn('Строка 3 пропущена', stderr.getvalue())
@@ -0,0 +1,149 @@
+from datetime import timedelta
+from io import StringIO
+
+from django.core.management import call_command
+from django.db import connection
+from django.db.models import Max
+from django.test import Client, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from posts.jobs import HANDLERS, enqueue, handler, purge, work
+from posts.models import Follow, Job, Post, User
+
+
+class JobQueueTests(TestCase):
+    def setUp(self):
+        self.calls = []
+
+    def register(self, kind, function=None, batch_size=1):
+        handler(kind, batch_size)(function or self.calls.append)
+        self.addCleanup(HANDLERS.pop, kind)
+
+    def test_jobs_of_one_kind_are_batched(self):
+        self.register('test.batch', batch_size=3)
+        for number in range(5):
+            enqueue('test.batch', {'number': number})
+        self.assertEqual(work(), 5)
+        self.assertEqual(self.calls, [
+            [{'number': 0}, {'number': 1}, {'number': 2}],
+            [{'number': 3}, {'number': 4}],
+        ])
+        self.assertEqual(Job.objects.filter(status=Job.DONE).count(), 5)
+
+    def test_idempotency_key(self):
+        self.register('test.key')
+        enqueue('test.key', {'first': True}, key='once')
+        enqueue('test.key', {'first': False}, key='once')
+        work()
+        enqueue('test.key', {'first': False}, key='once')
+        self.assertEqual(work(), 0)
+        self.assertEqual(self.calls, [[{'first': True}]])
+
+    @override_settings(JOB_MAX_ATTEMPTS=2, JOB_RETRY_DELAY=10)
+    def test_failed_job_is_retried_with_backoff(self):
+        def broken(payloads):
+            Follow.objects.create(
+                user=User.objects.create_user(username='reader'),
+                author=User.objects.create_user(username='author')
+            )
+            raise ValueError('сломалось')
+
+        self.register('test.broken', broken)
+        enqueue('test.broken')
+        with self.assertLogs('posts.jobs', 'ERROR'):
+            self.assertEqual(work(), 1)
+        job = Job.objects.get()
+        self.assertEqual(job.status, Job.PENDING)
+        self.assertEqual(job.attempts, 1)
+        self.assertIn('сломалось', job.last_error)
+        self.assertGreaterEqual(
+            job.run_after, timezone.now() + timedelta(seconds=9)
+        )
+        # изменения упавшего обработчика откатываются
+        self.assertFalse(User.objects.exists())
+        # до срока задача не повторяется
+        self.assertEqual(work(), 0)
+        Job.objects.update(run_after=timezone.now())
+        with self.assertLogs('posts.jobs', 'ERROR'):
+            work()
+        job.refresh_from_db()
+        self.assertEqual(job.status, Job.FAILED)
+        self.assertEqual(job.attempts, 2)
+
+    def test_unknown_kind_fails(self):
+        enqueue('test.unknown')
+        with self.assertLogs('posts.jobs', 'ERROR'):
+            work()
+        self.assertIn('test.unknown', Job.objects.get().last_error)
+
+    def test_expired_lease_is_taken_again(self):
+        self.register('test.lease')
+        enqueue('test.lease')
+        Job.objects.update(
+            status=Job.RUNNING, attempts=1, locked_by='dead',
+            locked_until=timezone.now() - timedelta(seconds=1)
+        )
+        self.assertEqual(work(), 1)
+        job = Job.objects.get()
+        self.assertEqual(job.status, Job.DONE)
+        self.assertEqual(job.attempts, 2)
+
+    def test_running_job_is_not_taken_twice(self):
+        self.register('test.running')
+        enqueue('test.running')
+        Job.objects.update(
+            status=Job.RUNNING, locked_by='other',
+            locked_until=timezone.now() + timedelta(minutes=5)
+        )
+        self.assertEqual(work(), 0)
+
+    @override_settings(JOB_RETENTION=60)
+    def test_purge_frees_keys(self):
+        self.register('test.purge')
+        enqueue('test.purge', key='daily')
+        work()
+        Job.objects.update(finished=timezone.now() - timedelta(minutes=2))
+        purge()
+        enqueue('test.purge', key='daily')
+        self.assertEqual(work(), 1)
+
+    def test_run_workers_once(self):
+        self.register('test.command')
+        enqueue('test.command')
+        out = StringIO()
+        call_command('run_workers', once=True, stdout=out)
+        self.assertIn('Выполнено задач: 1', out.getvalue())
+        self.assertEqual(len(self.calls), 1)
+
+
+class PublishingTests(TestCase):
+    def setUp(self):
+        self.author = User.objects.create_user(username='author')
+        self.client = Client()
+        self.client.force_login(self.author)
+        # снимок пользователя попадает в кэш
+        self.client.get(reverse('new_post'))
+
+    def publish_queries(self):
+        with CaptureQueriesContext(connection) as queries:
+            self.client.post(reverse('new_post'), {'text': 'Пост'})
+        return len(queries)
+
+    def test_new_post_only_enqueues_fan_out(self):
+        alone = self.publish_queries()
+        readers = [User.objects.create_user(username=f'reader{number}')
+                   for number in range(30)]
+        for reader in readers:
+            Follow.objects.create(user=reader, author=self.author)
+        work()
+        self.assertEqual(self.publish_queries(), alone)
+        post_id = Post.objects.aggregate(last=Max('pk'))['last']
+        self.assertTrue(Job.objects.filter(
+            kind='fan_out', key=f'fan_out:{post_id}', status=Job.PENDING
+        ).exists())
+        work()
+        self.assertEqual(
+            Post.objects.get(pk=post_id).inbox_entries.count(), 30
+        )
@@ -0,0 +1,103 @@
+from django.core.cache import cache
+from django.db import connection
+from django.test import Client, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from posts.models import Group, Post, User
+
+
+# тесты идут в одном процессе, часы общие
+@override_settings(PAGE_CACHE_CLOCK_SKEW=0)
+class AnonymousPageCacheTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='leo')
+        cls.other = User.objects.create_user(username='other')
+        cls.group = Group.objects.create(
+            title="Тестовая группа",
+            slug="test",
+            description="Описание тестовой группы"
+        )
+        cls.other_group = Group.objects.create(
+            title="Другая группа",
+            slug="other",
+            description="Описание другой группы"
+        )
+        cls.guest_client = Client()
+        cls.authorized_client = Client()
+        cls.authorized_client.force_login(cls.user)
+
+    def setUp(self):
+        cache.clear()
+        self.post = Post.objects.create(
+            text='Первый текст', author=self.user, group=self.group
+        )
+        self.urls = {
+            'index': reverse('index'),
+            'group': reverse('show_group_post', kwargs={'slug': 'test'}),
+            'other_group': reverse(
+                'show_group_post', kwargs={'slug': 'other'}
+            ),
+            'profile': reverse(
+                'profile', kwargs={'username': self.user.username}
+            ),
+            'other_profile': reverse(
+                'profile', kwargs={'username': self.other.username}
+            ),
+        }
+
+    def warm_up(self):
+        for url in self.urls.values():
+            self.guest_client.get(url)
+
+    def cached(self, url):
+        with CaptureQueriesContext(connection) as queries:
+            self.guest_client.get(url)
+        return len(queries) == 0
+
+    def test_anonymous_pages_served_from_cache(self):
+        self.warm_up()
+        for name, url in self.urls.items():
+            with self.subTest(page=name):
+                self.assertTrue(self.cached(url))
+
+    def test_authorized_pages_not_cached(self):
+        self.warm_up()
+        response = self.authorized_client.get(self.urls['index'])
+        self.assertIsNotNone(response.context)
+
+    def test_new_post_invalidates_affected_pages(self):
+        self.warm_up()
+        self.authorized_client.post(
+            reverse('new_post'),
+            data={'text': 'Свежий пост', 'group': self.group.id}
+        )
+        for name in ('index', 'group', 'profile'):
+            with self.subTest(page=name):
+                self.assertContains(
+                    self.guest_client.get(self.urls[name]), 'Свежий пост'
+                )
+        self.assertTrue(self.cached(self.urls['other_group']))
+        self.assertTrue(self.cached(self.urls['other_profile']))
+
+    def test_group_move_invalidates_both_groups(self):
+        self.warm_up()
+        self.authorized_client.post(
+            reverse('post_edit', kwargs={
+                'username': self.user.username,
+                'post_id': self.post.id
+            }),
+            data={'text': 'Перенесённый пост', 'group': self.other_group.id}
+        )
+        self.assertNotContains(
+            self.guest_client.get(self.urls['group']), 'Перенесённый пост'
+        )
+        for name in ('index', 'other_group', 'profile'):
+            with self.subTest(page=name):
+                self.assertContains(
+                    self.guest_client.get(self.urls[name]),
+                    'Перенесённый пост'
+                )
+        self.assertTrue(self.cached(self.urls['other_profile']))
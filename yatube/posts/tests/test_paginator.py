@@ -0,0 +1,144 @@
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connection
+from django.test import Client, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from posts.models import Group, Post, User
+from posts.paginator import CursorPage, FeedPaginator
+
+
+@override_settings(PAGINATOR_MODES={
+    'index': 'cursor',
+    'show_group_post': 'cursor',
+    'profile': 'cursor',
+})
+class CursorPaginatorTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='leo')
+        cls.group = Group.objects.create(
+            title="Тестовая группа",
+            slug="test",
+            description="Описание тестовой группы"
+        )
+        cls.posts_count = settings.PAGINATOR_PER_PAGE_VAL * 2 + 5
+        Post.objects.bulk_create(Post(
+            text='Test %s' % i,
+            group=cls.group,
+            author=cls.user
+        ) for i in range(cls.posts_count))
+        cls.client = Client()
+
+    def setUp(self):
+        cache.clear()
+
+    def walk(self, url):
+        pages = []
+        response = self.client.get(url)
+        pages.append(response.context['page'])
+        while pages[-1].has_next():
+            response = self.client.get(
+                url, {'cursor': pages[-1].next_cursor}
+            )
+            pages.append(response.context['page'])
+        return pages
+
+    def test_cursor_walks_whole_feed(self):
+        feeds = [
+            reverse('index'),
+            reverse('show_group_post', kwargs={'slug': self.group.slug}),
+            reverse('profile', kwargs={'username': self.user.username}),
+        ]
+        expected = list(
+            Post.objects.order_by('-pub_date', 'id').values_list(
+                'id', flat=True
+            )
+        )
+        for url in feeds:
+            with self.subTest(url=url):
+                pages = self.walk(url)
+                self.assertIsInstance(pages[0], CursorPage)
+                self.assertFalse(pages[0].has_previous())
+                self.assertEqual(
+                    [post.id for page in pages for post in page],
+                    expected
+                )
+
+    def test_cursor_previous_returns_same_page(self):
+        url = reverse('index')
+        pages = self.walk(url)
+        for current, previous in zip(pages[1:], pages):
+            response = self.client.get(
+                url, {'cursor': current.previous_cursor}
+            )
+            self.assertEqual(
+                list(response.context['page']), list(previous)
+            )
+
+    def test_broken_cursor_returns_first_page(self):
+        url = reverse('index')
+        first = self.client.get(url).context['page']
+        for cursor in ('garbage', 'W10', '!!!'):
+            with self.subTest(cursor=cursor):
+                response = self.client.get(url, {'cursor': cursor})
+                self.assertEqual(list(response.context['page']), list(first))
+
+    def test_cursor_links_rendered(self):
+        response = self.client.get(reverse('index'))
+        page = response.context['page']
+        self.assertContains(response, f'?cursor={page.next_cursor}')
+
+
+class FeedPaginatorTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='leo')
+        cls.client = Client()
+
+    def setUp(self):
+        cache.clear()
+
+    def test_elided_page_range(self):
+        paginator = FeedPaginator(range(500), 10)
+        self.assertEqual(
+            paginator.get_elided_page_range(25),
+            [1, 2, None, 22, 23, 24, 25, 26, 27, 28, None, 49, 50]
+        )
+        self.assertEqual(
+            paginator.get_elided_page_range(2),
+            [1, 2, 3, 4, 5, None, 49, 50]
+        )
+        self.assertEqual(
+            FeedPaginator(range(50), 10).get_elided_page_range(1),
+            [1, 2, 3, 4, 5]
+        )
+
+    @override_settings(PAGINATOR_PER_PAGE_VAL=1)
+    def test_navigation_is_windowed(self):
+        Post.objects.bulk_create(
+            Post(text=f'Текст {i}', author=self.user) for i in range(100)
+        )
+        response = self.client.get(reverse('index'), {'page': 50})
+        # назад, 1 2 … 47-53 … 99 100, вперёд
+        self.assertContains(response, 'class="page-link"', count=15)
+        self.assertContains(response, '?page=100"')
+        self.assertNotContains(response, '?page=60"')
+
+    def test_index_count_cached_until_post_change(self):
+        Post.objects.create(text='Первый', author=self.user)
+        url = reverse('index')
+        self.assertEqual(self.client.get(url).context['page']
+                         .paginator.count, 1)
+        with CaptureQueriesContext(connection) as queries:
+            self.client.get(url, {'page': 1})
+        self.assertFalse(any('COUNT' in q['sql'] for q in queries))
+        post = Post.objects.create(text='Второй', author=self.user)
+        response = self.client.get(url, {'page': 1})
+        self.assertEqual(response.context['page'].paginator.count, 2)
+        post.delete()
+        response = self.client.get(url, {'page': 1})
+        self.assertEqual(response.context['page'].paginator.count, 1)
@@ -0,0 +1,18 @@
+from io import StringIO
+
+from django.core.management import call_command
+from django.test import TestCase
+
+from posts.management.commands.check_feed_plans import plan_problems
+
+
+class FeedPlansTests(TestCase):
+    def test_feed_queries_use_indexes(self):
+        out = StringIO()
+        call_command('check_feed_plans', stdout=out, stderr=StringIO())
+        self.assertIn('в порядке', out.getvalue())
+
+    def test_full_scan_detected(self):
+        problems = plan_problems('SELECT * FROM posts_post ORDER BY text')
+        self.assertTrue(any('TEMP B-TREE' in line for line in problems))
+        self.assertTrue(any(line.startswith('SCAN') for line in problems))
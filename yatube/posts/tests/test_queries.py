@@ -0,0 +1,75 @@
+from django.core.cache import cache
+from django.db import connection
+from django.test import Client, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from posts.models import Group, Post, User
+from posts.views import QUERY_BUDGETS
+
+
+class FeedQueryBudgetTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.authors = [
+            User.objects.create_user(username=f'author{i}') for i in range(5)
+        ]
+        cls.groups = [
+            Group.objects.create(
+                title=f'Группа {i}',
+                slug=f'group{i}',
+                description='Описание'
+            ) for i in range(3)
+        ]
+        Post.objects.bulk_create(Post(
+            text='Test %s' % i,
+            author=cls.authors[i % len(cls.authors)],
+            group=cls.groups[0] if i % 2 else cls.groups[i % 3],
+        ) for i in range(60))
+        cls.post = Post.objects.filter(author=cls.authors[0]).first()
+        cls.guest_client = Client()
+
+    def urls(self):
+        return {
+            'index': reverse('index'),
+            'group_index': reverse('group_index'),
+            'show_group_post': reverse(
+                'show_group_post', kwargs={'slug': self.groups[0].slug}
+            ),
+            'profile': reverse(
+                'profile', kwargs={'username': self.authors[0].username}
+            ),
+            'post': reverse('post', kwargs={
+                'username': self.authors[0].username,
+                'post_id': self.post.id
+            }),
+        }
+
+    def count_queries(self, url):
+        cache.clear()
+        with CaptureQueriesContext(connection) as queries:
+            response = self.guest_client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return len(queries)
+
+    def test_views_fit_query_budget(self):
+        for name, url in self.urls().items():
+            for per_page in (5, 50):
+                with self.subTest(view=name, per_page=per_page):
+                    with override_settings(PAGINATOR_PER_PAGE_VAL=per_page):
+                        self.assertLessEqual(
+                            self.count_queries(url), QUERY_BUDGETS[name]
+                        )
+
+    @override_settings(PAGINATOR_MODES={
+        'index': 'cursor',
+        'show_group_post': 'cursor',
+        'profile': 'cursor',
+    })
+    def test_cursor_views_fit_query_budget(self):
+        for name, url in self.urls().items():
+            with self.subTest(view=name):
+                self.assertLessEqual(
+                    self.count_queries(url), QUERY_BUDGETS[name]
+                )
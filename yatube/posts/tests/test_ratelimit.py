@@ -0,0 +1,111 @@
+from django.core.cache import caches
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+
+from posts.management.commands.benchmark_auth import modes
+from posts.models import Post, User
+from posts.checks import check_shared_caches
+from posts.ratelimit import take_token
+
+
+@override_settings(RATE_LIMITS={
+    'new_post': {'user': (60, 2), 'ip': (600, 3)},
+    'signup': {'ip': (60, 2)},
+})
+class RateLimitTests(TestCase):
+    def setUp(self):
+        limiter = caches['ratelimit']
+        limiter.clear()
+        self.addCleanup(limiter.clear)
+        self.user = User.objects.create_user(username='writer')
+        self.client = Client()
+        self.client.force_login(self.user)
+
+    def publish(self, client=None, **extra):
+        return (client or self.client).post(
+            reverse('new_post'), {'text': 'Пост'}, **extra
+        )
+
+    def test_user_limit(self):
+        for _ in range(2):
+            self.assertEqual(self.publish().status_code, 302)
+        response = self.publish()
+        self.assertEqual(response.status_code, 429)
+        self.assertEqual(response['Retry-After'], '1')
+        self.assertEqual(Post.objects.count(), 2)
+        other = Client()
+        other.force_login(User.objects.create_user(username='other'))
+        self.assertEqual(self.publish(other).status_code, 302)
+
+    def test_ip_limit_is_shared_by_users(self):
+        clients = []
+        for number in range(4):
+            client = Client()
+            client.force_login(
+                User.objects.create_user(username=f'user{number}')
+            )
+            clients.append(client)
+        for client in clients[:3]:
+            self.assertEqual(self.publish(client).status_code, 302)
+        self.assertEqual(self.publish(clients[3]).status_code, 429)
+        response = self.publish(clients[3], REMOTE_ADDR='10.0.0.2')
+        self.assertEqual(response.status_code, 302)
+
+    def test_rejected_request_does_not_load_user(self):
+        self.publish()
+        self.publish()
+        # только чтение сессии, пользователь не загружается
+        with self.assertNumQueries(1):
+            self.assertEqual(self.publish().status_code, 429)
+
+    def test_rejected_signup_skips_database(self):
+        data = {'username': 'x', 'password1': '1', 'password2': '2'}
+        for _ in range(2):
+            Client().post(reverse('signup'), data)
+        with self.assertNumQueries(0):
+            response = Client().post(reverse('signup'), data)
+        self.assertEqual(response.status_code, 429)
+
+    def test_reading_forms_is_not_limited(self):
+        for _ in range(5):
+            self.assertEqual(
+                self.client.get(reverse('new_post')).status_code, 200
+            )
+
+    def test_bucket_refills(self):
+        key = 'ratelimit:test:refill'
+        # 60 в минуту с запасом 2: окно - 2 секунды
+        self.assertEqual(take_token(key, 60, 2, now=100.0), 0)
+        self.assertEqual(take_token(key, 60, 2, now=100.1), 0)
+        self.assertEqual(take_token(key, 60, 2, now=100.2), 1)
+        # прошлое окно учитывается наполовину
+        self.assertEqual(take_token(key, 60, 2, now=103.0), 0)
+        self.assertEqual(take_token(key, 60, 2, now=103.1), 1)
+        self.assertEqual(take_token(key, 60, 2, now=106.0), 0)
+
+
+class SharedCacheCheckTests(TestCase):
+    def test_process_local_caches_warn(self):
+        self.assertEqual(
+            [warning.id for warning in check_shared_caches(None)],
+            ['posts.W001']
+        )
+        with self.settings(**modes()['cached']):
+            self.assertEqual(
+                [warning.id for warning in check_shared_caches(None)],
+                ['posts.W001', 'posts.W001']
+            )
+
+    def test_shared_caches_pass(self):
+        memcached = {
+            'BACKEND': 'django.core.cache.backends.memcached.MemcachedCache',
+            'LOCATION': '127.0.0.1:11211',
+        }
+        with self.settings(CACHES={
+            'default': {
+                'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'
+            },
+            'ratelimit': memcached,
+            'auth': memcached,
+        }):
+            self.assertEqual(check_shared_caches(None), [])
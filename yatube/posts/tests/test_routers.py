@@ -0,0 +1,137 @@
+import time
+
+from django.contrib.auth.models import AnonymousUser
+from django.contrib.sessions.models import Session
+from django.core.cache import cache
+from django.db import transaction
+from django.http import HttpResponse
+from django.test import (Client, RequestFactory, TransactionTestCase,
+                         override_settings)
+from django.urls import reverse
+
+from posts.models import Group, Post, User
+from posts.page_cache import INDEX_SCOPE, anonymous_page_cache
+from posts.paginator import FeedPaginator
+from posts.routers import (STICKY_COOKIE, PrimaryReplicaRouter,
+                           PrimaryStickinessMiddleware, primary_pinned,
+                           primary_reads, wrote)
+
+
+@override_settings(DATABASE_REPLICAS=['replica1'], REPLICA_STICKY_SECONDS=5)
+class PrimaryReplicaRouterTests(TransactionTestCase):
+    # без обёртки TestCase в транзакцию, она сама влияет на роутер
+    def setUp(self):
+        self.router = PrimaryReplicaRouter()
+        self.factory = RequestFactory()
+        # записи вне запросов (другие тесты, команды) закрепляют поток
+        # за default
+        token = primary_pinned.set(False)
+        self.addCleanup(primary_pinned.reset, token)
+        written = wrote.set(False)
+        self.addCleanup(wrote.reset, written)
+
+    def run_request(self, action, **cookies):
+        '''
+        Прогоняет запрос через middleware и возвращает ответ и базу,
+        которую роутер выбрал для чтения в конце запроса.
+        '''
+        seen = {}
+
+        def view(request):
+            action()
+            seen['read'] = self.router.db_for_read(Post)
+            return HttpResponse()
+
+        request = self.factory.get('/')
+        request.COOKIES.update(cookies)
+        response = PrimaryStickinessMiddleware(view)(request)
+        return response, seen['read']
+
+    def test_reads_go_to_replica(self):
+        response, read = self.run_request(lambda: None)
+        self.assertEqual(read, 'replica1')
+        self.assertNotIn(STICKY_COOKIE, response.cookies)
+
+    def test_writes_go_to_primary_and_pin_reads(self):
+        def write():
+            self.assertEqual(self.router.db_for_write(Post), 'default')
+
+        response, read = self.run_request(write)
+        self.assertEqual(read, 'default')
+        self.assertIn(STICKY_COOKIE, response.cookies)
+        cookie = response.cookies[STICKY_COOKIE].value
+        _, read = self.run_request(lambda: None, **{STICKY_COOKIE: cookie})
+        self.assertEqual(read, 'default')
+
+    def test_expired_or_broken_cookie_is_ignored(self):
+        for value in (str(time.time() - 1), 'мусор'):
+            _, read = self.run_request(lambda: None, **{STICKY_COOKIE: value})
+            self.assertEqual(read, 'replica1')
+
+    def test_pin_does_not_leak_between_requests(self):
+        self.run_request(lambda: self.router.db_for_write(Post))
+        self.assertEqual(self.router.db_for_read(Post), 'replica1')
+
+    def test_reads_inside_transaction_use_primary(self):
+        with transaction.atomic():
+            self.assertEqual(self.router.db_for_read(Group), 'default')
+
+    def test_replicas_are_not_migrated(self):
+        self.assertIs(self.router.allow_migrate('replica1', 'posts'), False)
+        self.assertIsNone(self.router.allow_migrate('default', 'posts'))
+
+    @override_settings(DATABASE_REPLICAS=[])
+    def test_without_replicas_everything_uses_default(self):
+        self.assertEqual(self.router.db_for_read(Post), 'default')
+
+    def test_sessions_and_users_are_read_from_primary(self):
+        for model in (Session, User):
+            with self.subTest(model=model):
+                self.assertEqual(self.router.db_for_read(model), 'default')
+
+    def test_login_survives_expired_sticky_cookie(self):
+        User.objects.create_user(username='leo', password='secret-1234')
+        client = Client()
+        response = client.post(
+            reverse('login'), {'username': 'leo', 'password': 'secret-1234'}
+        )
+        self.assertEqual(response.status_code, 302)
+        self.assertIn(STICKY_COOKIE, client.cookies)
+        # закрепление истекло: реплики 'replica1' нет, и чтение сессии
+        # или пользователя из неё уронило бы запрос
+        del client.cookies[STICKY_COOKIE]
+        response = client.get(reverse('password_change'))
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.context['user'].is_authenticated)
+
+    def test_primary_reads_block(self):
+        with primary_reads():
+            self.assertEqual(self.router.db_for_read(Post), 'default')
+        self.assertEqual(self.router.db_for_read(Post), 'replica1')
+
+    def test_cached_pages_are_rendered_from_primary(self):
+        cache.clear()
+        seen = []
+
+        @anonymous_page_cache(lambda: [INDEX_SCOPE])
+        def view(request):
+            seen.append(self.router.db_for_read(Post))
+            return HttpResponse()
+
+        request = self.factory.get('/')
+        request.user = AnonymousUser()
+        view(request)
+        self.assertEqual(seen, ['default'])
+
+    def test_cached_feed_count_is_read_from_primary(self):
+        cache.clear()
+        Post.objects.create(
+            text='Пост', author=User.objects.create_user(username='leo')
+        )
+        token = primary_pinned.set(False)
+        self.addCleanup(primary_pinned.reset, token)
+        with self.assertNumQueries(1, using='default'):
+            count = FeedPaginator(
+                Post.objects.all(), 10, count_key='feed_count:test'
+            ).count
+        self.assertEqual(count, 1)
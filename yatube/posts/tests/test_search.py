@@ -0,0 +1,82 @@
+from django.contrib import admin
+from django.db import connection
+from django.test import Client, RequestFactory, TestCase, override_settings
+from django.urls import reverse
+
+from posts.models import Group, Post, User
+from posts.search import FTS_TABLE, create_search_index
+
+
+class PostSearchTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='leo')
+        cls.other = User.objects.create_user(username='other')
+        cls.group = Group.objects.create(
+            title="Тестовая группа",
+            slug="test",
+            description="Описание тестовой группы"
+        )
+        cls.client = Client()
+
+    def setUp(self):
+        self.best = Post.objects.create(
+            text='Кот кот кот', author=self.user, group=self.group
+        )
+        self.weak = Post.objects.create(
+            text='Кот и длинная история про собаку и другие вещи',
+            author=self.other
+        )
+        self.miss = Post.objects.create(text='Собака', author=self.user)
+
+    def search(self, **params):
+        response = self.client.get(reverse('search'), params)
+        return [post.id for post in response.context['page']]
+
+    def test_results_ranked_by_bm25(self):
+        self.assertEqual(self.search(q='кот'), [self.best.id, self.weak.id])
+
+    def test_filters_by_group_and_author(self):
+        self.assertEqual(self.search(q='кот', group='test'), [self.best.id])
+        self.assertEqual(self.search(q='кот', author='other'), [self.weak.id])
+
+    def test_index_follows_edits_and_deletes(self):
+        self.miss.text = 'Кот пришёл'
+        self.miss.save()
+        self.assertIn(self.miss.id, self.search(q='кот'))
+        self.best.delete()
+        self.assertNotIn(self.best.id, self.search(q='кот'))
+
+    def test_fts_syntax_in_query_is_harmless(self):
+        self.assertEqual(self.search(q='"кот" OR (NEAR'), [])
+        self.assertEqual(self.search(q='***'), [])
+
+    @override_settings(PAGINATOR_PER_PAGE_VAL=2)
+    def test_cursor_pagination(self):
+        extra = Post.objects.create(text='кот', author=self.other)
+        response = self.client.get(reverse('search'), {'q': 'кот'})
+        first = [post.id for post in response.context['page']]
+        next_query = response.context['next_query']
+        response = self.client.get(f"{reverse('search')}?{next_query}")
+        second = [post.id for post in response.context['page']]
+        self.assertEqual(len(first), 2)
+        self.assertCountEqual(
+            first + second, [self.best.id, self.weak.id, extra.id]
+        )
+        self.assertIsNone(response.context['next_query'])
+
+    def test_rebuild_restores_index(self):
+        with connection.cursor() as cursor:
+            cursor.execute(f'DELETE FROM {FTS_TABLE}')
+        self.assertEqual(self.search(q='кот'), [])
+        create_search_index(connection)
+        self.assertEqual(self.search(q='кот'), [self.best.id, self.weak.id])
+
+    def test_admin_search_uses_index(self):
+        model_admin = admin.site._registry[Post]
+        request = RequestFactory().get('/admin/posts/post/')
+        queryset, _ = model_admin.get_search_results(
+            request, Post.objects.all(), 'собаку'
+        )
+        self.assertEqual(list(queryset), [self.weak])
@@ -0,0 +1,49 @@
+import json
+
+from django.core.cache import cache
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+
+from posts.models import Post, User
+
+
+class ServerTimingTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='leo')
+        cls.post = Post.objects.create(text='Пост', author=cls.user)
+
+    def setUp(self):
+        cache.clear()
+        self.client = Client()
+
+    @override_settings(SERVER_TIMING_SAMPLE_RATE=1)
+    def test_header_and_log_for_sampled_request(self):
+        with self.assertLogs('posts.timing', 'INFO') as logs:
+            response = self.client.get(reverse('index'))
+        header = response['Server-Timing']
+        self.assertIn('total;dur=', header)
+        self.assertIn('db;dur=', header)
+        self.assertIn('tpl-index.html;dur=', header)
+        self.assertIn('tpl-include-post_row.html;dur=', header)
+        record = json.loads(logs.records[0].getMessage())
+        self.assertEqual(record['url_name'], 'index')
+        self.assertEqual(record['status'], 200)
+        self.assertGreater(record['db_queries'], 0)
+        self.assertEqual(
+            record['templates']['include/post_row.html']['count'], 1
+        )
+
+    @override_settings(SERVER_TIMING_SAMPLE_RATE=1)
+    def test_includes_are_timed_on_post_page(self):
+        with self.assertLogs('posts.timing', 'INFO') as logs:
+            self.client.get(reverse('post', args=['leo', self.post.id]))
+        record = json.loads(logs.records[0].getMessage())
+        self.assertEqual(record['url_name'], 'post')
+        self.assertIn('include/post_item.html', record['templates'])
+        self.assertIn('include/user_info.html', record['templates'])
+
+    @override_settings(SERVER_TIMING_SAMPLE_RATE=0)
+    def test_nothing_recorded_when_sampling_is_off(self):
+        response = self.client.get(reverse('index'))
+        self.assertFalse(response.has_header('Server-Timing'))
@@ -2,6 +2,7 @@ from django.test import TestCase, Client
 from django.urls import reverse
 from django import forms
 from django.conf import settings
+from django.core.cache import cache
 
 from posts.models import Post, Group, User
 
@@ -26,6 +27,9 @@ class PostPagesTests(TestCase):
             author=cls.user
         )
 
+    def setUp(self):
+        cache.clear()
+
     def test_pages_use_correct_template(self):
         templates_pages_names = {
             'index.html': reverse('index'),
@@ -0,0 +1,97 @@
+import os
+
+from django.conf import settings
+from django.contrib.staticfiles.storage import staticfiles_storage
+from django.core.files.storage import default_storage
+
+from .counters import touch_author, touch_group
+from .imaging import make_thumbnails
+from .jobs import enqueue, handler
+from .models import Post
+from .page_cache import (INDEX_SCOPE, author_scope, group_scope,
+                         invalidate_scopes)
+
+THUMBNAIL_DIR = 'thumbs'
+PLACEHOLDER = 'posts/img/placeholder.svg'
+
+
+def thumbnail_name(image_name, size):
+    root, _ = os.path.splitext(image_name)
+    return f'{THUMBNAIL_DIR}/{size}/{root}.jpg'
+
+
+def thumbnail_targets(image_name):
+    return [
+        (default_storage.path(thumbnail_name(image_name, size)),
+         width, height, crop)
+        for size, (width, height, crop) in settings.THUMBNAIL_SIZES.items()
+    ]
+
+
+def attach_images(posts):
+    '''
+    Адреса картинок карточек: миниатюры, если они готовы, иначе
+    заглушка. Страница не ждёт и не делает миниатюры сама.
+    '''
+    placeholder = None
+    for post in posts:
+        post.image_url = post.image_full_url = None
+        if not post.image:
+            continue
+        if post.thumbnails_ready:
+            post.image_url = default_storage.url(
+                thumbnail_name(post.image.name, 'feed')
+            )
+            post.image_full_url = default_storage.url(
+                thumbnail_name(post.image.name, 'detail')
+            )
+        else:
+            if placeholder is None:
+                placeholder = staticfiles_storage.url(PLACEHOLDER)
+            post.image_url = placeholder
+
+
+def mark_ready(post_id, image_name):
+    '''
+    Отмечает миниатюры готовыми, если картинку поста не успели сменить,
+    и сбрасывает страницы, где стояла заглушка.
+    '''
+    post = Post.objects.filter(
+        pk=post_id, image=image_name
+    ).select_related('author', 'group').first()
+    if post is None:
+        return
+    Post.objects.filter(pk=post_id, image=image_name).update(
+        thumbnails_ready=True
+    )
+    touch_author(post.author_id)
+    touch_group(post.group_id)
+    scopes = [INDEX_SCOPE, author_scope(post.author.username)]
+    if post.group is not None:
+        scopes.append(group_scope(post.group.slug))
+    invalidate_scopes(*scopes)
+
+
+def generate_thumbnails(post_id, image_name):
+    make_thumbnails(
+        default_storage.path(image_name), thumbnail_targets(image_name)
+    )
+    mark_ready(post_id, image_name)
+
+
+def schedule_thumbnails(post_id, image_name):
+    '''
+    Ставит миниатюры в очередь; по готовности пост получит
+    thumbnails_ready.
+    '''
+    enqueue(
+        'thumbnails', {'post': post_id, 'image': image_name},
+        key=f'thumbnails:{post_id}:{image_name}'
+    )
+
+
+# по одной: картинки обрабатываются параллельно в разных воркерах
+@handler('thumbnails')
+def thumbnails_job(payloads):
+    for payload in payloads:
+        generate_thumbnails(payload['post'], payload['image'])
@@ -0,0 +1,159 @@
+from collections import defaultdict
+
+from django.conf import settings
+from django.db.models import F
+from django.db.models.functions import Greatest
+
+from .jobs import enqueue, handler
+from .models import Follow, InboxEntry, Post, UserStats
+from .paginator import (CursorPaginator, InboxCursorPaginator,
+                        MergedCursorPaginator)
+
+
+def fans_out(author_id):
+    '''
+    Раскладывать ли посты автора по лентам подписчиков. У авторов
+    с огромным числом подписчиков посты подмешиваются при чтении.
+    '''
+    followers = UserStats.objects.filter(
+        user_id=author_id
+    ).values_list('followers_count', flat=True).first()
+    return (followers or 0) <= settings.FOLLOW_FANOUT_LIMIT
+
+
+def deliver(posts, user_ids):
+    '''
+    Кладёт посты во входящие читателей user_ids (queryset значений
+    user_id или список) и обрезает переполненные ленты.
+    '''
+    entries = [
+        InboxEntry(user_id=user_id, post_id=post.pk, pub_date=post.pub_date)
+        for user_id in user_ids for post in posts
+    ]
+    if not entries:
+        return
+    InboxEntry.objects.bulk_create(entries, ignore_conflicts=True)
+    readers = {entry.user_id for entry in entries}
+    UserStats.objects.filter(user_id__in=readers).update(
+        inbox_count=F('inbox_count') + len(posts)
+    )
+    trim_inboxes(readers)
+
+
+def fan_out(post):
+    '''
+    Fan-out on write: ставит в очередь раскладку нового поста по лентам
+    подписчиков, сама публикация от числа подписчиков не зависит.
+    '''
+    enqueue('fan_out', {'post': post.pk}, key=f'fan_out:{post.pk}')
+
+
+@handler('fan_out', batch_size=100)
+def fan_out_posts(payloads):
+    posts = defaultdict(list)
+    for post in Post.objects.filter(
+        pk__in=[payload['post'] for payload in payloads]
+    ).only('pk', 'author_id', 'pub_date'):
+        posts[post.author_id].append(post)
+    for author_id, author_posts in posts.items():
+        # подписчики на момент выполнения задачи
+        if fans_out(author_id):
+            deliver(author_posts, Follow.objects.filter(
+                author_id=author_id
+            ).values_list('user_id', flat=True))
+
+
+def backfill(author_id, user_ids):
+    '''
+    Последние посты автора для новых подписчиков (или всех, когда
+    автор снова стал раскладываться по лентам).
+    '''
+    if not fans_out(author_id):
+        return
+    posts = Post.objects.filter(
+        author_id=author_id
+    ).only('pk', 'pub_date')[:settings.INBOX_BACKFILL]
+    deliver(list(posts), list(user_ids))
+
+
+def queue_backfill(author_id, user_id=None, key=None):
+    '''
+    Ставит в очередь backfill для подписчика user_id или, без него,
+    для всех подписчиков автора.
+    '''
+    payload = {'author': author_id}
+    if user_id is not None:
+        payload['user'] = user_id
+    enqueue('backfill', payload, key=key)
+
+
+@handler('backfill', batch_size=50)
+def backfill_followers(payloads):
+    for payload in payloads:
+        # успевшие отписаться ничего не получат
+        followers = Follow.objects.filter(author_id=payload['author'])
+        if 'user' in payload:
+            followers = followers.filter(user_id=payload['user'])
+        backfill(
+            payload['author'], followers.values_list('user_id', flat=True)
+        )
+
+
+def forget(user_id, author_id):
+    '''
+    Убирает посты автора из ленты отписавшегося читателя.
+    '''
+    removed, _ = InboxEntry.objects.filter(
+        user_id=user_id, post__author_id=author_id
+    ).delete()
+    if removed:
+        UserStats.objects.filter(user_id=user_id).update(
+            inbox_count=Greatest(F('inbox_count') - removed, 0)
+        )
+
+
+def trim_inboxes(user_ids):
+    '''
+    Оставляет в переполненных лентах INBOX_SIZE последних постов.
+    Счётчик длины может быть завышен (посты удаляются каскадом),
+    от этого лента лишь обрезается чуть раньше.
+    '''
+    size = settings.INBOX_SIZE
+    overflowing = UserStats.objects.filter(
+        user_id__in=user_ids,
+        inbox_count__gt=size + settings.INBOX_TRIM_SLACK
+    ).values_list('user_id', flat=True)
+    trimmed = []
+    for user_id in overflowing:
+        inbox = InboxEntry.objects.filter(user_id=user_id)
+        boundary = inbox.order_by('-pub_date', '-post_id').values_list(
+            'pub_date', 'post_id'
+        )[size - 1:size].first()
+        if boundary is not None:
+            pub_date, post_id = boundary
+            inbox.filter(pub_date__lte=pub_date).exclude(
+                pub_date=pub_date, post_id__gte=post_id
+            ).delete()
+        trimmed.append(user_id)
+    UserStats.objects.filter(user_id__in=trimmed).update(inbox_count=size)
+
+
+def following_paginator(user, per_page):
+    '''
+    Лента подписок: входящие читателя слиты с постами авторов, которые
+    не раскладываются по лентам. Страница - не больше трёх запросов
+    независимо от её размера и числа подписок.
+    '''
+    inbox = InboxEntry.objects.filter(user=user).select_related(
+        'post__author', 'post__group'
+    )
+    paginators = [InboxCursorPaginator(inbox, per_page)]
+    big_authors = list(Follow.objects.filter(
+        user=user,
+        author__stats__followers_count__gt=settings.FOLLOW_FANOUT_LIMIT
+    ).values_list('author_id', flat=True))
+    if big_authors:
+        paginators.append(CursorPaginator(
+            Post.objects.feed().filter(author_id__in=big_authors), per_page
+        ))
+    return MergedCursorPaginator(paginators, per_page)
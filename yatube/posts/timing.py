@@ -0,0 +1,132 @@
+import json
+import logging
+import random
+import re
+from collections import defaultdict
+from contextlib import ExitStack
+from contextvars import ContextVar
+from functools import wraps
+from time import perf_counter
+
+from django.conf import settings
+from django.db import connections
+from django.template.base import Template
+
+logger = logging.getLogger('posts.timing')
+
+# замеры текущего запроса; None - запрос не попал в выборку
+current_timing = ContextVar('current_timing', default=None)
+
+
+class Timing:
+    '''
+    Замеры одного запроса: SQL (через execute_wrapper) и время отрисовки
+    по шаблонам. Время шаблона включает вложенные include.
+    '''
+
+    def __init__(self):
+        self.queries = 0
+        self.db = 0.0
+        self.templates = defaultdict(lambda: [0, 0.0])
+
+    def __call__(self, execute, sql, params, many, context):
+        started = perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.queries += 1
+            self.db += perf_counter() - started
+
+    def add_template(self, name, seconds):
+        stats = self.templates[name]
+        stats[0] += 1
+        stats[1] += seconds
+
+
+def timed_render(render):
+    @wraps(render)
+    def wrapper(self, context):
+        timing = current_timing.get()
+        if timing is None:
+            return render(self, context)
+        started = perf_counter()
+        try:
+            return render(self, context)
+        finally:
+            timing.add_template(
+                self.name or '<string>', perf_counter() - started
+            )
+    wrapper.server_timing = True
+    return wrapper
+
+
+def instrument_templates():
+    '''
+    Оборачивает Template._render, как это делает тестовое окружение
+    Django: так видны и шаблоны из include. Повторный вызов ничего
+    не делает.
+    '''
+    if not getattr(Template._render, 'server_timing', False):
+        Template._render = timed_render(Template._render)
+
+
+def metric_name(template_name):
+    # имя метрики Server-Timing - token, без «/» и пробелов
+    return 'tpl-' + re.sub(r'[^A-Za-z0-9_.-]', '-', template_name)
+
+
+def server_timing_header(timing, total):
+    metrics = [
+        f'total;dur={total * 1000:.1f}',
+        f'db;dur={timing.db * 1000:.1f};desc="{timing.queries} queries"',
+    ]
+    for name, (count, seconds) in sorted(timing.templates.items()):
+        metrics.append(
+            f'{metric_name(name)};dur={seconds * 1000:.1f};'
+            f'desc="{name} x{count}"'
+        )
+    return ', '.join(metrics)
+
+
+class ServerTimingMiddleware:
+    '''
+    Для доли запросов SERVER_TIMING_SAMPLE_RATE замеряет SQL, шаблоны
+    и общее время, отдаёт их в заголовке Server-Timing и пишет строкой
+    JSON в лог posts.timing с именем url. Запросы вне выборки стоят
+    одного вызова random().
+    '''
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        instrument_templates()
+
+    def __call__(self, request):
+        if random.random() >= settings.SERVER_TIMING_SAMPLE_RATE:
+            return self.get_response(request)
+        timing = Timing()
+        token = current_timing.set(timing)
+        started = perf_counter()
+        try:
+            with ExitStack() as stack:
+                for connection in connections.all():
+                    stack.enter_context(connection.execute_wrapper(timing))
+                response = self.get_response(request)
+        finally:
+            current_timing.reset(token)
+        total = perf_counter() - started
+        response['Server-Timing'] = server_timing_header(timing, total)
+        match = request.resolver_match
+        logger.info(json.dumps({
+            'url_name': match.url_name if match else None,
+            'method': request.method,
+            'path': request.path,
+            'status': response.status_code,
+            'total_ms': round(total * 1000, 2),
+            'db_queries': timing.queries,
+            'db_ms': round(timing.db * 1000, 2),
+            'templates': {
+                name: {'count': count, 'ms': round(seconds * 1000, 2)}
+                for name, (count, seconds) in timing.templates.items()
+            },
+        }, ensure_ascii=False))
+        return response
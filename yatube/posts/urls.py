@@ -1,16 +1,56 @@
 from django.urls import path
 
-from . import views
+from . import feeds, views
 
 urlpatterns = [
     path('', views.index, name='index'),
     path('new/', views.new_post, name='new_post'),
+    path('search/', views.search, name='search'),
+    path('export/', views.export_posts, name='export_posts'),
+    path('follow/', views.follow_index, name='follow_index'),
+    path('group/', views.group_index, name='group_index'),
     path('group/<slug:slug>/', views.group_posts, name='show_group_post'),
+    path('feeds/rss/', feeds.latest_rss, name='feed_rss'),
+    path('feeds/atom/', feeds.latest_atom, name='feed_atom'),
+    path('feeds/group/<slug:slug>/rss/', feeds.group_rss,
+         name='group_feed_rss'),
+    path('feeds/group/<slug:slug>/atom/', feeds.group_atom,
+         name='group_feed_atom'),
+    path('feeds/author/<str:username>/rss/', feeds.author_rss,
+         name='author_feed_rss'),
+    path('feeds/author/<str:username>/atom/', feeds.author_atom,
+         name='author_feed_atom'),
+    path('api/posts/', views.api_posts, name='api_posts'),
+    path(
+        'api/group/<slug:slug>/posts/',
+        views.api_group_posts,
+        name='api_group_posts'
+    ),
+    path(
+        'api/<str:username>/posts/',
+        views.api_profile_posts,
+        name='api_profile_posts'
+    ),
     path('<str:username>/', views.profile, name='profile'),
+    path(
+        '<str:username>/follow/',
+        views.profile_follow,
+        name='profile_follow'
+    ),
+    path(
+        '<str:username>/unfollow/',
+        views.profile_unfollow,
+        name='profile_unfollow'
+    ),
     path('<str:username>/<int:post_id>/', views.post_view, name='post'),
     path(
         '<str:username>/<int:post_id>/edit/',
         views.post_edit,
         name='post_edit'
     ),
+    path(
+        '<str:username>/<int:post_id>/comment/',
+        views.add_comment,
+        name='add_comment'
+    ),
 ]
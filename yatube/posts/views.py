@@ -1,17 +1,49 @@
-from django.core.paginator import Paginator
+from math import ceil
+
 from django.shortcuts import render, get_object_or_404, redirect
+from django.contrib.admin.views.decorators import staff_member_required
 from django.contrib.auth.decorators import login_required
 from django.conf import settings
+from django.http import (HttpResponseBadRequest, JsonResponse,
+                         StreamingHttpResponse)
+from django.urls import reverse
+from django.utils.cache import patch_vary_headers
+
+from .models import Follow, Post, Group, User, UserStats
+from .api import posts_payload
+from .conditional import (conditional_page, group_stamp, post_stamp,
+                          profile_stamp)
+from .export import (CONTENT_TYPES, FORMATS, encode, export_lines,
+                     export_queryset)
+from .forms import CommentForm, PostForm
+from .fragments import ROW_TEMPLATE, attach_cards
+from .page_cache import (GROUPS_SCOPE, INDEX_SCOPE, anonymous_page_cache,
+                         author_scope, depend_on, group_scope)
+from .paginator import feed_count_key, paginate
+from .ratelimit import rate_limit
+from .search import search_posts
+from .timeline import following_paginator
 
-from .models import Post, Group, User
-from .forms import PostForm
+# максимальное число SQL-запросов на страницу для анонимного читателя
+# независимо от размера страницы (проверяется в tests/test_queries.py);
+# group, profile и post тратят один запрос на ETag/Last-Modified,
+# post - ещё один на страницу комментариев
+QUERY_BUDGETS = {
+    'index': 2,
+    'group_index': 2,
+    'show_group_post': 3,
+    'profile': 3,
+    'post': 3,
+}
 
 
+@anonymous_page_cache(lambda: [INDEX_SCOPE])
 def index(request):
-    post_list = Post.objects.all()
-    paginator = Paginator(post_list, settings.PAGINATOR_PER_PAGE_VAL)
-    page_number = request.GET.get('page')
-    page = paginator.get_page(page_number)
+    post_list = Post.objects.feed()
+    page = paginate(
+        request, post_list, 'index', count_key=feed_count_key(INDEX_SCOPE)
+    )
+    attach_cards(request, page, ROW_TEMPLATE)
     return render(
         request,
         'index.html',
@@ -19,12 +51,15 @@ def index(request):
     )
 
 
+@anonymous_page_cache(lambda slug: [group_scope(slug)])
+@conditional_page(group_stamp)
 def group_posts(request, slug):
     group = get_object_or_404(Group, slug=slug)
-    post_list = group.posts.all()
-    paginator = Paginator(post_list, settings.PAGINATOR_PER_PAGE_VAL)
-    page_number = request.GET.get('page')
-    page = paginator.get_page(page_number)
+    post_list = Post.objects.feed().filter(group=group)
+    page = paginate(
+        request, post_list, 'show_group_post', count=group.posts_count
+    )
+    attach_cards(request, page, ROW_TEMPLATE)
     return render(
         request,
         'group.html',
@@ -32,11 +67,91 @@ def group_posts(request, slug):
     )
 
 
+@anonymous_page_cache(lambda: [GROUPS_SCOPE])
+def group_index(request):
+    groups = Group.objects.only(
+        'title', 'slug', 'description', 'posts_count', 'last_post'
+    ).order_by('title', 'id')
+    page = paginate(
+        request, groups, 'group_index', count_key=feed_count_key(GROUPS_SCOPE)
+    )
+    # счётчики и даты групп меняются с их постами: устаревает только
+    # страница каталога, где показана группа
+    depend_on(request, *(group_scope(group.slug) for group in page))
+    return render(request, 'groups.html', {'page': page})
+
+
+def author_posts_count(user):
+    try:
+        return user.stats.posts_count
+    except UserStats.DoesNotExist:
+        return None
+
+
+def search(request):
+    query = request.GET.get('q', '').strip()
+    group = author = None
+    if request.GET.get('group'):
+        group = get_object_or_404(Group, slug=request.GET['group'])
+    if request.GET.get('author'):
+        author = get_object_or_404(User, username=request.GET['author'])
+    page = search_posts(
+        query,
+        settings.PAGINATOR_PER_PAGE_VAL,
+        group=group,
+        author=author,
+        token=request.GET.get('cursor'),
+    )
+    attach_cards(request, page)
+    next_query = None
+    if page.has_next():
+        params = request.GET.copy()
+        params['cursor'] = page.next_cursor
+        next_query = params.urlencode()
+    context = {
+        'query': query,
+        'group': group,
+        'author': author,
+        'page': page,
+        'next_query': next_query,
+    }
+    return render(request, 'search.html', context)
+
+
+@staff_member_required
+def export_posts(request):
+    file_format = request.GET.get('format', 'jsonl')
+    if file_format not in FORMATS:
+        return HttpResponseBadRequest('format: jsonl или csv')
+    try:
+        posts = export_queryset(
+            group=request.GET.get('group'),
+            author=request.GET.get('author'),
+            since=request.GET.get('since'),
+            until=request.GET.get('until'),
+        )
+    except ValueError as error:
+        return HttpResponseBadRequest(str(error))
+    compress = 'gzip' in request.META.get('HTTP_ACCEPT_ENCODING', '')
+    response = StreamingHttpResponse(
+        encode(export_lines(posts, file_format), compress),
+        content_type=CONTENT_TYPES[file_format]
+    )
+    response['Content-Disposition'] = (
+        f'attachment; filename="posts.{file_format}"'
+    )
+    if compress:
+        response['Content-Encoding'] = 'gzip'
+    patch_vary_headers(response, ['Accept-Encoding'])
+    return response
+
+
+@rate_limit('new_post')
 @login_required
 def new_post(request):
     form = PostForm()
     if request.method == 'POST':
-        form = PostForm(request.POST)
+        form = PostForm(request.POST, request.FILES)
         if form.is_valid():
             post = form.save(commit=False)
             post.author = request.user
@@ -45,34 +160,109 @@ def new_post(request):
     return render(request, 'newpost.html', {'form': form})
 
 
+@login_required
+def follow_index(request):
+    paginator = following_paginator(
+        request.user, settings.PAGINATOR_PER_PAGE_VAL
+    )
+    page = paginator.get_page(request.GET.get('cursor'))
+    attach_cards(request, page, ROW_TEMPLATE)
+    return render(request, 'follow.html', {'page': page})
+
+
+@login_required
+def profile_follow(request, username):
+    author = get_object_or_404(User, username=username)
+    if author != request.user:
+        Follow.objects.get_or_create(user=request.user, author=author)
+    return redirect('profile', username=username)
+
+
+@login_required
+def profile_unfollow(request, username):
+    author = get_object_or_404(User, username=username)
+    for follow in Follow.objects.filter(user=request.user, author=author):
+        # по одной, чтобы сработали сигналы счётчиков и ленты
+        follow.delete()
+    return redirect('profile', username=username)
+
+
+@anonymous_page_cache(lambda username: [author_scope(username)])
+@conditional_page(profile_stamp)
 def profile(request, username):
-    user = get_object_or_404(User, username=username)
-    posts = Post.objects.filter(author=user)
-    paginator = Paginator(posts, settings.PAGINATOR_PER_PAGE_VAL)
-    page_number = request.GET.get('page')
-    page = paginator.get_page(page_number)
+    user = get_object_or_404(
+        User.objects.select_related('stats'), username=username
+    )
+    posts = Post.objects.feed().filter(author=user)
+    page = paginate(request, posts, 'profile', count=author_posts_count(user))
+    attach_cards(request, page)
+    following = request.user.is_authenticated and Follow.objects.filter(
+        user=request.user, author=user
+    ).exists()
     context = {
         'author': user,
         'page': page,
+        'following': following,
     }
     return render(request, 'profile.html', context)
 
 
+@conditional_page(post_stamp)
 def post_view(request, username, post_id):
-    post = get_object_or_404(Post, pk=post_id, author__username=username)
+    post = get_object_or_404(
+        Post.objects.feed().select_related('author__stats'),
+        pk=post_id,
+        author__username=username
+    )
+    attach_cards(request, [post])
+    comments = paginate(
+        request,
+        post.comments.select_related('author'),
+        'post',
+        count=post.comments_count
+    )
     context = {
         'author': post.author,
-        'post': post
+        'post': post,
+        'page': comments,
+        'form': CommentForm(),
     }
     return render(request, 'post.html', context)
 
 
+@rate_limit('add_comment')
+@login_required
+def add_comment(request, username, post_id):
+    post = get_object_or_404(
+        Post.objects.only('pk'), pk=post_id, author__username=username
+    )
+    form = CommentForm(request.POST or None)
+    if not form.is_valid():
+        return redirect('post', username=username, post_id=post_id)
+    comment = form.save(commit=False)
+    comment.author = request.user
+    comment.post = post
+    comment.save()
+    # новый комментарий - последний: ведём на его страницу
+    post.refresh_from_db(fields=['comments_count'])
+    last_page = max(
+        ceil(post.comments_count / settings.PAGINATOR_PER_PAGE_VAL), 1
+    )
+    return redirect(
+        f'{reverse("post", args=[username, post_id])}'
+        f'?page={last_page}#comment-{comment.pk}'
+    )
+
+
+@rate_limit('post_edit')
 @login_required
 def post_edit(request, username, post_id):
     post = get_object_or_404(Post, pk=post_id, author__username=username)
     if request.user != post.author:
         return redirect('post', username=username, post_id=post_id)
-    form = PostForm(request.POST or None, instance=post)
+    form = PostForm(
+        request.POST or None, files=request.FILES or None, instance=post
+    )
     if form.is_valid():
         form.save()
         return redirect(
@@ -83,3 +273,25 @@ def post_edit(request, username, post_id):
     return render(
         request, 'newpost.html', {'form': form, 'post': post},
     )
+
+
+def api_response(request, posts):
+    try:
+        payload = posts_payload(request, posts)
+    except ValueError as error:
+        return JsonResponse({'error': str(error)}, status=400)
+    return JsonResponse(payload, json_dumps_params={'ensure_ascii': False})
+
+
+def api_posts(request):
+    return api_response(request, Post.objects.feed())
+
+
+def api_group_posts(request, slug):
+    group = get_object_or_404(Group.objects.only('pk'), slug=slug)
+    return api_response(request, Post.objects.feed().filter(group=group))
+
+
+def api_profile_posts(request, username):
+    user = get_object_or_404(User.objects.only('pk'), username=username)
+    return api_response(request, Post.objects.feed().filter(author=user))
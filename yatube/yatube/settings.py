@@ -47,12 +47,28 @@ INSTALLED_APPS = [
     'django.contrib.staticfiles',
 ]
 
+# кэш сессий и снимков пользователей. Пока он не задан общим для всех
+# процессов (memcached и т.п.), сессии хранятся в БД, а пользователь
+# читается стандартным AuthenticationMiddleware: иначе выход и смена
+# пароля не видны другим процессам
+AUTH_CACHE_BACKEND = os.environ.get(
+    'YATUBE_AUTH_CACHE_BACKEND',
+    'django.core.cache.backends.locmem.LocMemCache'
+)
+SHARED_AUTH_CACHE = AUTH_CACHE_BACKEND not in (
+    'django.core.cache.backends.locmem.LocMemCache',
+    'django.core.cache.backends.dummy.DummyCache',
+)
+
 MIDDLEWARE = [
+    'posts.timing.ServerTimingMiddleware',
     'django.middleware.security.SecurityMiddleware',
+    'posts.routers.PrimaryStickinessMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
-    'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'posts.auth.CachedAuthenticationMiddleware' if SHARED_AUTH_CACHE
+    else 'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
@@ -77,6 +93,16 @@ TEMPLATES = [
     },
 ]
 
+# без DEBUG шаблоны компилируются один раз на процесс
+if not DEBUG:
+    TEMPLATES[0]['APP_DIRS'] = False
+    TEMPLATES[0]['OPTIONS']['loaders'] = [
+        ('django.template.loaders.cached.Loader', [
+            'django.template.loaders.filesystem.Loader',
+            'django.template.loaders.app_directories.Loader',
+        ]),
+    ]
+
 WSGI_APPLICATION = 'yatube.wsgi.application'
 
 
@@ -90,6 +116,24 @@ DATABASES = {
     }
 }
 
+# реплики только для чтения: пути к файлам-копиям базы через запятую
+# в YATUBE_DB_REPLICAS (копии обновляет manage.py sync_replicas);
+# без них всё читается из default
+DATABASE_REPLICAS = []
+for number, path in enumerate(
+    filter(None, os.environ.get('YATUBE_DB_REPLICAS', '').split(',')), 1
+):
+    DATABASES[f'replica{number}'] = {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': path,
+        'TEST': {'MIRROR': 'default'},
+    }
+    DATABASE_REPLICAS.append(f'replica{number}')
+
+DATABASE_ROUTERS = ['posts.routers.PrimaryReplicaRouter']
+# сколько секунд после записи клиент читает из default
+REPLICA_STICKY_SECONDS = 5
+
 
 # Password validation
 # https://docs.djangoproject.com/en/2.2/ref/settings/#auth-password-validators
@@ -136,6 +180,14 @@ STATIC_URL = "/static/"
 # задаём адрес директории, куда командой *collectstatic*
 # будет собрана вся статика
 STATIC_ROOT = os.path.join(BASE_DIR, "static")
+# collectstatic дописывает к именам хэш содержимого, пишет манифест
+# и сжатые .gz (и .br, если установлен пакет brotli) варианты;
+# yatube.wsgi отдаёт их с Cache-Control immutable
+STATICFILES_STORAGE = "posts.assets.CompressedManifestStorage"
+
+# загруженные картинки постов и их миниатюры
+MEDIA_URL = "/media/"
+MEDIA_ROOT = os.path.join(BASE_DIR, "media")
 
 # Login
 
@@ -149,3 +201,125 @@ EMAIL_BACKEND = "django.core.mail.backends.filebased.EmailBackend"
 EMAIL_FILE_PATH = os.path.join(BASE_DIR, "sent_emails")
 
 PAGINATOR_PER_PAGE_VAL = 10
+# режим паджинации лент по имени url: 'page' - номера страниц
+# (LIMIT/OFFSET и COUNT(*)), 'cursor' - курсор по (pub_date, id)
+PAGINATOR_MODES = {
+    'index': 'page',
+    'show_group_post': 'page',
+    'profile': 'page',
+}
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    },
+    # счётчики ограничения частоты запросов; чтобы лимиты были общими
+    # для всех процессов, здесь нужен memcached или другой общий кэш
+    'ratelimit': {
+        'BACKEND': os.environ.get(
+            'YATUBE_RATELIMIT_CACHE_BACKEND',
+            'django.core.cache.backends.locmem.LocMemCache'
+        ),
+        'LOCATION': os.environ.get(
+            'YATUBE_RATELIMIT_CACHE_LOCATION', 'ratelimit'
+        ),
+    },
+    # сессии и снимки пользователей, см. SHARED_AUTH_CACHE
+    'auth': {
+        'BACKEND': AUTH_CACHE_BACKEND,
+        'LOCATION': os.environ.get('YATUBE_AUTH_CACHE_LOCATION', 'auth'),
+    },
+}
+if SHARED_AUTH_CACHE:
+    # сессии читаются из кэша и пишутся в БД: вошедший читатель
+    # не тратит запросы на сессию и (через CachedAuthenticationMiddleware)
+    # на себя
+    SESSION_ENGINE = 'django.contrib.sessions.backends.cached_db'
+    SESSION_CACHE_ALIAS = 'auth'
+AUTH_CACHE = 'auth'
+# снимок пользователя сбрасывается при его сохранении и выходе, срок
+# хранения страхует от правок в обход сигналов
+AUTH_SNAPSHOT_TIMEOUT = 60 * 60
+# сколько секунд хранить отрисованные карточки постов
+POST_CARD_CACHE_TIMEOUT = 60 * 60 * 24
+# страницы лент для анонимов сбрасываются при записи, срок хранения
+# нужен только чтобы не держать в кэше давно не читаемые страницы
+PAGE_CACHE_TIMEOUT = 60 * 60 * 24
+# на сколько секунд могут расходиться часы процессов: страница, собранная
+# позже сброса её поста меньше чем на столько, не кэшируется
+PAGE_CACHE_CLOCK_SKEW = 1
+# число постов ленты сбрасывается при создании и удалении постов,
+# срок хранения страхует от массовых вставок в обход сигналов
+FEED_COUNT_CACHE_TIMEOUT = 60 * 60
+# наибольший ?limit= страницы JSON API
+API_MAX_PAGE_SIZE = 100
+# сколько последних постов отдают RSS/Atom
+SYNDICATION_FEED_SIZE = 20
+# посты авторов, у которых подписчиков больше, не раскладываются по
+# лентам подписчиков при публикации, а подмешиваются при чтении
+FOLLOW_FANOUT_LIMIT = 1000
+# сколько последних постов хранится в ленте подписок читателя; лента
+# обрезается, когда перерастает лимит на INBOX_TRIM_SLACK записей
+INBOX_SIZE = 500
+INBOX_TRIM_SLACK = 50
+# сколько последних постов автора попадает в ленту при подписке
+INBOX_BACKFILL = 100
+# миниатюры картинок постов: имя -> (ширина, высота, обрезать ли
+# до точного размера); делаются фоновой задачей
+THUMBNAIL_SIZES = {
+    'feed': (960, 540, True),
+    'detail': (1280, 1280, False),
+}
+
+# фоновая очередь задач в БД, которую разбирает run_workers: число
+# процессов, пауза при пустой очереди и повторы упавших задач
+# с удвоением задержки
+JOB_WORKERS = 2
+JOB_POLL_INTERVAL = 1.0
+JOB_MAX_ATTEMPTS = 5
+JOB_RETRY_DELAY = 10
+JOB_RETRY_MAX_DELAY = 60 * 60
+# сколько секунд задача числится за воркером: если он упал, по истечении
+# срока задачу возьмёт другой
+JOB_LEASE = 5 * 60
+# сколько хранить выполненные задачи, а значит и помнить их ключи
+JOB_RETENTION = 60 * 60 * 24
+
+# ограничения частоты записи: представление -> {'ip' и/или 'user':
+# (запросов в минуту, сколько можно сделать подряд)}
+RATE_LIMITS = {
+    'new_post': {'user': (10, 20), 'ip': (30, 60)},
+    'post_edit': {'user': (30, 60), 'ip': (60, 120)},
+    'signup': {'ip': (5, 10)},
+    'add_comment': {'user': (20, 20), 'ip': (60, 60)},
+}
+RATE_LIMIT_CACHE = 'ratelimit'
+# откуда брать IP клиента; за nginx - например HTTP_X_REAL_IP
+RATE_LIMIT_IP_HEADER = os.environ.get(
+    'YATUBE_RATELIMIT_IP_HEADER', 'REMOTE_ADDR'
+)
+
+# доля запросов, для которых пишутся Server-Timing и лог posts.timing
+SERVER_TIMING_SAMPLE_RATE = float(
+    os.environ.get('YATUBE_TIMING_SAMPLE_RATE', 0)
+)
+
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'handlers': {
+        'console': {'class': 'logging.StreamHandler'},
+    },
+    'loggers': {
+        'posts.timing': {
+            'handlers': ['console'],
+            'level': 'INFO',
+            'propagate': False,
+        },
+        'posts.jobs': {
+            'handlers': ['console'],
+            'level': 'INFO',
+            'propagate': False,
+        },
+    },
+}
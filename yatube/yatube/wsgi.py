@@ -9,8 +9,16 @@ https://docs.djangoproject.com/en/2.2/howto/deployment/wsgi/
 
 import os
 
+from django.conf import settings
 from django.core.wsgi import get_wsgi_application
 
+from posts.assets import PrecompressedStaticFiles
+
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'yatube.settings')
 
 application = get_wsgi_application()
+
+# собранная статика отдаётся до Django, сжатой заранее
+application = PrecompressedStaticFiles(
+    application, settings.STATIC_ROOT, settings.STATIC_URL
+)